@@ -0,0 +1,108 @@
+# --- Standard Library Imports ---
+import json
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import text
+
+# Compact format, version 1: 'c1:' followed by comma-separated entries, one per answered
+# question, in the order they were answered. An entry is the question id in base 36
+# (empty if unknown), then the selected option and the correct option as single digits
+# ('-' for no valid selection / unknown correct answer). is_correct is derived from them.
+# A 20-question attempt takes about 120 bytes instead of about 1.8 KB of JSON.
+COMPACT_PREFIX = 'c1:'
+_NO_VALUE = '-'
+
+
+def _digit(value):
+    # Same equality as the grading in submit_quiz: True == 1 and 1.0 == 1
+    if isinstance(value, (int, float)) and 0 <= value <= 9 and value == int(value):
+        return str(int(value))
+    return _NO_VALUE
+
+
+def _base36(number):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if number == 0:
+        return '0'
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+    return encoded
+
+
+def encode_answers(results):
+    """
+    Encodes the graded answers of an attempt (dicts with question_id, user_answer_index,
+    is_correct and correct_answer_index, as built by submit_quiz) in the compact format.
+    """
+    entries = []
+    for result in results:
+        question_id = result.get('question_id')
+        selected = _digit(result.get('user_answer_index'))
+        correct = _digit(result.get('correct_answer_index'))
+        if result.get('is_correct') and (selected == _NO_VALUE or selected != correct):
+            raise ValueError(f"Cannot encode an answer marked correct that does not match the key: {result}")
+        prefix = _base36(question_id) if isinstance(question_id, int) and question_id >= 0 else ''
+        entries.append(prefix + selected + correct)
+    return COMPACT_PREFIX + ','.join(entries)
+
+
+def decode_answers(data):
+    """
+    Returns the list of answer dicts stored in UserQuizStat.user_answers_data.
+    Reads the compact format and legacy JSON rows.
+    """
+    if not data:
+        return []
+    if not data.startswith(COMPACT_PREFIX):
+        return json.loads(data) # Legacy JSON array of dicts
+
+    results = []
+    body = data[len(COMPACT_PREFIX):]
+    for entry in body.split(',') if body else []:
+        question_part, selected, correct = entry[:-2], entry[-2], entry[-1]
+        selected_index = None if selected == _NO_VALUE else int(selected)
+        correct_index = -1 if correct == _NO_VALUE else int(correct)
+        results.append({
+            'question_id': int(question_part, 36) if question_part else None,
+            'user_answer_index': selected_index,
+            'is_correct': selected_index is not None and selected_index == correct_index,
+            'correct_answer_index': correct_index
+        })
+    return results
+
+
+def reencode_answers(connection, to_legacy=False, chunk_size=1000):
+    """
+    Rewrites user_answers_data of every UserQuizStat row into the compact format
+    (or back to JSON with to_legacy), walking the table by id in chunks so that
+    memory use does not depend on its size. Used by the migration and by
+    `flask reencode-answers`. Returns (rows rewritten, bytes before, bytes after).
+    """
+    rewritten, bytes_before, bytes_after = 0, 0, 0
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, user_answers_data FROM user_quiz_stat WHERE id > :last_id ORDER BY id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': chunk_size}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        updates = []
+        for stat_id, data in rows:
+            if not data or data.startswith(COMPACT_PREFIX) != to_legacy:
+                continue # Empty or already in the target format
+            try:
+                decoded = decode_answers(data)
+                new_data = json.dumps(decoded) if to_legacy else encode_answers(decoded)
+            except (ValueError, TypeError, AttributeError):
+                continue # Rows the compact format cannot represent stay JSON, which is still readable
+            updates.append({'id': stat_id, 'data': new_data})
+            bytes_before += len(data.encode())
+            bytes_after += len(new_data.encode())
+        if updates:
+            connection.execute(text("UPDATE user_quiz_stat SET user_answers_data = :data WHERE id = :id"), updates)
+            rewritten += len(updates)
+    return rewritten, bytes_before, bytes_after
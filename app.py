@@ -9,12 +9,26 @@ from flask_migrate import Migrate
 # --- Project File Imports ---
 from models import db, User, QuizPack, Question, UserQuizStat # Import db and models from models
 from config import Config
+from db_engine import configure_engine_options, init_sqlite_pragmas
+from pack_cache import pack_cache
+from attempt_store import attempt_store
+from submission_queue import submission_writer
+from user_cache import user_cache
+from passwords import password_hasher
+from page_cache import fragment_cache, conditional_page
+from assets import asset_manifest
+from leaderboard import leaderboards
+from metrics import request_metrics
+from query_budget import query_budgets, query_budget
+from commands import (rebuild_summaries_command, rebuild_leaderboards_command, rebuild_question_stats_command, check_query_plans_command,
+                      check_query_budgets_command, import_users_command, build_assets_command, reencode_answers_command)
 
 # --- Blueprint Imports ---
 from routes.auth import auth_bp
 from routes.packs import packs_bp
 from routes.quiz import quiz_bp
 from routes.admin import admin_bp
+from routes.leaderboard import leaderboard_bp
 
 
 # --- Flask App Initialization ---
@@ -22,8 +36,20 @@ app = Flask(__name__)
 app.config.from_object(Config) # Load configuration from the Config class
 
 # --- Extension Initialization ---
+configure_engine_options(app) # Pool settings of the selected DB_ENGINE_PROFILE
 db.init_app(app) # Bind db to the app
+init_sqlite_pragmas(app, db) # WAL, busy_timeout etc. on every connection
 migrate = Migrate(app, db) # Initialize Flask-Migrate after DB
+pack_cache.init_app(app) # In-process cache of compiled quiz packs
+attempt_store.init_app(app) # Server-side store of quizzes in progress
+submission_writer.init_app(app) # Optional write-behind queue for quiz submissions
+user_cache.init_app(app) # Identity cache behind load_user
+password_hasher.init_app(app) # Process pool for password hashing
+fragment_cache.init_app(app) # Rendered pack-card fragments
+asset_manifest.init_app(app) # Fingerprinted, precompressed static files (flask build-assets)
+leaderboards.init_app(app) # In-process per-pack and global leaderboards
+request_metrics.init_app(app) # Per-endpoint latency and SQL metrics, served at /admin/metrics
+query_budgets.init_app(app) # Per-view SQL statement budgets, enforced under TESTING
 
 login_manager = LoginManager(app)
 login_manager.login_view = 'auth.login' # Tell Flask-Login where to redirect for login
@@ -31,8 +57,22 @@ login_manager.login_view = 'auth.login' # Tell Flask-Login where to redirect for
 # --- User Loader for Flask-Login ---
 @login_manager.user_loader
 def load_user(user_id):
-    """Callback function for Flask-Login, loads a user by ID."""
-    return User.query.get(int(user_id))
+    """
+    Callback function for Flask-Login, loads a user by ID.
+    Served from the identity cache, so most requests do not query the user table.
+    """
+    return user_cache.load(int(user_id))
+
+# --- Request Metrics ---
+@app.before_request
+def start_request_metrics():
+    """Starts timing the request and counting its SQL statements."""
+    request_metrics.start_request()
+
+@app.after_request
+def record_request_metrics(response):
+    """Records the latency, SQL statement count and SQL time of the request."""
+    return request_metrics.finish_request(response)
 
 # --- Jinja2 Filters ---
 app.jinja_env.filters['chr'] = chr
@@ -43,12 +83,25 @@ app.register_blueprint(auth_bp)
 app.register_blueprint(packs_bp)
 app.register_blueprint(quiz_bp)
 app.register_blueprint(admin_bp) # Register the admin blueprint
+app.register_blueprint(leaderboard_bp)
+
+# --- CLI Commands ---
+app.cli.add_command(rebuild_summaries_command) # flask rebuild-summaries
+app.cli.add_command(rebuild_leaderboards_command) # flask rebuild-leaderboards
+app.cli.add_command(rebuild_question_stats_command) # flask rebuild-question-stats
+app.cli.add_command(check_query_plans_command) # flask check-query-plans
+app.cli.add_command(check_query_budgets_command) # flask check-query-budgets
+app.cli.add_command(import_users_command) # flask import-users
+app.cli.add_command(build_assets_command) # flask build-assets
+app.cli.add_command(reencode_answers_command) # flask reencode-answers
 
 # --- Main Route ---
 @app.route("/")
+@query_budget(1)
 def index():
     """Main page of the application."""
-    return render_template("index.html")
+    # The page only depends on the logged-in user, which conditional_page adds to the ETag
+    return conditional_page((), lambda: render_template("index.html"))
 
 # --- 404 Error Handler ---
 @app.errorhandler(404)
@@ -0,0 +1,174 @@
+# --- Standard Library Imports ---
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+# --- Third-Party Library Imports ---
+from flask import current_app, url_for, request, send_from_directory
+
+# brotli is optional: without it only gzip variants are built
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# File types worth precompressing; images such as webp are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.txt', '.html', '.map'}
+# Content-Encoding value -> suffix of the precompressed file, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def static_asset_url(image_url):
+    """
+    Resolves an image URL stored with a question (e.g. '/static/img/x.webp' or 'img/x.webp')
+    into the final URL the browser should load. Files listed in the asset manifest
+    get their fingerprinted URL; other local files get a '?v=<mtime>' suffix so a
+    changed file is never served from a stale browser cache.
+    External URLs are returned unchanged.
+    """
+    if not image_url:
+        return None
+    if image_url.startswith(('http://', 'https://', '//', 'data:')):
+        return image_url
+
+    filename = image_url[len('/static/'):] if image_url.startswith('/static/') else image_url.lstrip('/')
+    if asset_manifest.resolve(filename):
+        return url_for('static', filename=filename) # Rewritten to the fingerprinted file
+    try:
+        version = int(os.path.getmtime(os.path.join(current_app.static_folder, filename)))
+    except OSError:
+        # Missing file: still return its URL so the browser shows the usual broken image
+        return url_for('static', filename=filename)
+    return url_for('static', filename=filename, v=version)
+
+
+# --- Build step ---
+
+def build_assets(static_folder, build_dir='build'):
+    """
+    Copies every static file to <static>/<build_dir> under a content-hashed name
+    (css/style.css -> build/css/style.1a2b3c4d5e.css), writes gzip and, if the
+    brotli package is installed, brotli variants of text assets, and writes the
+    manifest the application uses to rewrite url_for('static', ...).
+    Returns {'files': n, 'bytes': ..., 'gzip_bytes': ..., 'br_bytes': ...} for the
+    compressible files, to report the savings.
+    """
+    output_folder = os.path.join(static_folder, build_dir)
+    shutil.rmtree(output_folder, ignore_errors=True)
+    manifest = {}
+    totals = {'files': 0, 'compressible_files': 0, 'bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0}
+
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and build_dir in dirs:
+            dirs.remove(build_dir) # Never fingerprint previous build output
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()[:10]
+            stem, extension = os.path.splitext(logical)
+            built = f"{build_dir}/{stem}.{digest}{extension}"
+            target = os.path.join(static_folder, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+
+            encodings = []
+            totals['files'] += 1
+            if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+                variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+                if brotli is not None:
+                    variants['br'] = brotli.compress(content, quality=11)
+                for encoding, suffix in ENCODINGS:
+                    data = variants.get(encoding)
+                    if data is not None and len(data) < len(content): # Keep only variants that save bytes
+                        with open(target + suffix, 'wb') as f:
+                            f.write(data)
+                        encodings.append(encoding)
+                totals['compressible_files'] += 1
+                totals['bytes'] += len(content)
+                totals['gzip_bytes'] += len(variants['gzip'])
+                totals['br_bytes'] += len(variants.get('br', b''))
+            manifest[logical] = {'path': built, 'encodings': encodings}
+
+    manifest_path = os.path.join(output_folder, 'manifest.json')
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return totals
+
+
+# --- Serving ---
+
+class AssetManifest:
+    """
+    Serves fingerprinted static files when `flask build-assets` has been run:
+    url_for('static', filename=...) is rewritten to the hashed file, which is sent
+    with a far-future immutable Cache-Control and, when the browser accepts it,
+    as its precompressed brotli or gzip variant. Without a manifest, static files
+    are served by Flask as usual.
+    """
+
+    def __init__(self):
+        self.entries = {} # logical filename -> {'path': ..., 'encodings': [...]}
+        self.built = {} # fingerprinted filename -> entry
+        self.max_age = 31536000
+        self._static_folder = None
+        self._send_static = None
+
+    def init_app(self, app):
+        """Loads the manifest and hooks url_for and the static view."""
+        self.max_age = app.config.get('ASSET_MAX_AGE_SECONDS', self.max_age)
+        self._static_folder = app.static_folder
+        manifest_path = os.path.join(app.static_folder, app.config.get('ASSET_BUILD_DIR', 'build'), 'manifest.json')
+        try:
+            with open(manifest_path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.built = {entry['path']: entry for entry in self.entries.values()}
+        if not self.entries:
+            return
+        app.url_defaults(self._rewrite_static_url)
+        self._send_static = app.view_functions['static']
+        app.view_functions['static'] = self.serve
+
+    def resolve(self, filename):
+        """Returns the fingerprinted path of a static file, or None if it was not built."""
+        entry = self.entries.get(filename)
+        return entry['path'] if entry else None
+
+    def _rewrite_static_url(self, endpoint, values):
+        if endpoint == 'static':
+            built = self.resolve(values.get('filename'))
+            if built:
+                values['filename'] = built
+                values.pop('v', None) # The hash already versions the URL
+
+    def serve(self, filename):
+        """Static view: sends fingerprinted files with immutable caching and precompression."""
+        entry = self.built.get(filename)
+        if entry is None:
+            return self._send_static(filename=filename)
+
+        variant, content_encoding = filename, None
+        for encoding, suffix in ENCODINGS:
+            if encoding in entry['encodings'] and request.accept_encodings[encoding]:
+                variant, content_encoding = filename + suffix, encoding
+                break
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(self._static_folder, variant, mimetype=mimetype, max_age=self.max_age)
+        response.headers['Cache-Control'] = f'public, max-age={self.max_age}, immutable'
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+# Shared manifest instance, configured in app.py
+asset_manifest = AssetManifest()
@@ -0,0 +1,103 @@
+# --- Standard Library Imports ---
+from datetime import datetime, timedelta
+import json
+import secrets
+import threading
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import delete, or_
+
+# --- Project File Imports ---
+from models import db, ActiveQuizAttempt
+
+
+class QuizAttempt:
+    """
+    A quiz in progress: who started it, for which pack, and the answer key to grade it with.
+    """
+    __slots__ = ('user_id', 'pack_id', 'answer_key', 'created_at')
+
+    def __init__(self, user_id, pack_id, answer_key, created_at):
+        self.user_id = user_id
+        self.pack_id = pack_id
+        self.answer_key = answer_key # {str(question_id): correct_answer_index}
+        self.created_at = created_at # Naive UTC
+
+
+class AttemptStore:
+    """
+    Server-side store of quiz attempts, kept in the active_quiz_attempt table.
+    Only a short opaque token goes into the session cookie, so the cookie size does
+    not depend on the pack size, and attempts survive restarts and deploys and are
+    shared by every application process. Attempts older than the TTL are rejected
+    and deleted whenever a new quiz is started. Every call runs in its own short
+    transaction, apart from the request's session.
+    """
+
+    def __init__(self, ttl_seconds=3600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Counters of this process
+        self.created = 0
+        self.submitted = 0
+        self.expired = 0
+
+    def init_app(self, app):
+        """Reads the TTL from the application config."""
+        self.ttl_seconds = app.config.get('QUIZ_ATTEMPT_TTL_SECONDS', self.ttl_seconds)
+
+    def create(self, user_id, pack_id, answer_key, replaces=None):
+        """
+        Stores a new attempt and returns its token. The attempt with the token `replaces`
+        (e.g. a restarted quiz) and all expired attempts are deleted in the same transaction.
+        """
+        now = datetime.utcnow()
+        table = ActiveQuizAttempt.__table__
+        condition = table.c.created_at < now - timedelta(seconds=self.ttl_seconds)
+        if replaces:
+            condition = or_(condition, table.c.token == replaces)
+        token = secrets.token_urlsafe(16)
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(condition))
+            connection.execute(table.insert().values(token=token, user_id=user_id, quiz_pack_id=pack_id,
+                                                     answer_key_json=json.dumps(answer_key), created_at=now))
+        with self._lock:
+            self.created += 1
+        return token
+
+    def pop(self, token):
+        """
+        Removes and returns the attempt for a token, or None if it is unknown or expired.
+        The row is deleted and committed at once, so only one request, in any process,
+        can claim an attempt.
+        """
+        if not token:
+            return None
+        table = ActiveQuizAttempt.__table__
+        with db.engine.begin() as connection:
+            row = connection.execute(delete(table).where(table.c.token == token).returning(
+                table.c.user_id, table.c.quiz_pack_id, table.c.answer_key_json, table.c.created_at)).first()
+        if row is None:
+            return None
+        user_id, pack_id, answer_key_json, created_at = row
+        if datetime.utcnow() - created_at > timedelta(seconds=self.ttl_seconds):
+            with self._lock:
+                self.expired += 1
+            return None
+        with self._lock:
+            self.submitted += 1
+        return QuizAttempt(user_id, pack_id, json.loads(answer_key_json), created_at)
+
+    def stats(self):
+        """Returns store counters of this process for monitoring."""
+        with self._lock:
+            return {
+                'ttl_seconds': self.ttl_seconds,
+                'created': self.created,
+                'submitted': self.submitted,
+                'expired': self.expired
+            }
+
+
+# Shared store instance, configured in app.py
+attempt_store = AttemptStore()
@@ -0,0 +1,136 @@
+"""
+Throughput of the offline batch upload compared with one submit_quiz request per attempt.
+
+Downloads offline tickets for many students (untimed), then uploads their
+attempts through /submit_quiz/batch in batches of several sizes and reports
+attempts per second, request latency and SQL statements per batch. The same
+number of attempts is also recorded one by one through quiz() + submit_quiz()
+as the baseline.
+
+Usage (from the project folder):
+    python benchmarks/bench_batch_submit.py --attempts 1000 --batch-sizes 1,50,200,500
+"""
+# --- Standard Library Imports ---
+import argparse
+import json
+import random
+import time
+
+# Importing bench_endpoints points the application at a throwaway database
+from bench_endpoints import app, db, seed_database, QueryCounter, start_quiz
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import event
+
+
+def download_tickets(users, packs, count, rng):
+    """Fetches `count` offline quizzes, spread over the students, and returns their attempts."""
+    attempts = []
+    clients = {}
+    for n in range(count):
+        user_id = n % users + 1
+        client = clients.get(user_id)
+        if client is None:
+            client = clients[user_id] = app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+        offline_quiz = client.get(f'/quiz/{rng.randrange(1, packs + 1)}/offline').get_json()
+        attempts.append({
+            'ticket': offline_quiz['ticket'],
+            'answers': [{'questionId': question['id'], 'selectedAnswerIndex': rng.randrange(4)}
+                        for question in offline_quiz['questions']],
+            'totalTimeTaken': rng.randrange(20000, 120000),
+            'completedAt': int(time.time() * 1000)
+        })
+    return attempts
+
+
+def upload(client, counter, attempts, batch_size):
+    """Uploads the attempts in batches; returns the measurements."""
+    latencies, query_counts = [], []
+    recorded = 0
+    start = time.perf_counter()
+    for offset in range(0, len(attempts), batch_size):
+        counter.count = 0
+        request_start = time.perf_counter()
+        response = client.post('/submit_quiz/batch', json={'attempts': attempts[offset:offset + batch_size]})
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        query_counts.append(counter.count)
+        assert response.status_code == 200, response.data
+        recorded += response.get_json()['recorded']
+    elapsed = time.perf_counter() - start
+    return {
+        'attempts': len(attempts),
+        'recorded': recorded,
+        'attempts_per_second': len(attempts) / elapsed,
+        'mean_request_ms': sum(latencies) / len(latencies),
+        'max_request_ms': max(latencies),
+        'queries_per_request': sum(query_counts) / len(query_counts)
+    }
+
+
+def submit_one_by_one(client, counter, packs, count, rng):
+    """Baseline: records `count` attempts through quiz() + submit_quiz(), timing only the submissions."""
+    elapsed, query_counts = 0.0, []
+    for _ in range(count):
+        pack_id = rng.randrange(1, packs + 1)
+        answers = [{'questionId': question_id, 'selectedAnswerIndex': rng.randrange(4)}
+                   for question_id in start_quiz(client, pack_id)]
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.post('/submit_quiz', json={'pack_id': pack_id, 'answers': answers, 'totalTimeTaken': 30000})
+        elapsed += time.perf_counter() - start
+        query_counts.append(counter.count)
+        assert response.status_code == 200, response.data
+    return {
+        'attempts': count,
+        'attempts_per_second': count / elapsed,
+        'mean_request_ms': elapsed * 1000 / count,
+        'queries_per_request': sum(query_counts) / len(query_counts)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=30, help='students in the class')
+    parser.add_argument('--packs', type=int, default=10)
+    parser.add_argument('--questions', type=int, default=20, help='questions per pack')
+    parser.add_argument('--attempts', type=int, default=1000, help='attempts uploaded per batch size')
+    parser.add_argument('--batch-sizes', default='1,50,200,500', help='comma-separated attempts per upload')
+    parser.add_argument('--output', help='optional path of a JSON report')
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with app.app_context():
+        seed_database(args.users, args.packs, args.questions, 1)
+        engine = db.engine
+    counter = QueryCounter()
+    uploader = app.test_client()
+    with uploader.session_transaction() as session:
+        session['_user_id'] = '1' # The classroom device is logged in as one account
+
+    report = {'users': args.users, 'packs': args.packs, 'questions_per_pack': args.questions, 'results': {}}
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        baseline_count = min(args.attempts, 200) # The per-attempt path also renders the quiz page each time
+        result = submit_one_by_one(uploader, counter, args.packs, baseline_count, rng)
+        report['results']['submit_quiz'] = result
+        print(f"{'submit_quiz':<16} attempts/s {result['attempts_per_second']:8.1f}   "
+              f"per request {result['mean_request_ms']:8.2f} ms   {result['queries_per_request']:6.1f} queries")
+
+        for batch_size in (int(value) for value in args.batch_sizes.split(',')):
+            attempts = download_tickets(args.users, args.packs, args.attempts, rng)
+            result = upload(uploader, counter, attempts, batch_size)
+            report['results'][f'batch_{batch_size}'] = result
+            print(f"{'batch of ' + str(batch_size):<16} attempts/s {result['attempts_per_second']:8.1f}   "
+                  f"per request {result['mean_request_ms']:8.2f} ms   {result['queries_per_request']:6.1f} queries")
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Endpoint micro-benchmarks with data-size scaling.
+
+Seeds a throwaway SQLite database at several sizes, drives the main views
+through the Flask test client and writes latency percentiles and SQL query
+counts per endpoint as JSON, so that two runs can be compared.
+
+Usage (from the project folder):
+    python benchmarks/bench_endpoints.py
+    python benchmarks/bench_endpoints.py --sizes small,medium --requests 200 --output before.json
+"""
+# --- Standard Library Imports ---
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# The database must be chosen before the application is imported
+_db_dir = tempfile.mkdtemp(prefix='quiz_bench_')
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from app import app
+from models import db
+from seed_data import seed_database # The same data the test suite uses
+
+# name: (users, packs, questions per pack, attempts per user)
+DATA_SIZES = {
+    'small': (10, 5, 20, 10),
+    'medium': (100, 20, 100, 50),
+    'large': (300, 40, 300, 100),
+}
+
+QUIZ_DATA_PATTERN = re.compile(rb'<script id="quiz-data" type="application/json">(.*?)</script>', re.S)
+
+
+# --- Measurement ---
+
+class QueryCounter:
+    """Counts SQL statements sent to the database engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms, query_counts):
+    latencies_ms = sorted(latencies_ms)
+    return {
+        'requests': len(latencies_ms),
+        'mean_ms': sum(latencies_ms) / len(latencies_ms),
+        'min_ms': latencies_ms[0],
+        'p50_ms': percentile(latencies_ms, 0.50),
+        'p90_ms': percentile(latencies_ms, 0.90),
+        'p99_ms': percentile(latencies_ms, 0.99),
+        'max_ms': latencies_ms[-1],
+        'queries_per_request': sum(query_counts) / len(query_counts),
+        'max_queries': max(query_counts)
+    }
+
+
+def timed(counter, func):
+    """Runs func once and returns (milliseconds, number of SQL queries, result)."""
+    counter.count = 0
+    start = time.perf_counter()
+    result = func()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return elapsed_ms, counter.count, result
+
+
+def start_quiz(client, pack_id):
+    """Opens the quiz page and returns the question ids embedded in it."""
+    response = client.get(f'/quiz/{pack_id}')
+    quiz_data = json.loads(QUIZ_DATA_PATTERN.search(response.data).group(1))
+    return [question['id'] for question in quiz_data['questions']]
+
+
+def bench_endpoints(engine, requests_per_endpoint, packs):
+    """
+    Benchmarks every endpoint as user 1 and returns {endpoint: summary}.
+    Must run outside an application context, so that every request gets
+    its own database session like in production.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1' # Log in through Flask-Login's session key
+
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    rng = random.Random(7)
+    results = {}
+    try:
+        simple_gets = {
+            'packs.packs': lambda: '/packs',
+            'auth.profile': lambda: '/profile',
+            'admin.dashboard': lambda: '/admin/',
+            'quiz.quiz': lambda: f'/quiz/{rng.randrange(1, packs + 1)}',
+        }
+        for endpoint, make_url in simple_gets.items():
+            client.get(make_url()) # Warm-up
+            samples = [timed(counter, lambda: client.get(make_url())) for _ in range(requests_per_endpoint)]
+            assert all(response.status_code == 200 for _, _, response in samples), endpoint
+            results[endpoint] = summarize([s[0] for s in samples], [s[1] for s in samples])
+
+        # submit_quiz needs a started attempt, so quiz() runs untimed before each submission
+        latencies, query_counts, result_urls = [], [], []
+        for _ in range(requests_per_endpoint):
+            pack_id = rng.randrange(1, packs + 1)
+            answers = [{'questionId': question_id, 'selectedAnswerIndex': rng.randrange(4)}
+                       for question_id in start_quiz(client, pack_id)]
+            payload = {'pack_id': pack_id, 'answers': answers, 'totalTimeTaken': 30000}
+            elapsed_ms, queries, response = timed(counter, lambda: client.post('/submit_quiz', json=payload))
+            assert response.status_code == 200, response.data
+            latencies.append(elapsed_ms)
+            query_counts.append(queries)
+            result_urls.append(response.get_json()['redirect_url'])
+        results['quiz.submit_quiz'] = summarize(latencies, query_counts)
+
+        samples = [timed(counter, lambda url=url: client.get(url)) for url in result_urls]
+        assert all(response.status_code == 200 for _, _, response in samples), 'quiz.quiz_results'
+        results['quiz.quiz_results'] = summarize([s[0] for s in samples], [s[1] for s in samples])
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='small,medium,large',
+                        help=f"comma-separated data sizes, from: {', '.join(DATA_SIZES)}")
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per endpoint and size')
+    parser.add_argument('--output', default='benchmark_results.json', help='path of the JSON report')
+    args = parser.parse_args()
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'requests_per_endpoint': args.requests,
+        'sizes': {}
+    }
+    for size in args.sizes.split(','):
+        users, packs, questions_per_pack, attempts_per_user = DATA_SIZES[size]
+        print(f"Seeding '{size}': {users} users, {packs} packs x {questions_per_pack} questions, "
+              f"{attempts_per_user} attempts per user...")
+        with app.app_context():
+            seed_database(users, packs, questions_per_pack, attempts_per_user)
+            engine = db.engine
+        endpoints = bench_endpoints(engine, args.requests, packs)
+        report['sizes'][size] = {
+            'users': users, 'packs': packs, 'questions_per_pack': questions_per_pack,
+            'attempts_per_user': attempts_per_user, 'endpoints': endpoints
+        }
+        for endpoint, summary in endpoints.items():
+            print(f"  {endpoint:<20} p50 {summary['p50_ms']:8.2f} ms   p99 {summary['p99_ms']:8.2f} ms   "
+                  f"{summary['queries_per_request']:5.1f} queries")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Login throughput under concurrent load, with password hashing inline or on the process pool.
+
+Client threads log in as different users at the same time while a probe
+thread keeps requesting a cheap page. For every PASSWORD_HASH_WORKERS value
+the script reports logins per second, login latency and the probe latency,
+which shows how much the CPU-bound password checks hold up other requests.
+
+Usage (from the project folder):
+    python benchmarks/bench_login.py --threads 8 --logins 200 --workers 0,2,4
+"""
+# --- Standard Library Imports ---
+import argparse
+import json
+import os
+import threading
+import time
+
+# Importing bench_endpoints points the application at a throwaway database
+from bench_endpoints import app, db, seed_database, percentile
+
+# --- Project File Imports ---
+from passwords import password_hasher
+from seed_data import PASSWORD, seed_email
+
+
+def run_logins(users, threads, logins):
+    """Performs `logins` concurrent logins and returns the measurements."""
+    remaining = [logins]
+    lock = threading.Lock()
+    login_latencies, probe_latencies = [], []
+    failures = [0]
+    done = threading.Event()
+
+    def client_worker(worker_id):
+        client = app.test_client()
+        n = 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            user_id = (worker_id + n * threads) % users + 1
+            n += 1
+            start = time.perf_counter()
+            response = client.post('/login', data={'email': seed_email(user_id), 'password': PASSWORD})
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            client.get('/logout')
+            with lock:
+                login_latencies.append(elapsed_ms)
+                if response.status_code != 302 or '/login' in response.headers.get('Location', ''):
+                    failures[0] += 1
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/')
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    probe_thread = threading.Thread(target=probe)
+    workers = [threading.Thread(target=client_worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    probe_thread.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+
+    login_latencies.sort()
+    probe_latencies.sort()
+    return {
+        'logins': len(login_latencies),
+        'failures': failures[0],
+        'logins_per_second': len(login_latencies) / elapsed,
+        'login_p50_ms': percentile(login_latencies, 0.50),
+        'login_p99_ms': percentile(login_latencies, 0.99),
+        'probe_requests': len(probe_latencies),
+        'probe_p50_ms': percentile(probe_latencies, 0.50),
+        'probe_p99_ms': percentile(probe_latencies, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=8, help='concurrent login clients')
+    parser.add_argument('--logins', type=int, default=200, help='logins per configuration')
+    parser.add_argument('--workers', default=f'0,{os.cpu_count() or 2}',
+                        help='comma-separated PASSWORD_HASH_WORKERS values (0 = inline)')
+    parser.add_argument('--output', help='optional path of a JSON report')
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed_database(args.users, 1, 1, 1)
+
+    configured_workers = password_hasher.workers
+    report = {'method': password_hasher.method, 'threads': args.threads, 'results': {}}
+    for workers in (int(value) for value in args.workers.split(',')):
+        password_hasher.shutdown()
+        password_hasher.workers = workers
+        password_hasher.hash('warm-up') # Start the pool processes before measuring
+        result = run_logins(args.users, args.threads, args.logins)
+        report['results'][workers] = result
+        print(f"workers {workers:<3} logins/s {result['logins_per_second']:7.1f}   "
+              f"login p50 {result['login_p50_ms']:8.1f} ms   p99 {result['login_p99_ms']:8.1f} ms   "
+              f"probe p50 {result['probe_p50_ms']:7.2f} ms   p99 {result['probe_p99_ms']:7.2f} ms   "
+              f"failures {result['failures']}")
+    password_hasher.shutdown()
+    password_hasher.workers = configured_workers
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Concurrent writers and readers against SQLite under each DB_ENGINE_PROFILE.
+
+Writer threads insert quiz results the way submit_quiz does (one transaction
+and commit per attempt) while reader threads keep querying the same table.
+For every profile the script reports committed writes, "database is locked"
+failures and reader latency, which shows whether writers and readers block
+each other.
+
+Usage (from the project folder):
+    python benchmarks/bench_sqlite_concurrency.py --writers 8 --readers 8 --seconds 5
+"""
+# --- Standard Library Imports ---
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+# --- Project File Imports ---
+from config import Config
+from db_engine import apply_sqlite_pragmas
+from models import db, UserQuizStat
+
+
+def run_profile(profile_name, writers, readers, seconds, hold_ms):
+    """Runs the mixed workload against a fresh database and returns its measurements."""
+    profile = Config.DB_ENGINE_PROFILES[profile_name]
+    db_dir = tempfile.mkdtemp(prefix='quiz_concurrency_')
+    engine = create_engine('sqlite:///' + os.path.join(db_dir, 'bench.db'), **profile.get('engine_options', {}))
+    apply_sqlite_pragmas(engine, profile.get('pragmas', {}))
+    db.metadata.create_all(engine)
+
+    stats_table = UserQuizStat.__table__
+    stop_at = time.perf_counter() + seconds
+    lock = threading.Lock()
+    result = {'writes': 0, 'write_errors': 0, 'reads': 0, 'read_errors': 0, 'read_latencies_ms': []}
+
+    def writer(worker_id):
+        while time.perf_counter() < stop_at:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(stats_table.insert().values(
+                        user_id=worker_id, quiz_pack_id=1, score=5, total_questions=10,
+                        completed_at=datetime.utcnow(), user_answers_data='[]', avg_time_per_question=2.0
+                    ))
+                    time.sleep(hold_ms / 1000) # Work done while the write transaction is open
+                with lock:
+                    result['writes'] += 1
+            except OperationalError:
+                with lock:
+                    result['write_errors'] += 1
+
+    def reader():
+        query = select(func.count(stats_table.c.id), func.avg(stats_table.c.score))
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(query).fetchall()
+                with lock:
+                    result['reads'] += 1
+                    result['read_latencies_ms'].append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                with lock:
+                    result['read_errors'] += 1
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    latencies = sorted(result.pop('read_latencies_ms')) or [0.0]
+    result.update({
+        'writes_per_second': result['writes'] / seconds,
+        'reads_per_second': result['reads'] / seconds,
+        'read_p50_ms': latencies[len(latencies) // 2],
+        'read_p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'read_max_ms': latencies[-1]
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default=','.join(Config.DB_ENGINE_PROFILES), help='comma-separated profiles')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--hold-ms', type=float, default=2.0, help='time each write transaction stays open')
+    parser.add_argument('--output', help='optional path of a JSON report')
+    args = parser.parse_args()
+
+    report = {}
+    for profile_name in args.profiles.split(','):
+        report[profile_name] = run_profile(profile_name, args.writers, args.readers, args.seconds, args.hold_ms)
+        r = report[profile_name]
+        print(f"{profile_name:<12} writes/s {r['writes_per_second']:8.1f}   write errors {r['write_errors']:5d}   "
+              f"reads/s {r['reads_per_second']:8.1f}   read p50 {r['read_p50_ms']:7.2f} ms   "
+              f"p99 {r['read_p99_ms']:7.2f} ms   max {r['read_max_ms']:8.2f} ms   read errors {r['read_errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
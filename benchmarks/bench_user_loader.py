@@ -0,0 +1,72 @@
+"""
+Per-request cost of Flask-Login's user loader, with and without the identity cache.
+
+Requests a cheap authenticated page many times, once with the user cache
+disabled (TTL of zero, so every request queries the user table) and once
+with it enabled, and reports latency percentiles and SQL queries per request.
+
+Usage (from the project folder):
+    python benchmarks/bench_user_loader.py --requests 2000
+"""
+# --- Standard Library Imports ---
+import argparse
+import json
+
+# Importing bench_endpoints points the application at a throwaway database
+from bench_endpoints import app, db, seed_database, summarize, timed, QueryCounter
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from user_cache import user_cache
+
+
+def bench_page(engine, url, requests):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1' # Log in through Flask-Login's session key
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        client.get(url) # Warm-up
+        samples = [timed(counter, lambda: client.get(url)) for _ in range(requests)]
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+    assert all(response.status_code == 200 for _, _, response in samples)
+    return summarize([s[0] for s in samples], [s[1] for s in samples])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--url', default='/admin/cache_stats', help='authenticated page to request')
+    parser.add_argument('--output', help='optional path of a JSON report')
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed_database(100, 5, 10, 5)
+        engine = db.engine
+
+    configured_ttl = user_cache.ttl_seconds
+    report = {}
+    for label, ttl in (('uncached', 0), ('cached', configured_ttl)):
+        user_cache.clear()
+        user_cache.ttl_seconds = ttl
+        report[label] = bench_page(engine, args.url, args.requests)
+    user_cache.ttl_seconds = configured_ttl
+
+    for label, summary in report.items():
+        print(f"{label:<10} mean {summary['mean_ms']:7.3f} ms   p50 {summary['p50_ms']:7.3f} ms   "
+              f"p99 {summary['p99_ms']:7.3f} ms   {summary['queries_per_request']:4.1f} queries")
+    saving = report['uncached']['mean_ms'] - report['cached']['mean_ms']
+    print(f"Saving per request: {saving:.3f} ms, "
+          f"{report['uncached']['queries_per_request'] - report['cached']['queries_per_request']:.1f} queries")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# --- Standard Library Imports ---
+import csv
+import io
+import json
+
+
+def guess_format(filename):
+    """Returns 'jsonl' for .jsonl/.ndjson file names and 'csv' otherwise."""
+    return 'jsonl' if (filename or '').lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, file_format):
+    """
+    Yields (line number, row dict) from a CSV file with a header line or from
+    a JSON Lines file, one row at a time. Rows that cannot be parsed are yielded
+    with an 'error' key instead.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, {'error': f"invalid JSON: {e}"}
+                continue
+            yield line_number, row if isinstance(row, dict) else {'error': "expected a JSON object"}
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def write_rows(rows, fieldnames, file_format):
+    """
+    Serializes row dicts one line at a time, for streaming responses and files.
+    CSV output starts with a header line.
+    """
+    if file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+    if file_format != 'csv':
+        raise ValueError(f"Unsupported format: {file_format}")
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
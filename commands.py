@@ -0,0 +1,144 @@
+# --- Standard Library Imports ---
+import os
+
+# --- Third-Party Library Imports ---
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# --- Project File Imports ---
+from models import db
+from stats import rebuild_pack_summaries, rebuild_question_counters
+from query_plans import check_route_query_plans
+from query_budget import check_route_query_budgets
+from passwords import password_hasher
+from bulk_io import guess_format, read_rows
+from user_import import import_users
+from assets import build_assets, brotli
+from answers_codec import reencode_answers
+from leaderboard import leaderboards
+
+
+@click.command('rebuild-summaries')
+@with_appcontext
+def rebuild_summaries_command():
+    """Rebuilds the per-user/per-pack summary table from quiz history."""
+    rows = rebuild_pack_summaries()
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} pack summaries.")
+
+
+@click.command('rebuild-leaderboards')
+@with_appcontext
+def rebuild_leaderboards_command():
+    """Recomputes the leaderboard data (best scores and fastest times) from quiz history."""
+    rows = rebuild_pack_summaries() # Leaderboards are built from the pack summaries
+    db.session.commit()
+    leaderboards.clear()
+    _, _, ranked_users = leaderboards.view(None)
+    click.echo(f"Rebuilt leaderboard data for {rows} user/pack pairs, {ranked_users} players ranked overall. "
+               f"Running application processes reload their boards within LEADERBOARD_TTL_SECONDS.")
+
+
+@click.command('rebuild-question-stats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Attempts read per chunk.')
+@with_appcontext
+def rebuild_question_stats_command(chunk_size):
+    """Recomputes the per-question answer counters from quiz history in one streaming pass."""
+    questions = rebuild_question_counters(chunk_size=chunk_size)
+    db.session.commit()
+    click.echo(f"Rebuilt answer counters for {questions} questions.")
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """Fails if a query issued by the main views regresses to a table scan."""
+    try:
+        regressions = check_route_query_plans(current_app._get_current_object())
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        raise SystemExit(1)
+    for endpoint, statement, plan in regressions:
+        click.echo(f"[{endpoint}] table scan in:\n  {' '.join(statement.split())}", err=True)
+        for detail in plan:
+            click.echo(f"    {detail}", err=True)
+    if regressions:
+        raise SystemExit(1)
+    click.echo("No table scans found in the checked views.")
+
+
+@click.command('check-query-budgets')
+@with_appcontext
+def check_query_budgets_command():
+    """Fails if a main view exceeds its SQL statement budget or repeats a statement (N+1), or a view has no budget."""
+    try:
+        reports, unbudgeted = check_route_query_budgets(current_app._get_current_object())
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        raise SystemExit(1)
+    for endpoint in unbudgeted:
+        click.echo(f"[{endpoint}] has no @query_budget", err=True)
+    if reports:
+        click.echo(f"{len(reports)} view(s) over budget or repeating statements, see the warnings above.", err=True)
+    if reports or unbudgeted:
+        raise SystemExit(1)
+    click.echo("All checked views are within their query budgets.")
+
+
+@click.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+              help='File format; guessed from the extension by default.')
+@click.option('--batch-size', default=500, show_default=True, help='Users per transaction.')
+@click.option('--workers', type=int, default=lambda: os.cpu_count() or 2,
+              help='Password hashing processes (0 hashes inline). Defaults to the CPU count.')
+@with_appcontext
+def import_users_command(path, file_format, batch_size, workers):
+    """Creates users from a CSV (name,email,password header) or JSON Lines file."""
+    file_format = file_format or guess_format(path)
+
+    configured_workers = password_hasher.workers
+    password_hasher.workers = workers
+    try:
+        with open(path, newline='', encoding='utf-8') as stream:
+            report = import_users(read_rows(stream, file_format), batch_size=batch_size)
+    finally:
+        password_hasher.shutdown()
+        password_hasher.workers = configured_workers
+
+    for line_number, reason in sorted(report.skipped):
+        click.echo(f"Line {line_number}: skipped, {reason}", err=True)
+    click.echo(f"Imported {report.imported} users in {report.batches} batches, skipped {len(report.skipped)} "
+               f"({report.seconds:.2f} s, {report.users_per_second:.0f} users/s).")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Fingerprints and precompresses the static files and writes the asset manifest."""
+    app = current_app._get_current_object()
+    build_dir = app.config.get('ASSET_BUILD_DIR', 'build')
+    totals = build_assets(app.static_folder, build_dir)
+    click.echo(f"Built {totals['files']} assets into static/{build_dir}/ (restart the application to use them).")
+    if totals['bytes']:
+        click.echo(f"Text assets: {totals['bytes']} bytes, gzip {totals['gzip_bytes']} bytes "
+                   f"({100 - 100 * totals['gzip_bytes'] // totals['bytes']}% smaller)")
+        if brotli is not None:
+            click.echo(f"             brotli {totals['br_bytes']} bytes "
+                       f"({100 - 100 * totals['br_bytes'] // totals['bytes']}% smaller)")
+        else:
+            click.echo("Install the 'brotli' package to also build brotli variants.")
+
+
+@click.command('reencode-answers')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows read and updated per chunk.')
+@with_appcontext
+def reencode_answers_command(chunk_size):
+    """Rewrites legacy JSON answer data of quiz attempts in the compact format."""
+    rows, bytes_before, bytes_after = reencode_answers(db.session.connection(), chunk_size=chunk_size)
+    db.session.commit()
+    click.echo(f"Re-encoded {rows} attempts: {bytes_before} -> {bytes_after} bytes.")
+    if rows:
+        click.echo(f"Saved {(bytes_before - bytes_after) / rows:.0f} bytes per attempt on average "
+                   f"({bytes_before / rows:.0f} -> {bytes_after / rows:.0f}).")
@@ -6,5 +6,90 @@ class Config:
 
     # Path to the database
     database_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'quiz_app.db')
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{database_path}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{database_path}'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database engine profile, applied by db_engine.py: 'default' keeps SQLAlchemy's defaults,
+    # 'production' enables WAL so that readers do not wait for writers, and waits for locks
+    # instead of failing with "database is locked" when several submissions arrive together.
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', 'default')
+    DB_ENGINE_PROFILES = {
+        'default': {},
+        'production': {
+            # Passed to create_engine(); merged into SQLALCHEMY_ENGINE_OPTIONS
+            'engine_options': {
+                'pool_size': 10, # Connections kept open, roughly one per worker thread
+                'max_overflow': 10,
+                'pool_timeout': 30,
+                'connect_args': {'timeout': 15, 'check_same_thread': False}
+            },
+            # Executed on every new SQLite connection
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL', # Safe with WAL, fsync only at checkpoints
+                'busy_timeout': 15000, # Milliseconds to wait for a lock
+                'mmap_size': 268435456, # 256 MB of memory-mapped reads
+                'cache_size': -65536, # 64 MB page cache (negative values are KiB)
+                'temp_store': 'MEMORY'
+            }
+        }
+    }
+
+    # Questions shown per page in the admin question list
+    ADMIN_QUESTIONS_PER_PAGE = 50
+
+    # Output folder of `flask build-assets` inside static/, and the browser cache lifetime
+    # of the fingerprinted files it produces
+    ASSET_BUILD_DIR = 'build'
+    ASSET_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+
+    # Request metrics (see metrics.py), served at /admin/metrics. A scraper without a login
+    # session can authenticate with the header 'Authorization: Bearer <METRICS_TOKEN>'
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Per-view SQL statement budgets (see query_budget.py): 'raise' fails a request that breaks its
+    # view's budget or repeats a statement QUERY_REPEAT_LIMIT times (N+1), 'warn' prints it, 'off'
+    # skips the check. Unset means 'raise' under TESTING and 'off' otherwise.
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE')
+    QUERY_REPEAT_LIMIT = 3
+
+    # Offline play (see offline_sync.py): how long a downloaded quiz may be played before its
+    # results are uploaded, and the maximum number of attempts in one upload
+    OFFLINE_TICKET_MAX_AGE_SECONDS = 14 * 24 * 60 * 60
+    OFFLINE_SYNC_MAX_ATTEMPTS = 500
+
+    # Leaderboards (see leaderboard.py): entries shown per board, and how often a board
+    # is reloaded from the database to pick up submissions handled by other processes
+    LEADERBOARD_SIZE = 20
+    LEADERBOARD_TTL_SECONDS = 60
+
+    # Maximum number of rendered page fragments (pack card grids) kept by page_cache
+    FRAGMENT_CACHE_SIZE = 32
+
+    # Maximum number of compiled quiz packs kept in memory by pack_cache
+    PACK_CACHE_SIZE = 128
+
+    # Password hashing (see passwords.py). The method must include the cost, e.g.
+    # 'pbkdf2:sha256:600000', and produce hashes that fit User.password_hash (128 characters);
+    # hashes made with another method are upgraded on the next successful login.
+    # PASSWORD_HASH_WORKERS = 0 hashes inline.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+
+    # Identity cache behind Flask-Login's user loader (see user_cache.py)
+    USER_CACHE_TTL_SECONDS = 300
+    USER_CACHE_SIZE = 10000
+
+    # Quiz attempts not submitted within this time are rejected and deleted (see attempt_store.py).
+    # Attempts are kept in the database, so they survive restarts and work with several processes.
+    QUIZ_ATTEMPT_TTL_SECONDS = 3 * 60 * 60
+
+    # Write-behind mode for quiz submissions (see submission_queue.py): graded attempts are
+    # committed in batches by a background thread. Meant for a single application process.
+    SUBMISSION_WRITE_BEHIND = os.environ.get('SUBMISSION_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+    SUBMISSION_QUEUE_SIZE = 5000 # When full, submissions are written synchronously
+    SUBMISSION_BATCH_SIZE = 100
+    SUBMISSION_FLUSH_INTERVAL_MS = 200 # Upper bound on how long an attempt waits in the queue
+    SUBMISSION_WAIT_TIMEOUT_SECONDS = 10
@@ -0,0 +1,42 @@
+# --- Third-Party Library Imports ---
+from sqlalchemy import event
+
+
+def get_engine_profile(app):
+    """Returns the database engine profile selected by DB_ENGINE_PROFILE."""
+    name = app.config.get('DB_ENGINE_PROFILE', 'default')
+    profiles = app.config.get('DB_ENGINE_PROFILES', {})
+    if name not in profiles:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE '{name}', expected one of: {', '.join(profiles)}")
+    return profiles[name]
+
+
+def configure_engine_options(app):
+    """
+    Merges the engine options of the selected profile into SQLALCHEMY_ENGINE_OPTIONS.
+    Must be called before db.init_app(app), which creates the engine.
+    """
+    profile_options = get_engine_profile(app).get('engine_options', {})
+    if profile_options:
+        options = dict(profile_options)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})) # Explicit settings win
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Runs the given PRAGMAs on every new DBAPI connection of a SQLite engine."""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def init_sqlite_pragmas(app, db):
+    """Registers the PRAGMAs of the selected profile on the application's engine."""
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, get_engine_profile(app).get('pragmas', {}))
@@ -0,0 +1,53 @@
+# Grading of submitted quiz answers, shared by submit_quiz and the offline batch upload
+
+
+def grade_answers(answer_key, user_answers_raw):
+    """
+    Grades the answers sent by the quiz page ([{'questionId': ..., 'selectedAnswerIndex': ...}, ...])
+    against an answer key {str(question_id): correct_answer_index}.
+    Returns (score, results), results being the per-answer list stored with the attempt
+    (see answers_codec.encode_answers). Answers to questions outside the key count as wrong.
+    Only the first answer to each question is graded, so the score never exceeds the key's size.
+    """
+    score = 0
+    results = [] # List to save detailed results
+    answered = set() # Question ids graded so far
+
+    for answer_entry in user_answers_raw:
+        question_id = str(answer_entry.get('questionId'))
+        if question_id in answered:
+            print(f"Warning: Question with ID {question_id} was answered more than once. Only the first answer counts.")
+            continue
+        answered.add(question_id)
+        selected_answer_index = answer_entry.get('selectedAnswerIndex')
+
+        correct_answer_index = answer_key.get(question_id)
+        if correct_answer_index is not None:
+            is_correct = (selected_answer_index == correct_answer_index)
+            if is_correct:
+                score += 1
+
+            results.append({
+                'question_id': int(question_id),
+                'user_answer_index': selected_answer_index,
+                'is_correct': is_correct,
+                'correct_answer_index': correct_answer_index # Added for log completeness
+            })
+        else:
+            # Log suspicious activity or question mismatch
+            print(f"Warning: Question with ID {question_id} not found in the quiz attempt. Possible manipulation or error.")
+            results.append({
+                'question_id': int(question_id) if question_id.isdigit() else None,
+                'user_answer_index': selected_answer_index,
+                'is_correct': False, # Consider incorrect if question not from the attempt
+                'correct_answer_index': -1 # Unknown
+            })
+
+    return score, results
+
+
+def average_time_per_question(total_time_taken, question_count):
+    """Converts the total time of an attempt in milliseconds into seconds per question (None if unknown)."""
+    if question_count > 0 and total_time_taken is not None:
+        return (total_time_taken / 1000) / question_count
+    return None
@@ -0,0 +1,176 @@
+# --- Standard Library Imports ---
+from bisect import bisect_left, insort
+import threading
+import time
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import func, tuple_
+
+# --- Project File Imports ---
+from models import db, UserPackSummary
+
+
+class Leaderboard:
+    """
+    Users of one pack (or of all packs) ordered by best score, then by the fastest
+    average time per question. Entries are kept in a sorted list, so an update is a
+    bisect plus a list insert and a user's rank is found by bisection in O(log n).
+    All users are kept so that anyone's rank is known; the top K is a slice.
+    The list insert moves O(n) pointers: about 30 us per update with 100,000 users
+    and 0.3 ms with a million, which is small next to the submission's own commit.
+    """
+
+    def __init__(self):
+        self._keys = [] # Sorted (-score, avg_time, user_id) tuples, best first
+        self._by_user = {} # user_id -> its key in _keys
+        self.loaded_at = time.monotonic()
+
+    @staticmethod
+    def _key(user_id, score, avg_time):
+        # Attempts without a recorded time rank after timed ones with the same score
+        return (-(score or 0), avg_time if avg_time is not None else float('inf'), user_id)
+
+    def update(self, user_id, score, avg_time):
+        """Inserts or moves a user's entry."""
+        self.remove(user_id)
+        key = self._key(user_id, score, avg_time)
+        insort(self._keys, key)
+        self._by_user[user_id] = key
+
+    def remove(self, user_id):
+        key = self._by_user.pop(user_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def top(self, count):
+        """Returns the first `count` entries as (rank, user_id, score, avg_time)."""
+        return [(rank, key[2], -key[0], None if key[1] == float('inf') else key[1])
+                for rank, key in enumerate(self._keys[:count], start=1)]
+
+    def rank(self, user_id):
+        """Returns (rank, score, avg_time) of a user, or None if the user has no entry."""
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key) + 1, -key[0], None if key[1] == float('inf') else key[1]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class LeaderboardStore:
+    """
+    In-process per-pack and global leaderboards built from UserPackSummary.
+    A board is loaded on first use and updated after every committed quiz
+    submission (refresh). Boards are reloaded after LEADERBOARD_TTL_SECONDS,
+    which bounds staleness from submissions handled by other processes.
+    The global board ranks users by the sum of their best pack scores, then by
+    the average of their fastest per-pack times.
+    """
+
+    GLOBAL = None # Board key of the global leaderboard
+
+    def __init__(self, size=20, ttl_seconds=60):
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self._boards = {} # pack_id (or GLOBAL) -> Leaderboard
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.refreshes = 0
+
+    def init_app(self, app):
+        """Reads the board size and the reload interval from the application config."""
+        self.size = app.config.get('LEADERBOARD_SIZE', self.size)
+        self.ttl_seconds = app.config.get('LEADERBOARD_TTL_SECONDS', self.ttl_seconds)
+
+    def view(self, user_id, pack_id=GLOBAL):
+        """Returns (top entries, the user's (rank, score, avg_time) or None, number of ranked users)."""
+        board = self._board(pack_id)
+        with self._lock:
+            return board.top(self.size), board.rank(user_id), len(board)
+
+    def _board(self, pack_id):
+        with self._lock:
+            board = self._boards.get(pack_id)
+            if board is not None and time.monotonic() - board.loaded_at < self.ttl_seconds:
+                return board
+
+        board = Leaderboard()
+        for user_id, score, avg_time in self._query(pack_id):
+            board.update(user_id, score, avg_time)
+        with self._lock:
+            self._boards[pack_id] = board
+            self.loads += 1
+        return board
+
+    def _query(self, pack_id, user_ids=None):
+        """Rows of (user_id, score, avg_time) for one board, optionally limited to some users."""
+        if pack_id is self.GLOBAL:
+            query = db.session.query(
+                UserPackSummary.user_id, func.sum(UserPackSummary.best_score), func.avg(UserPackSummary.best_avg_time)
+            ).group_by(UserPackSummary.user_id)
+            if user_ids is not None:
+                query = query.filter(UserPackSummary.user_id.in_(user_ids))
+            return query.all()
+        query = db.session.query(
+            UserPackSummary.user_id, UserPackSummary.best_score, UserPackSummary.best_avg_time
+        ).filter(UserPackSummary.quiz_pack_id == pack_id)
+        if user_ids is not None:
+            query = query.filter(UserPackSummary.user_id.in_(user_ids))
+        return query.all()
+
+    def refresh(self, pairs):
+        """
+        Updates the loaded boards after quiz submissions were committed.
+        pairs is an iterable of (user_id, pack_id); boards not loaded yet are skipped.
+        """
+        pairs = set(pairs)
+        with self._lock:
+            loaded = set(self._boards)
+        if not pairs or not loaded:
+            return
+
+        updates = {} # board key -> rows
+        pack_pairs = [pair for pair in pairs if pair[1] in loaded]
+        if pack_pairs:
+            rows = db.session.query(
+                UserPackSummary.quiz_pack_id, UserPackSummary.user_id,
+                UserPackSummary.best_score, UserPackSummary.best_avg_time
+            ).filter(tuple_(UserPackSummary.user_id, UserPackSummary.quiz_pack_id).in_(pack_pairs)).all()
+            for pack_id, user_id, score, avg_time in rows:
+                updates.setdefault(pack_id, []).append((user_id, score, avg_time))
+        if self.GLOBAL in loaded:
+            updates[self.GLOBAL] = self._query(self.GLOBAL, user_ids={user_id for user_id, _ in pairs})
+
+        with self._lock:
+            for board_key, rows in updates.items():
+                board = self._boards.get(board_key)
+                if board is None:
+                    continue
+                for user_id, score, avg_time in rows:
+                    board.update(user_id, score, avg_time)
+            self.refreshes += 1
+
+    def invalidate(self, pack_id):
+        """Drops a pack's board and the global board, e.g. after the pack was deleted."""
+        with self._lock:
+            self._boards.pop(pack_id, None)
+            self._boards.pop(self.GLOBAL, None)
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+
+    def stats(self):
+        """Returns load counters for monitoring."""
+        with self._lock:
+            return {
+                'boards': len(self._boards),
+                'entries': sum(len(board) for board in self._boards.values()),
+                'loads': self.loads,
+                'refreshes': self.refreshes
+            }
+
+
+# Shared leaderboard store, configured in app.py
+leaderboards = LeaderboardStore()
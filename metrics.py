@@ -0,0 +1,179 @@
+# --- Standard Library Imports ---
+from bisect import bisect_left
+import threading
+import time
+
+# --- Third-Party Library Imports ---
+from flask import g, request
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from models import db
+
+# Upper bounds of the histogram buckets (Prometheus 'le'), the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Seconds
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram with the sum and count Prometheus expects."""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Per bucket, not cumulative; the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class EndpointMetrics:
+    """Everything recorded for one endpoint."""
+    __slots__ = ('statuses', 'latency', 'queries', 'sql_seconds')
+
+    def __init__(self):
+        self.statuses = {} # (method, status code) -> requests
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = 0.0
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency, SQL statement counts and SQL time, collected by the
+    request hooks in app.py and by cursor listeners on the database engine, and
+    rendered in the Prometheus text format for /admin/metrics.
+    Statements issued outside a request (write-behind writer, CLI, or while a streamed
+    body is sent) are counted separately.
+    Latency is measured until the response is returned by the view, so the body of a
+    streamed download is not included.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._endpoints = {} # endpoint -> EndpointMetrics
+        self._background_queries = 0
+        self._background_sql_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Reads METRICS_ENABLED and attaches the cursor listeners to the application's engine."""
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        if not self.enabled:
+            return
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # --- Request hooks ---
+
+    def start_request(self):
+        if self.enabled:
+            g._metrics = [time.perf_counter(), 0, 0.0] # Start time, statements, SQL seconds
+
+    def finish_request(self, response):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return response
+        elapsed = time.perf_counter() - state[0]
+        # Unmatched URLs share one label, so 404 scans cannot create unbounded series
+        endpoint = request.url_rule.endpoint if request.url_rule is not None else 'unmatched'
+        with self._lock:
+            metrics = self._endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self._endpoints[endpoint] = EndpointMetrics()
+            status_key = (request.method, response.status_code)
+            metrics.statuses[status_key] = metrics.statuses.get(status_key, 0) + 1
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(state[1])
+            metrics.sql_seconds += state[2]
+        return response
+
+    # --- Cursor listeners ---
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_query_start'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop('metrics_query_start', time.perf_counter())
+        try:
+            state = g._metrics
+        except (AttributeError, RuntimeError): # Not in a timed request, or no application context at all
+            with self._lock:
+                self._background_queries += 1
+                self._background_sql_seconds += elapsed
+            return
+        state[1] += 1
+        state[2] += elapsed
+
+    # --- Exposition ---
+
+    def render_prometheus(self):
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                '# HELP quiz_http_requests_total Requests handled, by endpoint, method and status code.',
+                '# TYPE quiz_http_requests_total counter'
+            ]
+            for endpoint, metrics in endpoints:
+                for (method, status), count in sorted(metrics.statuses.items()):
+                    lines.append(f'quiz_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP quiz_http_request_duration_seconds Time until the view returned its response.',
+                '# TYPE quiz_http_request_duration_seconds histogram'
+            ]
+            for endpoint, metrics in endpoints:
+                lines += _histogram_lines('quiz_http_request_duration_seconds', endpoint, metrics.latency)
+
+            lines += [
+                '# HELP quiz_db_queries_per_request SQL statements executed per request.',
+                '# TYPE quiz_db_queries_per_request histogram'
+            ]
+            for endpoint, metrics in endpoints:
+                lines += _histogram_lines('quiz_db_queries_per_request', endpoint, metrics.queries)
+
+            lines += [
+                '# HELP quiz_db_query_seconds_total Time spent executing SQL statements, by endpoint.',
+                '# TYPE quiz_db_query_seconds_total counter'
+            ]
+            for endpoint, metrics in endpoints:
+                lines.append(f'quiz_db_query_seconds_total{{endpoint="{endpoint}"}} {metrics.sql_seconds:.6f}')
+
+            lines += [
+                '# HELP quiz_db_background_queries_total SQL statements executed outside requests.',
+                '# TYPE quiz_db_background_queries_total counter',
+                f'quiz_db_background_queries_total {self._background_queries}',
+                '# HELP quiz_db_background_query_seconds_total Time spent executing SQL statements outside requests.',
+                '# TYPE quiz_db_background_query_seconds_total counter',
+                f'quiz_db_background_query_seconds_total {self._background_sql_seconds:.6f}'
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._background_queries = 0
+            self._background_sql_seconds = 0.0
+
+
+def _histogram_lines(name, endpoint, histogram):
+    """Cumulative bucket lines plus _sum and _count of one labelled histogram."""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds + (float('inf'),), histogram.counts):
+        cumulative += count
+        le = '+Inf' if bound == float('inf') else repr(bound)
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+    return lines
+
+
+# Shared metrics registry, configured in app.py
+request_metrics = RequestMetrics()
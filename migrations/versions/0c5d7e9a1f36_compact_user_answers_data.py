@@ -0,0 +1,31 @@
+"""Re-encode UserQuizStat.user_answers_data in the compact format
+
+Revision ID: 0c5d7e9a1f36
+Revises: f2a6c8d1b3e5
+Create Date: 2026-10-18 16:20:13.804512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from answers_codec import reencode_answers
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5d7e9a1f36'
+down_revision = 'f2a6c8d1b3e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Data-only migration: rewrites legacy JSON rows in chunks of 1000
+    rows, bytes_before, bytes_after = reencode_answers(op.get_bind())
+    if rows:
+        print(f"Re-encoded {rows} quiz attempts: {bytes_before} -> {bytes_after} bytes "
+              f"({(bytes_before - bytes_after) / rows:.0f} bytes saved per attempt)")
+
+
+def downgrade():
+    # Older code reads only JSON
+    reencode_answers(op.get_bind(), to_legacy=True)
@@ -4,9 +4,11 @@ import json
 
 # --- Third-Party Library Imports ---
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
+# --- Project File Imports ---
+from passwords import password_hasher
+
 # --- Database Initialization ---
 # The SQLAlchemy object is initialized here, but will be bound to the Flask app in app.py
 db = SQLAlchemy()
@@ -28,17 +30,27 @@ class User(db.Model, UserMixin):
     quiz_stats = db.relationship('UserQuizStat', backref='user', lazy=True)
 
     def set_password(self, password):
-        """Hashes the provided password and stores it in the database."""
-        self.password_hash = generate_password_hash(password)
+        """Hashes the provided password (on the hashing pool) and stores it in the database."""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """Checks if the provided password matches the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash was made with an outdated algorithm or cost."""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         """Returns a string representation of the User object for debugging."""
         return f'<User {self.name}>'
 
+def attempt_question_count(question_count, questions_per_attempt):
+    """Number of questions in one attempt, given a pack's question count and sampling setting."""
+    if questions_per_attempt:
+        return min(question_count, questions_per_attempt)
+    return question_count
+
 class QuizPack(db.Model):
     """
     Quiz pack model, representing a collection of questions.
@@ -50,10 +62,23 @@ class QuizPack(db.Model):
     color = db.Column(db.String(20), default='blue') # For UI styling
     difficulty = db.Column(db.String(20), default='Легкий') # Pack difficulty levels (e.g., 'Easy', 'Medium', 'Hard')
     time_to_complete_minutes = db.Column(db.Integer, default=10) # Estimated time to complete
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped on every change to the pack or its questions
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Counter cache of len(questions), kept by every add/delete path
+    questions_per_attempt = db.Column(db.Integer, nullable=True) # Questions drawn at random for each attempt; None = all questions
 
     # Relationship to Question model: one quiz pack can contain many questions.
     questions = db.relationship('Question', backref='quiz_pack', lazy=True)
 
+    @property
+    def is_sampled(self):
+        """True if each attempt draws a random subset of the pack's questions."""
+        return bool(self.questions_per_attempt) and self.questions_per_attempt < self.question_count
+
+    @property
+    def attempt_question_count(self):
+        """Number of questions in one attempt of this pack."""
+        return attempt_question_count(self.question_count, self.questions_per_attempt)
+
     @property
     def questions_data(self):
         """
@@ -76,11 +101,30 @@ class Question(db.Model):
     Question model, representing an individual question within a QuizPack.
     """
     id = db.Column(db.Integer, primary_key=True)
-    quiz_pack_id = db.Column(db.Integer, db.ForeignKey('quiz_pack.id'), nullable=False)
+    quiz_pack_id = db.Column(db.Integer, db.ForeignKey('quiz_pack.id'), nullable=False, index=True)
     question_text = db.Column(db.String(500), nullable=False)
     options_json = db.Column(db.String(1000), nullable=False)
     correct_answer_index = db.Column(db.Integer, nullable=False)
     image_url = db.Column(db.String(200), nullable=True)
+    # Answer counters, updated with every recorded attempt (see stats.record_attempts)
+    times_shown = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    times_correct = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    picks_0 = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Times option A was selected
+    picks_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    picks_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    picks_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    @property
+    def percent_correct(self):
+        """Share of correct answers in percent, or None if the question was never answered."""
+        if not self.times_shown:
+            return None
+        return 100 * self.times_correct / self.times_shown
+
+    @property
+    def option_picks(self):
+        """Number of times each option (A-D) was selected."""
+        return [self.picks_0, self.picks_1, self.picks_2, self.picks_3]
 
     def get_options(self):
         """Parses the options_json string into a Python list."""
@@ -96,6 +140,16 @@ class UserQuizStat(db.Model):
     """
     User quiz statistics model, storing the results of quiz completions.
     """
+    __table_args__ = (
+        # Serves the per-user/per-pack history lookups, ordered by completion time
+        db.Index('ix_user_quiz_stat_user_pack_completed', 'user_id', 'quiz_pack_id', 'completed_at'),
+        # Serve the results export filtered by pack and/or completion date (see results_export.py)
+        db.Index('ix_user_quiz_stat_pack_completed', 'quiz_pack_id', 'completed_at'),
+        db.Index('ix_user_quiz_stat_completed_at', 'completed_at'),
+        # An offline ticket is recorded once, even if the upload is retried (see offline_sync.py)
+        db.Index('ix_user_quiz_stat_offline_ticket', 'offline_ticket', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     quiz_pack_id = db.Column(db.Integer, db.ForeignKey('quiz_pack.id'), nullable=False)
@@ -104,7 +158,47 @@ class UserQuizStat(db.Model):
     completed_at = db.Column(db.DateTime, default=datetime.utcnow) # Time of quiz completion
     user_answers_data = db.Column(db.Text) # Stores the user's selected answers
     avg_time_per_question = db.Column(db.Float, nullable=True) # Average time per question
+    offline_ticket = db.Column(db.String(32), nullable=True) # Id of the offline ticket the attempt was uploaded with (see offline_sync.py)
 
     def __repr__(self):
         """Returns a string representation of the UserQuizStat object for debugging."""
-        return f'<UserQuizStat ID:{self.id} User:{self.user_id} Pack:{self.quiz_pack_id} Score:{self.score}>'
\ No newline at end of file
+        return f'<UserQuizStat ID:{self.id} User:{self.user_id} Pack:{self.quiz_pack_id} Score:{self.score}>'
+
+class ActiveQuizAttempt(db.Model):
+    """
+    A quiz in progress, keyed by the opaque token kept in the user's session (see attempt_store.py).
+    Stored in the database so attempts survive restarts and are shared by all application processes.
+    """
+    token = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    quiz_pack_id = db.Column(db.Integer, nullable=False) # No foreign key: attempts of a deleted pack just expire
+    answer_key_json = db.Column(db.Text, nullable=False) # {str(question_id): correct_answer_index}
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True) # Expired attempts are deleted by age
+
+    def __repr__(self):
+        """Returns a string representation of the ActiveQuizAttempt object for debugging."""
+        return f'<ActiveQuizAttempt User:{self.user_id} Pack:{self.quiz_pack_id}>'
+
+class UserPackSummary(db.Model):
+    """
+    Per-user, per-pack aggregate of UserQuizStat, maintained incrementally on every
+    quiz submission so that views read one row per pack instead of the whole history.
+    """
+    __table_args__ = (
+        # Loads one pack's leaderboard without reading the other packs' rows
+        db.Index('ix_user_pack_summary_pack_rank', 'quiz_pack_id', 'best_score', 'best_avg_time'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    quiz_pack_id = db.Column(db.Integer, db.ForeignKey('quiz_pack.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0) # Number of completed attempts
+    best_score = db.Column(db.Integer, nullable=False, default=0) # Highest score among attempts
+    last_score = db.Column(db.Integer, nullable=False, default=0) # Score of the most recent attempt
+    score_sum = db.Column(db.Integer, nullable=False, default=0) # Sum of scores of all attempts
+    questions_sum = db.Column(db.Integer, nullable=False, default=0) # Sum of total_questions of all attempts
+    latest_completed_at = db.Column(db.DateTime, nullable=True) # Completion time of the most recent attempt
+    best_avg_time = db.Column(db.Float, nullable=True) # Fastest avg_time_per_question among attempts with best_score (leaderboard tie-break)
+
+    def __repr__(self):
+        """Returns a string representation of the UserPackSummary object for debugging."""
+        return f'<UserPackSummary User:{self.user_id} Pack:{self.quiz_pack_id} Attempts:{self.attempts}>'
@@ -0,0 +1,204 @@
+# --- Standard Library Imports ---
+from datetime import datetime, timezone
+import secrets
+
+# --- Third-Party Library Imports ---
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadData, SignatureExpired
+from sqlalchemy import select
+
+# --- Project File Imports ---
+from models import db, User, QuizPack, Question, UserQuizStat
+from pack_cache import pack_cache
+from grading import grade_answers, average_time_per_question
+from answers_codec import encode_answers
+from stats import fold_attempts
+
+# Keeps ticket signatures apart from everything else signed with SECRET_KEY (e.g. the session)
+TICKET_SALT = 'offline-quiz-ticket'
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt=TICKET_SALT)
+
+
+def issue_ticket(user_id, pack_id, question_ids):
+    """
+    Signs the questions of a quiz attempt downloaded for offline play.
+    The ticket comes back with the answers and proves which questions the server
+    handed out to which user; its random id lets the attempt be recorded only once.
+    """
+    return _serializer().dumps({'id': secrets.token_urlsafe(12), 'u': user_id, 'p': pack_id, 'q': list(question_ids)})
+
+
+class OfflineTicket:
+    """A verified ticket of an offline attempt."""
+    __slots__ = ('ticket_id', 'user_id', 'pack_id', 'question_ids', 'issued_at')
+
+    def __init__(self, ticket_id, user_id, pack_id, question_ids, issued_at):
+        self.ticket_id = ticket_id
+        self.user_id = user_id
+        self.pack_id = pack_id
+        self.question_ids = question_ids
+        self.issued_at = issued_at # Naive UTC, like UserQuizStat.completed_at
+
+
+def load_ticket(token, max_age):
+    """Verifies a ticket. Raises ValueError with a message for the client if it is invalid or expired."""
+    if not isinstance(token, str):
+        raise ValueError("Missing ticket.")
+    try:
+        payload, issued_at = _serializer().loads(token, max_age=max_age, return_timestamp=True)
+    except SignatureExpired:
+        raise ValueError("Ticket expired, the quiz was played too long ago.")
+    except BadData:
+        raise ValueError("Invalid ticket.")
+    return OfflineTicket(payload['id'], payload['u'], payload['p'], payload['q'], issued_at.replace(tzinfo=None))
+
+
+def _completed_at(value, ticket, now):
+    """Completion time reported by the client (ms since the epoch), kept between the ticket's issue time and now."""
+    try:
+        completed_at = datetime.fromtimestamp(value / 1000, timezone.utc).replace(tzinfo=None)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    return min(max(completed_at, ticket.issued_at), now)
+
+
+def _load_answer_keys(tickets):
+    """
+    Returns {pack_id: {str(question_id): correct_answer_index}} for the packs of the tickets.
+    Keys of compiled packs come from the pack cache; the handed-out questions of all other
+    packs are read with one query, however many packs the batch covers. Packs that no
+    longer exist are missing.
+    """
+    question_ids = {}
+    for ticket in tickets:
+        question_ids.setdefault(ticket.pack_id, set()).update(ticket.question_ids)
+    if not question_ids:
+        return {}
+
+    answer_keys = {}
+    uncached = {} # pack_id -> question ids to read
+    for quiz_pack in QuizPack.query.filter(QuizPack.id.in_(question_ids)).all():
+        # Large banks are cached as an id list only, so their keys are always read
+        compiled_pack = None if quiz_pack.is_sampled else pack_cache.peek(quiz_pack.id, quiz_pack.version)
+        if compiled_pack is not None:
+            answer_keys[quiz_pack.id] = compiled_pack.answer_key
+        else:
+            answer_keys[quiz_pack.id] = {}
+            uncached[quiz_pack.id] = question_ids[quiz_pack.id]
+    if uncached:
+        rows = db.session.execute(select(Question.quiz_pack_id, Question.id, Question.correct_answer_index).where(
+            Question.quiz_pack_id.in_(uncached), Question.id.in_(set().union(*uncached.values()))))
+        for pack_id, question_id, index in rows:
+            answer_keys[pack_id][str(question_id)] = index
+    return answer_keys
+
+
+def _ticket_answers(answers, question_ids):
+    """
+    The answers to the ticket's questions, one per question (the first one sent).
+    Answers to other questions are dropped, so a crafted upload cannot raise the score
+    above the ticket's question count or touch the counters of other questions.
+    """
+    allowed = {str(question_id) for question_id in question_ids}
+    kept = {}
+    for answer in answers:
+        question_id = str(answer.get('questionId'))
+        if question_id in allowed and question_id not in kept:
+            kept[question_id] = answer
+    return list(kept.values())
+
+
+def _rejected(index, message):
+    return {'index': index, 'success': False, 'message': message}
+
+
+def record_offline_attempts(attempts, max_age):
+    """
+    Grades a batch of offline attempts ([{'ticket', 'answers', 'totalTimeTaken', 'completedAt'}, ...])
+    and writes the valid ones with one INSERT plus the usual summary and counter updates.
+    The signed ticket, not the uploader's session, tells whose attempt it is, so one
+    classroom device can upload for every student.
+    Returns (results, new stats): one result dict per attempt, in order, and the
+    recorded attempts as transient UserQuizStat objects (not in the session). The caller commits.
+    """
+    results = [None] * len(attempts)
+    tickets = {} # index -> OfflineTicket
+    for index, attempt in enumerate(attempts):
+        try:
+            if not isinstance(attempt, dict) or not isinstance(attempt.get('answers'), list):
+                raise ValueError("Invalid attempt data.")
+            tickets[index] = load_ticket(attempt.get('ticket'), max_age)
+        except ValueError as e:
+            results[index] = _rejected(index, str(e))
+
+    # Attempts recorded by an earlier upload (e.g. a sync retried after a lost response)
+    ticket_ids = {ticket.ticket_id for ticket in tickets.values()}
+    recorded = {}
+    user_ids = set()
+    if ticket_ids:
+        for ticket_id, stat_id, score, total_questions in db.session.execute(
+                select(UserQuizStat.offline_ticket, UserQuizStat.id, UserQuizStat.score, UserQuizStat.total_questions)
+                .where(UserQuizStat.offline_ticket.in_(ticket_ids))):
+            recorded[ticket_id] = {'quiz_stat_id': stat_id, 'score': score, 'total_questions': total_questions}
+        user_ids = set(db.session.execute(
+            select(User.id).where(User.id.in_({ticket.user_id for ticket in tickets.values()}))).scalars())
+    answer_keys = _load_answer_keys(tickets.values())
+
+    now = datetime.utcnow()
+    new_stats = {} # index -> UserQuizStat
+    batch_ticket_ids = set()
+    for index, ticket in tickets.items():
+        if ticket.ticket_id in recorded:
+            results[index] = dict(recorded[ticket.ticket_id], index=index, success=True, already_recorded=True)
+            continue
+        if ticket.ticket_id in batch_ticket_ids:
+            results[index] = _rejected(index, "Duplicate attempt in this upload.")
+            continue
+        pack_key = answer_keys.get(ticket.pack_id)
+        if pack_key is None:
+            results[index] = _rejected(index, "Quiz pack not found.")
+            continue
+        if ticket.user_id not in user_ids:
+            results[index] = _rejected(index, "User not found.")
+            continue
+
+        # Only the questions of this ticket count; questions deleted since then are graded as unknown
+        answer_key = {str(question_id): pack_key[str(question_id)]
+                      for question_id in ticket.question_ids if str(question_id) in pack_key}
+        attempt = attempts[index]
+        try:
+            score, answers = grade_answers(answer_key, _ticket_answers(attempt['answers'], ticket.question_ids))
+            avg_time_per_question = average_time_per_question(attempt.get('totalTimeTaken'), len(ticket.question_ids))
+            user_answers_data = encode_answers(answers)
+        except (AttributeError, TypeError, ValueError):
+            results[index] = _rejected(index, "Invalid answers.")
+            continue
+
+        new_stats[index] = UserQuizStat(
+            user_id=ticket.user_id,
+            quiz_pack_id=ticket.pack_id,
+            score=score,
+            total_questions=len(ticket.question_ids),
+            completed_at=_completed_at(attempt.get('completedAt'), ticket, now),
+            user_answers_data=user_answers_data,
+            avg_time_per_question=avg_time_per_question,
+            offline_ticket=ticket.ticket_id
+        )
+        batch_ticket_ids.add(ticket.ticket_id)
+
+    if new_stats:
+        # One multi-row INSERT instead of the ORM's row-by-row inserts; rows are matched
+        # back to their attempts by ticket id, so RETURNING may come in any order
+        table = UserQuizStat.__table__
+        stat_ids = dict(db.session.execute(
+            table.insert().returning(table.c.offline_ticket, table.c.id),
+            [{column.name: getattr(stat, column.key) for column in table.columns if column.key != 'id'}
+             for stat in new_stats.values()]).all())
+        fold_attempts(list(new_stats.values()))
+        for index, stat in new_stats.items():
+            results[index] = {'index': index, 'success': True, 'quiz_stat_id': stat_ids[stat.offline_ticket],
+                              'score': stat.score, 'total_questions': stat.total_questions}
+    return results, list(new_stats.values())
@@ -0,0 +1,186 @@
+# --- Standard Library Imports ---
+from collections import OrderedDict
+import random
+import threading
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import select
+
+# --- Project File Imports ---
+from models import db, QuizPack, Question
+from assets import static_asset_url
+
+
+class CompiledPack:
+    """
+    A quiz pack prepared for serving: the client payload (questions without
+    correct answers) and the answer key used for grading.
+    Packs served by sampling (see QuizPack.questions_per_attempt) are compiled
+    index-only: they hold just the question ids, and questions and answer_key are None.
+    """
+    __slots__ = ('pack_id', 'version', 'questions', 'answer_key', 'question_ids')
+
+    def __init__(self, pack_id, version, questions, answer_key, question_ids):
+        self.pack_id = pack_id
+        self.version = version
+        self.questions = questions # Tuple of dicts, safe to share between requests
+        self.answer_key = answer_key # {str(question_id): correct_answer_index}
+        self.question_ids = question_ids # Tuple of all question ids of the pack
+
+
+def question_payload(q_obj):
+    """Client-side representation of a question, without the correct answer."""
+    return {
+        'id': q_obj.id,
+        'question': q_obj.question_text,
+        'options': q_obj.get_options(),
+        'image_url': static_asset_url(q_obj.image_url)
+    }
+
+
+def compile_pack(pack_id, version, index_only=False):
+    """
+    Loads all questions of a pack and builds its CompiledPack.
+    Image URLs are resolved to their final, cache-busted form here, once per pack version.
+    With index_only, only the question ids are read (from the quiz_pack_id index).
+    """
+    if index_only:
+        question_ids = db.session.execute(
+            select(Question.id).where(Question.quiz_pack_id == pack_id).order_by(Question.id)
+        ).scalars().all()
+        return CompiledPack(pack_id, version, None, None, tuple(question_ids))
+
+    questions = []
+    answer_key = {}
+    for q_obj in Question.query.filter_by(quiz_pack_id=pack_id).order_by(Question.id).all():
+        questions.append(question_payload(q_obj))
+        answer_key[str(q_obj.id)] = q_obj.correct_answer_index
+    return CompiledPack(pack_id, version, tuple(questions), answer_key, tuple(q['id'] for q in questions))
+
+
+def sample_questions(compiled_pack, count):
+    """
+    Draws `count` random questions of a pack. Only the sampled rows are fetched
+    from the database and deserialized. Returns (questions, answer_key), with
+    the questions in random order.
+    """
+    chosen_ids = random.sample(compiled_pack.question_ids, min(count, len(compiled_pack.question_ids)))
+    rows = {q_obj.id: q_obj for q_obj in Question.query.filter(Question.id.in_(chosen_ids)).all()}
+    questions = []
+    answer_key = {}
+    for question_id in chosen_ids:
+        q_obj = rows.get(question_id)
+        if q_obj is None: # Deleted since the pack was compiled
+            continue
+        questions.append(question_payload(q_obj))
+        answer_key[str(q_obj.id)] = q_obj.correct_answer_index
+    return questions, answer_key
+
+
+class PackCache:
+    """
+    Bounded LRU cache of compiled quiz packs, keyed by (pack id, pack version).
+    A pack's version is bumped on every write, so a stale entry is never served
+    even if another process changed the pack.
+    """
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {} # Per-key locks, so a cold pack is compiled only once
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        """Reads the cache size from the application config."""
+        self.max_size = app.config.get('PACK_CACHE_SIZE', self.max_size)
+
+    def get(self, pack_id, version, index_only=False):
+        """
+        Returns the CompiledPack for the given pack version, compiling it on a miss.
+        Whether a pack is served index-only is fixed per pack version, so both
+        forms never compete for the same key.
+        """
+        key = (pack_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have compiled the pack while we were waiting
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = compile_pack(pack_id, version, index_only)
+                self._store(key, entry)
+
+        with self._lock:
+            self._loading.pop(key, None)
+        return entry
+
+    def peek(self, pack_id, version):
+        """Returns the cached CompiledPack of a pack version, or None without compiling it."""
+        with self._lock:
+            entry = self._entries.get((pack_id, version))
+            if entry is not None:
+                self._entries.move_to_end((pack_id, version))
+                self.hits += 1
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            # Older versions of the same pack will never be requested again
+            for stale_key in [k for k in self._entries if k[0] == key[0] and k[1] < key[1]]:
+                del self._entries[stale_key]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, pack_id):
+        """Drops every cached version of a pack."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == pack_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss/eviction counters for monitoring."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+# Shared cache instance, configured in app.py
+pack_cache = PackCache()
+
+
+def invalidate_pack(pack_id, question_delta=0):
+    """
+    Marks a pack as changed: bumps its version in the current transaction
+    and drops its compiled entries from the local cache.
+    Call it from every view that writes a pack or its questions; pass
+    question_delta when questions are added (+n) or deleted (-n) so that
+    QuizPack.question_count stays correct.
+    """
+    values = {QuizPack.version: QuizPack.version + 1}
+    if question_delta:
+        values[QuizPack.question_count] = QuizPack.question_count + question_delta
+    QuizPack.query.filter_by(id=pack_id).update(values, synchronize_session=False)
+    pack_cache.invalidate(pack_id)
@@ -0,0 +1,97 @@
+# --- Standard Library Imports ---
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+# --- Third-Party Library Imports ---
+from flask import request, session, make_response
+from flask_login import current_user
+from markupsafe import Markup
+
+# --- Project File Imports ---
+from models import db, QuizPack
+
+
+def pack_list_digest():
+    """
+    Returns a digest of the (id, version) pairs of all quiz packs. Every pack
+    write bumps QuizPack.version (see invalidate_pack) and creating or deleting
+    a pack changes the id list, so the digest changes whenever a pack card would.
+    """
+    rows = db.session.query(QuizPack.id, QuizPack.version).order_by(QuizPack.id).all()
+    return hashlib.sha1(repr(rows).encode()).hexdigest()
+
+
+class FragmentCache:
+    """
+    Small LRU cache of rendered template fragments (e.g. the grid of pack cards),
+    keyed by fragment name and a content version such as pack_list_digest().
+    Only the newest version of each fragment is kept.
+    """
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._entries = OrderedDict() # name -> (version, Markup), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Reads the size limit from the application config."""
+        self.max_size = app.config.get('FRAGMENT_CACHE_SIZE', self.max_size)
+
+    def get_or_render(self, name, version, render):
+        """Returns the cached fragment for (name, version), calling render() on a miss."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        fragment = Markup(render().strip())
+        with self._lock:
+            self._entries[name] = (version, fragment)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters for monitoring."""
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared cache instance, configured in app.py
+fragment_cache = FragmentCache()
+
+# Part of every ETag, so that pages cached by browsers are revalidated after a restart or deploy
+_BOOT_TOKEN = str(time.time_ns())
+
+
+def conditional_page(etag_parts, render):
+    """
+    Serves a page with a strong ETag built from etag_parts and the current user.
+    If the browser already has that version (If-None-Match), answers 304 without
+    calling render(). Pages with pending flash messages are always rendered and
+    get no ETag, because the messages are shown only once.
+    """
+    if session.get('_flashes'):
+        return render()
+
+    user_part = (current_user.id, current_user.name) if current_user.is_authenticated else None
+    etag = hashlib.sha1(repr((_BOOT_TOKEN, request.path, user_part) + tuple(etag_parts)).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' # Per-user pages; revalidate on every visit
+    return response
@@ -0,0 +1,78 @@
+# --- Standard Library Imports ---
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import multiprocessing
+import threading
+
+# --- Third-Party Library Imports ---
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasher:
+    """
+    Runs Werkzeug's password hashing on a bounded process pool, so CPU-bound
+    hashes during login/registration bursts do not hold up the request workers.
+    The algorithm and cost come from PASSWORD_HASH_METHOD; with
+    PASSWORD_HASH_WORKERS = 0 hashing runs inline in the calling thread.
+    """
+
+    def __init__(self):
+        self.method = 'pbkdf2:sha256:600000'
+        self.salt_length = 16
+        self.workers = 0
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Reads the hashing settings from the application config."""
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get('PASSWORD_HASH_SALT_LENGTH', self.salt_length)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # 'spawn' avoids forking a process that already runs request threads
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        return self._get_executor().submit(func, *args).result()
+
+    def hash(self, password):
+        """Returns a salted hash of the password using the configured method."""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def hash_many(self, passwords, chunksize=64):
+        """Hashes an iterable of passwords across the pool, preserving order."""
+        if self.workers <= 0:
+            return [generate_password_hash(password, self.method, self.salt_length) for password in passwords]
+        passwords = list(passwords)
+        return list(self._get_executor().map(generate_password_hash, passwords,
+                                             [self.method] * len(passwords), [self.salt_length] * len(passwords),
+                                             chunksize=chunksize))
+
+    def verify(self, password_hash, password):
+        """Checks a password against a stored hash."""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        True if the hash was made with another algorithm or cost than the configured one.
+        PASSWORD_HASH_METHOD should therefore spell out the cost, e.g. 'pbkdf2:sha256:600000'.
+        """
+        return password_hash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Shared hasher instance, configured in app.py
+password_hasher = PasswordHasher()
@@ -0,0 +1,163 @@
+# --- Standard Library Imports ---
+from collections import deque
+
+# --- Third-Party Library Imports ---
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from models import db
+from pack_cache import pack_cache
+from user_cache import user_cache
+from page_cache import fragment_cache
+from leaderboard import leaderboards
+from query_plans import checked_route_requests
+
+
+def query_budget(max_queries, per_batch=0):
+    """
+    Declares the most SQL statements one request to a view may execute, cold caches
+    included. Place it below @route (and below or above @login_required, which copies
+    the attribute):
+
+        @quiz_bp.route("/quiz/<int:pack_id>")
+        @login_required
+        @query_budget(4)
+        def quiz(pack_id): ...
+
+    Views that write an upload in batches, one executemany per batch, declare what each
+    batch costs with per_batch; the request may then run max_queries + per_batch * batches
+    statements, so the budget holds for any upload size.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.query_budget_per_batch = per_batch
+        return view
+    return decorator
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised after a request that broke its view's query budget, in 'raise' mode."""
+
+
+class QueryReport:
+    """The statements of one request that broke its budget or repeated a statement."""
+    __slots__ = ('endpoint', 'count', 'budget', 'repeated')
+
+    def __init__(self, endpoint, count, budget, repeated):
+        self.endpoint = endpoint
+        self.count = count
+        self.budget = budget
+        self.repeated = repeated # [(statement, number of different parameter sets)]
+
+    def __str__(self):
+        problems = []
+        if self.budget is not None and self.count > self.budget:
+            problems.append(f"{self.count} SQL statements, budget {self.budget}")
+        for statement, times in self.repeated:
+            problems.append(f"possible N+1, run {times} times with different parameters: {' '.join(statement.split())[:200]}")
+        return f"{self.endpoint}: " + '; '.join(problems)
+
+
+class QueryBudgetGuard:
+    """
+    Counts the SQL statements of every request and compares them with the budget the
+    view declared with @query_budget. A statement executed QUERY_REPEAT_LIMIT or more
+    times with different parameters in one request is reported as a likely N+1 pattern.
+    QUERY_BUDGET_MODE selects what happens: 'raise' (the default under TESTING) makes
+    the request fail with QueryBudgetExceeded, 'warn' prints the report, 'off' skips
+    the bookkeeping. `flask check-query-budgets` runs the read-only views in 'warn' mode.
+    """
+
+    def __init__(self, max_reports=100):
+        self.reports = deque(maxlen=max_reports) # Most recent violations, for check-query-budgets
+
+    def init_app(self, app):
+        """Registers the request hooks and the statement listener."""
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._record_statement)
+
+    @staticmethod
+    def mode():
+        mode = current_app.config.get('QUERY_BUDGET_MODE')
+        if mode is None:
+            mode = 'raise' if current_app.testing else 'off'
+        return mode
+
+    def _start_request(self):
+        if self.mode() != 'off':
+            g._query_budget_statements = {} # statement -> set of parameter reprs
+            g._query_budget_count = 0
+            g._query_budget_batches = 0 # executemany statements
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        try:
+            statements = g._query_budget_statements
+        except (AttributeError, RuntimeError): # Not checking this request, or no application context
+            return
+        g._query_budget_count += 1
+        if executemany: # A batched write is the cure for N+1, not an instance of it
+            g._query_budget_batches += 1
+        else:
+            statements.setdefault(statement, set()).add(repr(parameters))
+
+    def _finish_request(self, response):
+        statements = g.pop('_query_budget_statements', None)
+        if statements is None:
+            return response
+        count = g.pop('_query_budget_count')
+        batches = g.pop('_query_budget_batches')
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None:
+            budget += getattr(view, 'query_budget_per_batch', 0) * batches
+        repeat_limit = current_app.config.get('QUERY_REPEAT_LIMIT', 3)
+        repeated = [(statement, len(parameter_sets)) for statement, parameter_sets in statements.items()
+                    if len(parameter_sets) >= repeat_limit]
+        if not repeated and (budget is None or count <= budget):
+            return response
+
+        report = QueryReport(request.endpoint, count, budget, repeated)
+        self.reports.append(report)
+        if self.mode() == 'raise':
+            raise QueryBudgetExceeded(str(report))
+        print(f"Warning: query budget - {report}")
+        return response
+
+
+# Shared guard instance, configured in app.py
+query_budgets = QueryBudgetGuard()
+
+
+def check_route_query_budgets(app):
+    """
+    Requests the views checked by check-query-plans with cold caches, in 'warn' mode.
+    Returns (reports of the views that broke their budget, endpoints without a budget).
+    Raises ValueError if the database has no user or pack to request the views with.
+    """
+    user_id, urls = checked_route_requests(app)
+    if user_id is None:
+        raise ValueError("No users or quiz packs in the database, so no view could be checked.")
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    previous_mode = app.config.get('QUERY_BUDGET_MODE')
+    app.config['QUERY_BUDGET_MODE'] = 'warn'
+    query_budgets.reports.clear()
+    try:
+        for endpoint, url in urls:
+            # Budgets are worst cases, so every view starts from empty caches
+            pack_cache.clear()
+            user_cache.clear()
+            fragment_cache.clear()
+            leaderboards.clear()
+            client.get(url)
+    finally:
+        app.config['QUERY_BUDGET_MODE'] = previous_mode
+    reports = list(query_budgets.reports)
+
+    unbudgeted = sorted(endpoint for endpoint, view in app.view_functions.items()
+                        if endpoint != 'static' and getattr(view, 'query_budget', None) is None)
+    return reports, unbudgeted
@@ -0,0 +1,120 @@
+# --- Standard Library Imports ---
+import re
+
+# --- Third-Party Library Imports ---
+from flask import url_for
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from models import db, User, QuizPack, UserQuizStat
+
+# Tables that are expected to be read in full (the pack listing shows every pack)
+FULL_SCAN_ALLOWED = {'quiz_pack'}
+
+# "SCAN question" (SQLite >= 3.36) or "SCAN TABLE question" (older versions).
+# "SCAN ... USING [COVERING] INDEX" walks an index, not the table, and is accepted,
+# as is "SCAN CONSTANT ROW" for a SELECT without a FROM clause.
+_TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)(?!.*USING)')
+
+
+def route_requests(user_id, pack_id, quiz_stat_id):
+    """
+    Returns (endpoint, url) pairs of the read-only views whose queries are checked.
+    Must be called inside a request context so url_for can build the URLs.
+    """
+    urls = [
+        ('packs.packs', url_for('packs.packs')),
+        ('auth.profile', url_for('auth.profile')),
+        ('quiz.quiz', url_for('quiz.quiz', pack_id=pack_id)),
+        ('admin.dashboard', url_for('admin.dashboard')),
+        ('admin.add_question', url_for('admin.add_question', quiz_id=pack_id)),
+        ('leaderboard.global', url_for('leaderboard.leaderboard')),
+        ('leaderboard.pack', url_for('leaderboard.leaderboard', pack_id=pack_id)),
+        ('admin.export_quiz_results', url_for('admin.export_quiz_results', pack_id=pack_id, date_from='2000-01-01')),
+    ]
+    if quiz_stat_id is not None:
+        urls.append(('quiz.quiz_results', url_for('quiz.quiz_results', pack_id=pack_id, quiz_stat_id=quiz_stat_id)))
+    return urls
+
+
+def checked_route_requests(app):
+    """
+    Returns (user_id, [(endpoint, url), ...]) for requesting the checked views as the
+    user with the most recent attempt, or (None, []) when there is no user or pack yet.
+    """
+    latest_stat = UserQuizStat.query.order_by(UserQuizStat.id.desc()).first()
+    if latest_stat:
+        user_id, pack_id, quiz_stat_id = latest_stat.user_id, latest_stat.quiz_pack_id, latest_stat.id
+    else:
+        user, pack = User.query.first(), QuizPack.query.first()
+        if not user or not pack:
+            return None, []
+        user_id, pack_id, quiz_stat_id = user.id, pack.id, None
+
+    with app.test_request_context():
+        return user_id, route_requests(user_id, pack_id, quiz_stat_id)
+
+
+def collect_route_statements(app):
+    """
+    Requests every checked view through the test client and records the SQL
+    statements each view issues. Returns {endpoint: [(statement, parameters), ...]}.
+    """
+    user_id, urls = checked_route_requests(app)
+    if user_id is None:
+        return {}
+
+    statements = {}
+    current = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            current.append((statement, parameters))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id) # Log in through Flask-Login's session key
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for endpoint, url in urls:
+            current.clear()
+            client.get(url)
+            statements[endpoint] = list(current)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def explain(statement, parameters):
+    """Returns the detail column of SQLite's EXPLAIN QUERY PLAN for a statement."""
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def find_table_scans(plan):
+    """Returns the names of tables read with a full scan, except the allowed ones."""
+    scanned = []
+    for detail in plan:
+        match = _TABLE_SCAN.match(detail)
+        if match and match.group(1) not in FULL_SCAN_ALLOWED:
+            scanned.append(match.group(1))
+    return scanned
+
+
+def check_route_query_plans(app):
+    """
+    Explains every statement issued by the checked views.
+    Returns a list of (endpoint, statement, plan) for each statement that scans a table.
+    Raises ValueError if the database has no user or pack to request the views with.
+    """
+    route_statements = collect_route_statements(app)
+    if not route_statements:
+        raise ValueError("No users or quiz packs in the database, so no view could be checked.")
+    regressions = []
+    for endpoint, endpoint_statements in route_statements.items():
+        for statement, parameters in endpoint_statements:
+            plan = explain(statement, parameters)
+            if find_table_scans(plan):
+                regressions.append((endpoint, statement, plan))
+    return regressions
@@ -0,0 +1,122 @@
+# --- Standard Library Imports ---
+import json
+
+# --- Third-Party Library Imports ---
+from sqlalchemy import select
+
+# --- Project File Imports ---
+from models import db, Question
+from pack_cache import invalidate_pack
+from bulk_io import write_rows
+
+ANSWER_LETTERS = 'ABCD'
+# Columns of an exported pack; JSON Lines rows may also give 'options' as a list of four strings
+QUESTION_FIELDS = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'image_url']
+OPTION_FIELDS = QUESTION_FIELDS[1:5]
+
+
+class QuestionImportReport:
+    """Outcome of a bulk question import."""
+    __slots__ = ('imported', 'errors', 'batches', 'committed_line')
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = [] # (line number, message)
+        self.batches = 0
+        self.committed_line = 0 # Line of the last row covered by a committed batch
+
+
+def parse_question_row(row):
+    """
+    Validates one imported row and returns the values for a Question insert.
+    Raises ValueError with a readable message if the row is invalid.
+    """
+    if 'error' in row:
+        raise ValueError(row['error'])
+    question_text = str(row.get('question_text') or '').strip()
+    options = row.get('options')
+    if options is None:
+        options = [row.get(key) for key in OPTION_FIELDS]
+    if not isinstance(options, list) or len(options) != 4:
+        raise ValueError("exactly four answer options are required")
+    options = [str(option or '').strip() for option in options]
+    correct_answer = str(row.get('correct_answer') or '').strip().upper()
+    image_url = str(row.get('image_url') or '').strip() or None
+
+    if not question_text or not all(options):
+        raise ValueError("question text and all four answer options must be filled")
+    if len(correct_answer) != 1 or correct_answer not in ANSWER_LETTERS:
+        raise ValueError("correct_answer must be one of the letters A, B, C or D")
+    options_json = json.dumps(options)
+    # Lengths of the Question columns
+    if len(question_text) > 500:
+        raise ValueError("question text is longer than 500 characters")
+    if len(options_json) > 1000:
+        raise ValueError("answer options are longer than 1000 characters in total")
+    if image_url and len(image_url) > 200:
+        raise ValueError("image URL is longer than 200 characters")
+    return {
+        'question_text': question_text,
+        'options_json': options_json,
+        'correct_answer_index': ANSWER_LETTERS.index(correct_answer),
+        'image_url': image_url
+    }
+
+
+def import_questions(pack_id, rows, batch_size=500, report=None):
+    """
+    Adds questions to a pack from (line number, row) pairs. Valid rows are inserted
+    with one executemany per batch, each batch in its own transaction together with
+    the pack's version and question_count update. Invalid rows are reported and skipped.
+    Only the current batch is held in memory, so if reading the rows fails part-way the
+    earlier batches stay imported: pass a report to learn how far the import got.
+    """
+    if report is None:
+        report = QuestionImportReport()
+    batch = []
+    line_number = 0
+    for line_number, row in rows:
+        try:
+            values = parse_question_row(row)
+        except ValueError as e:
+            report.errors.append((line_number, str(e)))
+            continue
+        values['quiz_pack_id'] = pack_id
+        batch.append(values)
+        if len(batch) >= batch_size:
+            _insert_batch(pack_id, batch, report, line_number)
+            batch = []
+    if batch:
+        _insert_batch(pack_id, batch, report, line_number)
+    return report
+
+
+def _insert_batch(pack_id, batch, report, last_line):
+    db.session.execute(Question.__table__.insert(), batch)
+    invalidate_pack(pack_id, question_delta=len(batch))
+    db.session.commit()
+    report.imported += len(batch)
+    report.batches += 1
+    report.committed_line = last_line
+
+
+def export_questions(pack_id, file_format, chunk_size=500):
+    """
+    Yields the questions of a pack as CSV or JSON Lines text, reading the rows
+    in chunks so that large packs are never loaded as a whole.
+    """
+    query = select(Question.question_text, Question.options_json, Question.correct_answer_index,
+                   Question.image_url).where(Question.quiz_pack_id == pack_id).order_by(Question.id)
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    yield from write_rows((_export_row(row) for row in result), QUESTION_FIELDS, file_format)
+
+
+def _export_row(row):
+    options = json.loads(row.options_json)
+    options += [''] * (4 - len(options))
+    exported = {'question_text': row.question_text}
+    exported.update(zip(OPTION_FIELDS, options))
+    index = row.correct_answer_index
+    exported['correct_answer'] = ANSWER_LETTERS[index] if 0 <= index < len(ANSWER_LETTERS) else ''
+    exported['image_url'] = row.image_url or ''
+    return exported
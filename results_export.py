@@ -0,0 +1,75 @@
+# --- Third-Party Library Imports ---
+from sqlalchemy import select
+
+# --- Project File Imports ---
+from models import db, User, QuizPack, UserQuizStat
+from bulk_io import write_rows
+
+# Columns of the results export, one row per attempt
+RESULT_FIELDS = ['attempt_id', 'completed_at', 'user_id', 'user_name', 'user_email', 'pack_id', 'pack_title',
+                 'score', 'total_questions', 'percent', 'avg_time_per_question']
+# Columns holding text typed in by users, and the first characters that make a spreadsheet
+# treat a CSV cell as a formula
+TEXT_FIELDS = ('user_name', 'user_email', 'pack_title')
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def results_query(pack_id=None, since=None, until=None):
+    """
+    Attempts joined with their user and pack, oldest first, optionally limited to one
+    pack and to completion times in [since, until). Both filters and the ordering are
+    served by the (quiz_pack_id, completed_at) and (completed_at) indexes of UserQuizStat.
+    """
+    query = select(
+        UserQuizStat.id, UserQuizStat.completed_at, UserQuizStat.user_id, User.name, User.email,
+        UserQuizStat.quiz_pack_id, QuizPack.title, UserQuizStat.score, UserQuizStat.total_questions,
+        UserQuizStat.avg_time_per_question
+    ).join(User, User.id == UserQuizStat.user_id).join(QuizPack, QuizPack.id == UserQuizStat.quiz_pack_id)
+    if pack_id is not None:
+        query = query.where(UserQuizStat.quiz_pack_id == pack_id)
+    if since is not None:
+        query = query.where(UserQuizStat.completed_at >= since)
+    if until is not None:
+        query = query.where(UserQuizStat.completed_at < until)
+    return query.order_by(UserQuizStat.completed_at, UserQuizStat.id)
+
+
+def export_results(file_format, pack_id=None, since=None, until=None, chunk_size=1000):
+    """
+    Yields quiz results as CSV or JSON Lines text. Rows are fetched from the cursor
+    chunk_size at a time, so memory use does not depend on the number of attempts.
+    """
+    result = db.session.execute(results_query(pack_id, since, until).execution_options(yield_per=chunk_size))
+    rows = (_export_row(row) for row in result)
+    if file_format == 'csv':
+        rows = (_escape_formulas(row) for row in rows)
+    yield from write_rows(rows, RESULT_FIELDS, file_format)
+
+
+def _escape_formulas(row):
+    """
+    Prefixes user-supplied text that a spreadsheet would evaluate (e.g. a name like
+    '=HYPERLINK(...)') with an apostrophe, so it is shown as text when the CSV is opened.
+    """
+    for field in TEXT_FIELDS:
+        value = row[field]
+        if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            row[field] = "'" + value
+    return row
+
+
+def _export_row(row):
+    stat_id, completed_at, user_id, user_name, user_email, pack_id, pack_title, score, total_questions, avg_time = row
+    return {
+        'attempt_id': stat_id,
+        'completed_at': completed_at.isoformat(sep=' ', timespec='seconds') if completed_at else '',
+        'user_id': user_id,
+        'user_name': user_name,
+        'user_email': user_email,
+        'pack_id': pack_id,
+        'pack_title': pack_title,
+        'score': score or 0,
+        'total_questions': total_questions or 0,
+        'percent': round(100 * (score or 0) / total_questions, 1) if total_questions else '',
+        'avg_time_per_question': round(avg_time, 2) if avg_time is not None else ''
+    }
@@ -1,7 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context, abort, current_app
 from flask_login import login_required, current_user
-from models import db, QuizPack, Question, UserQuizStat # Import from models
+from query_budget import query_budget
+from models import db, QuizPack, Question, UserQuizStat, UserPackSummary # Import from models
+from pack_cache import pack_cache, invalidate_pack
+from attempt_store import attempt_store
+from submission_queue import submission_writer
+from user_cache import user_cache
+from page_cache import fragment_cache, pack_list_digest, conditional_page
+from leaderboard import leaderboards
+from metrics import request_metrics
+from bulk_io import guess_format, read_rows
+from question_transfer import import_questions, export_questions, QuestionImportReport
+from results_export import export_results
+import csv
+import hmac
+import io
 import json # Used for handling JSON strings in questions
+from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -29,20 +44,76 @@ def index_to_letter(index):
     if 0 <= index < len(letters):
         return letters[index]
     return None
+
+def parse_questions_per_attempt(value):
+    """Parses the optional 'questions per attempt' form field.
+    Returns None for an empty field; raises ValueError if it is not a positive integer."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    number = int(value)
+    if number < 1:
+        raise ValueError("Questions per attempt must be a positive number.")
+    return number
+
+def partial_import_message(report):
+    """Tells how far a failed question import got; earlier batches are already committed."""
+    if not report.imported:
+        return "No questions were imported."
+    return (f"{report.imported} questions up to line {report.committed_line} were imported; "
+            f"the rows from line {report.committed_line + 1} on were not. "
+            f"Fix the file and import only those rows.")
 # --- End of helper functions ---
 
 
 @admin_bp.route("/")
 @login_required # Only for authorized users (for demonstrating the admin panel)
+@query_budget(4)
 def dashboard():
     """
     Displays the administrator dashboard, showing a list of all quiz packs.
     """
-    quiz_packs = QuizPack.query.all()
-    return render_template("admin/dashboard.html", quiz_packs=quiz_packs)
+    pack_digest = pack_list_digest()
+
+    def render():
+        pack_cards = fragment_cache.get_or_render('admin.pack_cards', pack_digest, lambda: render_template(
+            "partials/admin_pack_cards.html", quiz_packs=QuizPack.query.order_by(QuizPack.id).all()))
+        export_packs = db.session.query(QuizPack.id, QuizPack.title).order_by(QuizPack.title).all() # Results export form
+        return render_template("admin/dashboard.html", pack_cards=pack_cards, export_packs=export_packs)
+
+    return conditional_page((pack_digest,), render)
+
+@admin_bp.route("/cache_stats")
+@login_required
+@query_budget(1)
+def cache_stats():
+    """
+    Returns the counters of the in-process caches and queues as JSON.
+    """
+    return jsonify(pack_cache=pack_cache.stats(),
+                   attempt_store=attempt_store.stats(),
+                   submission_writer=submission_writer.stats(),
+                   user_cache=user_cache.stats(),
+                   fragment_cache=fragment_cache.stats(),
+                   leaderboards=leaderboards.stats())
+
+@admin_bp.route("/metrics")
+@query_budget(1)
+def metrics():
+    """
+    Request and SQL metrics in the Prometheus text format. Requires a login session,
+    or the METRICS_TOKEN as a bearer token so a scraper can read it.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    token_valid = bool(token) and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+    if not token_valid and not current_user.is_authenticated:
+        return current_app.login_manager.unauthorized()
+    return Response(request_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @admin_bp.route("/quiz/new", methods=['GET', 'POST'])
 @login_required
+@query_budget(3)
 def new_quiz_pack():
     """
     Allows an administrator to create a new quiz pack.
@@ -83,12 +154,22 @@ def new_quiz_pack():
                                    color=color, difficulty=difficulty,
                                    time_to_complete_minutes=time_to_complete_minutes_str)
 
+        try:
+            questions_per_attempt = parse_questions_per_attempt(request.form.get('questions_per_attempt'))
+        except ValueError:
+            flash("Questions per attempt must be a positive integer or empty.", "danger")
+            return render_template("admin/new_quiz_pack.html",
+                                   title=title, description=description,
+                                   color=color, difficulty=difficulty,
+                                   time_to_complete_minutes=time_to_complete_minutes_str)
+
         new_pack = QuizPack(
             title=title,
             description=description,
             color=color,
             difficulty=difficulty,
-            time_to_complete_minutes=time_to_complete_minutes
+            time_to_complete_minutes=time_to_complete_minutes,
+            questions_per_attempt=questions_per_attempt
         )
         db.session.add(new_pack)
         try:
@@ -103,8 +184,48 @@ def new_quiz_pack():
     # For GET request or on error if no redirect occurred
     return render_template("admin/new_quiz_pack.html")
 
+def question_page(quiz_id, after_id=0, search=''):
+    """
+    Returns one page of a pack's questions in id order, starting after the question
+    with id after_id (keyset pagination), and the id to continue from, or None on
+    the last page. The (quiz_pack_id) index returns rows in id order, so the cost of
+    a page does not depend on the size of the pack.
+    """
+    per_page = current_app.config.get('ADMIN_QUESTIONS_PER_PAGE', 50)
+    query = Question.query.filter(Question.quiz_pack_id == quiz_id, Question.id > after_id)
+    if search:
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(Question.question_text.ilike(f'%{escaped}%', escape='\\'))
+    questions = query.order_by(Question.id).limit(per_page + 1).all()
+    next_after_id = questions[per_page - 1].id if len(questions) > per_page else None
+    return questions[:per_page], next_after_id
+
+
+def render_add_question(quiz_pack, question_text="", image_url="", options=None, correct_answer=""):
+    """
+    Renders the add-question form with the requested page of the question list.
+    The page position comes from the 'after', 'pos' and 'q' query parameters.
+    """
+    after_id = request.args.get('after', 0, type=int)
+    position = max(request.args.get('pos', 0, type=int), 0) # Questions listed before this page
+    search = request.args.get('q', '').strip()
+    questions_in_pack, next_after_id = question_page(quiz_pack.id, after_id, search)
+    return render_template("admin/add_question.html",
+                           quiz_pack=quiz_pack,
+                           questions_in_pack=questions_in_pack,
+                           first_number=position + 1, # Number shown next to the first listed question
+                           next_after_id=next_after_id,
+                           next_position=position + len(questions_in_pack),
+                           is_first_page=after_id == 0,
+                           search=search,
+                           next_question_number=quiz_pack.question_count + 1, # Maintained counter, no COUNT query
+                           question_text=question_text, image_url=image_url,
+                           options=options or ["", "", "", ""], correct_answer=correct_answer)
+
+
 @admin_bp.route("/quiz/<int:quiz_id>/add_question", methods=['GET', 'POST'])
 @login_required
+@query_budget(4)
 def add_question(quiz_id):
     """
     Allows an administrator to add new questions to an existing quiz pack.
@@ -122,22 +243,14 @@ def add_question(quiz_id):
         if not all([question_text, correct_answer_letter] + options_list):
             flash("All required question and answer option fields must be filled.", "danger")
             # Return current values to the form on error
-            return render_template("admin/add_question.html",
-                                   quiz_pack=quiz_pack,
-                                   questions_in_pack=Question.query.filter_by(quiz_pack_id=quiz_id).all(),
-                                   next_question_number=Question.query.filter_by(quiz_pack_id=quiz_id).count() + 1,
-                                   question_text=question_text, image_url=image_url,
-                                   options=options_list, correct_answer=correct_answer_letter)
+            return render_add_question(quiz_pack, question_text=question_text, image_url=image_url,
+                                       options=options_list, correct_answer=correct_answer_letter)
 
         correct_answer_index = letter_to_index(correct_answer_letter)
         if correct_answer_index is None:
             flash("The correct answer must be one of the letters A, B, C, or D.", "danger")
-            return render_template("admin/add_question.html",
-                                   quiz_pack=quiz_pack,
-                                   questions_in_pack=Question.query.filter_by(quiz_pack_id=quiz_id).all(),
-                                   next_question_number=Question.query.filter_by(quiz_pack_id=quiz_id).count() + 1,
-                                   question_text=question_text, image_url=image_url,
-                                   options=options_list, correct_answer=correct_answer_letter)
+            return render_add_question(quiz_pack, question_text=question_text, image_url=image_url,
+                                       options=options_list, correct_answer=correct_answer_letter)
 
         new_question = Question(
             quiz_pack_id=quiz_id,
@@ -147,6 +260,7 @@ def add_question(quiz_id):
             correct_answer_index=correct_answer_index
         )
         db.session.add(new_question)
+        invalidate_pack(quiz_id, question_delta=1)
         try:
             db.session.commit()
             flash("Question successfully added!", "success")
@@ -155,22 +269,98 @@ def add_question(quiz_id):
             db.session.rollback()
             flash(f"Error adding question: {e}", "danger")
 
-    # For GET request:
-    questions_count = Question.query.filter_by(quiz_pack_id=quiz_id).count()
-    next_question_number = questions_count + 1 # Number for the next question
-    questions_in_pack = Question.query.filter_by(quiz_pack_id=quiz_id).all() # Questions in the current pack
+    # For GET request: empty form fields and the requested page of questions
+    return render_add_question(quiz_pack)
 
-    # Reset form values on GET request
-    return render_template("admin/add_question.html",
-                           quiz_pack=quiz_pack,
-                           questions_in_pack=questions_in_pack,
-                           next_question_number=next_question_number,
-                           question_text="", image_url="", # Empty values for form fields
-                           options=["", "", "", ""], correct_answer="") # Empty options
+
+@admin_bp.route("/quiz/<int:quiz_id>/import_questions", methods=['POST'])
+@login_required
+@query_budget(2, per_batch=2) # Each batch: the executemany INSERT and the pack counter UPDATE
+def import_quiz_questions(quiz_id):
+    """
+    Adds questions to a pack from an uploaded CSV or JSON Lines file.
+    The file is read as a stream and inserted in batches; invalid rows are reported.
+    """
+    quiz_pack = QuizPack.query.get_or_404(quiz_id)
+    upload = request.files.get('questions_file')
+    if not upload or not upload.filename:
+        flash("Please choose a CSV or JSON Lines file to import.", "danger")
+        return redirect(url_for('admin.add_question', quiz_id=quiz_id))
+
+    # utf-8-sig also accepts files saved with a byte order mark (e.g. by Excel)
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    report = QuestionImportReport() # Kept by the batches committed before a failure
+    try:
+        import_questions(quiz_pack.id, read_rows(stream, guess_format(upload.filename)), report=report)
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        flash(f"Could not read the file: {e}. {partial_import_message(report)}", "danger")
+        return redirect(url_for('admin.add_question', quiz_id=quiz_id))
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error importing questions: {e}. {partial_import_message(report)}", "danger")
+        return redirect(url_for('admin.add_question', quiz_id=quiz_id))
+
+    if report.imported:
+        flash(f"Imported {report.imported} questions.", "success")
+    if report.errors:
+        shown = "; ".join(f"line {line}: {message}" for line, message in report.errors[:10])
+        more = f" (and {len(report.errors) - 10} more)" if len(report.errors) > 10 else ""
+        flash(f"{len(report.errors)} rows were skipped - {shown}{more}", "danger")
+    return redirect(url_for('admin.add_question', quiz_id=quiz_id))
+
+
+@admin_bp.route("/quiz/<int:quiz_id>/export_questions.<file_format>")
+@login_required
+@query_budget(2)
+def export_quiz_questions(quiz_id, file_format):
+    """
+    Streams all questions of a pack as a CSV or JSON Lines download.
+    """
+    if file_format not in ('csv', 'jsonl'):
+        abort(404)
+    quiz_pack = QuizPack.query.get_or_404(quiz_id)
+    mimetype = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(export_questions(quiz_pack.id, file_format)),
+                    mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=quiz_pack_{quiz_pack.id}.{file_format}'})
+
+
+@admin_bp.route("/results/export")
+@login_required
+@query_budget(2) # The streamed rows are read after the view returns
+def export_quiz_results():
+    """
+    Streams quiz results (one row per attempt, with user and pack names) as a CSV or
+    JSON Lines download, optionally for one pack and a range of completion dates.
+    """
+    file_format = request.args.get('file_format', 'csv')
+    if file_format not in ('csv', 'jsonl'):
+        abort(404)
+    pack_id = request.args.get('pack_id', type=int)
+    if pack_id is not None:
+        QuizPack.query.get_or_404(pack_id)
+    try:
+        date_from = request.args.get('date_from') or None
+        date_to = request.args.get('date_to') or None
+        since = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+        # The end date is inclusive: everything before the start of the next day
+        until = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None
+    except ValueError:
+        flash("Dates must be given as YYYY-MM-DD.", "danger")
+        return redirect(url_for('admin.dashboard'))
+
+    filename = 'quiz_results' + (f'_pack_{pack_id}' if pack_id is not None else '')
+    filename += f'_{date_from or "start"}_{date_to or "now"}' if date_from or date_to else ''
+    mimetype = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(export_results(file_format, pack_id, since, until)),
+                    mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}.{file_format}'})
 
 
 @admin_bp.route("/quiz/<int:quiz_id>/edit", methods=['GET', 'POST'])
 @login_required
+@query_budget(6)
 def edit_quiz_pack(quiz_id):
     """
     Allows an administrator to edit an existing quiz pack.
@@ -204,12 +394,20 @@ def edit_quiz_pack(quiz_id):
             flash("Completion time must be an integer (in minutes).", "danger")
             return render_template("admin/edit_quiz_pack.html", quiz_pack=quiz_pack)
 
+        try:
+            questions_per_attempt = parse_questions_per_attempt(request.form.get('questions_per_attempt'))
+        except ValueError:
+            flash("Questions per attempt must be a positive integer or empty.", "danger")
+            return render_template("admin/edit_quiz_pack.html", quiz_pack=quiz_pack)
+
         # Update quiz pack fields
         quiz_pack.title = title
         quiz_pack.description = description
         quiz_pack.color = color
         quiz_pack.difficulty = difficulty
         quiz_pack.time_to_complete_minutes = time_to_complete_minutes
+        quiz_pack.questions_per_attempt = questions_per_attempt
+        invalidate_pack(quiz_pack.id)
 
         try:
             db.session.commit()
@@ -225,6 +423,7 @@ def edit_quiz_pack(quiz_id):
 
 @admin_bp.route("/question/<int:question_id>/edit", methods=['GET', 'POST'])
 @login_required
+@query_budget(6)
 def edit_question(question_id):
     """
     Allows an administrator to edit an existing question.
@@ -260,6 +459,7 @@ def edit_question(question_id):
         question.image_url = image_url
         question.options_json = json.dumps(options_list)
         question.correct_answer_index = correct_answer_index
+        invalidate_pack(quiz_pack.id)
         try:
             db.session.commit()
             flash("Question successfully updated!", "success")
@@ -286,6 +486,7 @@ def edit_question(question_id):
 
 @admin_bp.route("/question/<int:question_id>/delete", methods=['POST'])
 @login_required
+@query_budget(4)
 def delete_question(question_id):
     """
     Allows an administrator to delete a question by its ID.
@@ -295,6 +496,7 @@ def delete_question(question_id):
 
     try:
         db.session.delete(question)
+        invalidate_pack(quiz_pack_id, question_delta=-1)
         db.session.commit()
         flash("Question successfully deleted.", "success")
     except Exception as e:
@@ -306,6 +508,7 @@ def delete_question(question_id):
 
 @admin_bp.route("/quiz/<int:quiz_id>/delete", methods=['POST'])
 @login_required
+@query_budget(7)
 def delete_quiz_pack(quiz_id):
     """
     Allows an administrator to delete a quiz pack and all associated questions and statistics.
@@ -317,8 +520,11 @@ def delete_quiz_pack(quiz_id):
         # synchronize_session=False for more efficient bulk deletion
         Question.query.filter_by(quiz_pack_id=quiz_id).delete(synchronize_session=False)
         UserQuizStat.query.filter_by(quiz_pack_id=quiz_id).delete(synchronize_session=False)
+        UserPackSummary.query.filter_by(quiz_pack_id=quiz_id).delete(synchronize_session=False)
         db.session.delete(quiz_pack)
         db.session.commit()
+        pack_cache.invalidate(quiz_id)
+        leaderboards.invalidate(quiz_id)
         flash(f"Quiz pack '{quiz_pack.title}' and all associated questions/statistics successfully deleted.", "success")
     except Exception as e:
         db.session.rollback()
@@ -1,13 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
+from query_budget import query_budget
 from models import db, User # Import db and User from models
 from sqlalchemy import func
-from datetime import datetime
 
 # Create a Blueprint for authentication routes
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route("/register", methods=['GET', 'POST'])
+@query_budget(3)
 def register():
     """
     Handles the registration of new users.
@@ -58,6 +59,7 @@ def register():
     return render_template("register.html")
 
 @auth_bp.route("/login", methods=['GET', 'POST'])
+@query_budget(2) # Includes the transparent password rehash
 def login():
     """
     Handles user login to the system.
@@ -77,6 +79,14 @@ def login():
 
         # Check for user existence and correct password
         if user and user.check_password(password):
+            if user.password_needs_rehash():
+                # Transparently upgrade a legacy hash while we know the plain password
+                user.set_password(password)
+                try:
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error rehashing password for user {user.id}: {e}")
             login_user(user, remember=remember_me) # Log in the user with "remember me" option
             flash(f"Welcome, {user.name}!", "success")
             # Redirect to the next page if specified (e.g., after @login_required),
@@ -93,6 +103,7 @@ def login():
 
 @auth_bp.route("/logout")
 @login_required # Protect the route: logout is only available to authenticated users
+@query_budget(1)
 def logout():
     """
     Logs the user out of the system.
@@ -103,6 +114,7 @@ def logout():
 
 @auth_bp.route("/profile")
 @login_required # Protect the route: profile is only available to authenticated users
+@query_budget(3)
 def profile():
     """
     Displays the user profile page with their quiz completion statistics.
@@ -111,17 +123,21 @@ def profile():
 
     # Import models here to avoid potential circular dependencies,
     # if models.py imports auth_bp or has references that depend on it.
-    from models import UserQuizStat, QuizPack
+    from models import UserQuizStat, UserPackSummary, QuizPack, attempt_question_count
 
-    # --- Overall user statistics ---
-    # Query to get the sum of all questions and correct answers across all user quizzes
-    overall_stats = db.session.query(
-        func.sum(UserQuizStat.total_questions),
-        func.sum(UserQuizStat.score)
-    ).filter_by(user_id=user_id).first()
+    # The whole profile is built from two queries, regardless of how many
+    # attempts the user has made or how many packs exist.
+
+    # --- Query 1: per-pack summaries joined with pack titles and attempt sizes ---
+    summary_rows = db.session.query(
+        UserPackSummary, QuizPack.title, QuizPack.question_count, QuizPack.questions_per_attempt
+    ).join(QuizPack, QuizPack.id == UserPackSummary.quiz_pack_id).filter(
+        UserPackSummary.user_id == user_id
+    ).order_by(UserPackSummary.quiz_pack_id).all()
 
-    total_questions_answered = overall_stats[0] or 0 # Total number of questions answered
-    total_correct_answers = overall_stats[1] or 0 # Total number of correct answers
+    # --- Overall user statistics ---
+    total_questions_answered = sum(summary.questions_sum for summary, *_ in summary_rows) # Total number of questions answered
+    total_correct_answers = sum(summary.score_sum for summary, *_ in summary_rows) # Total number of correct answers
 
     overall_accuracy = 0.0
     if total_questions_answered > 0:
@@ -129,60 +145,35 @@ def profile():
 
     # --- Statistics by quiz pack ---
     pack_stats = {}
-    # Get all user quiz statistics entries, sorted by completion time
-    all_user_quiz_stats = UserQuizStat.query.filter_by(user_id=user_id).order_by(UserQuizStat.completed_at.asc()).all()
-
-    # Group statistics by quiz_pack_id
-    grouped_stats = {}
-    for stat_entry in all_user_quiz_stats:
-        if stat_entry.quiz_pack_id not in grouped_stats:
-            grouped_stats[stat_entry.quiz_pack_id] = {
-                'attempts': 0,
-                'best_score': 0,
-                'last_score': 0,
-                'latest_completed_at': datetime.min, # Initialize with minimum date
-                'pack_title': '' # Will be filled later
-            }
-
-        grouped_stats[stat_entry.quiz_pack_id]['attempts'] += 1 # Increment attempt count
-        grouped_stats[stat_entry.quiz_pack_id]['best_score'] = max(
-            grouped_stats[stat_entry.quiz_pack_id]['best_score'], stat_entry.score
-        ) # Update best score
-
-        # Update last score and completion time if the current entry is newer
-        if stat_entry.completed_at and stat_entry.completed_at > grouped_stats[stat_entry.quiz_pack_id]['latest_completed_at']:
-            grouped_stats[stat_entry.quiz_pack_id]['last_score'] = stat_entry.score
-            grouped_stats[stat_entry.quiz_pack_id]['latest_completed_at'] = stat_entry.completed_at
-
-    # Populate pack_stats with information about each quiz pack
-    for pack_id, stats in grouped_stats.items():
-        pack = QuizPack.query.get(pack_id)
-        if pack:
-            pack_stats[pack.id] = {
-                'pack_title': pack.title,
-                'attempts': stats['attempts'],
-                'best_score': stats['best_score'],
-                'last_score': stats['last_score'],
-                'total_questions_in_pack': len(pack.questions) # Number of questions in the pack
-            }
+    for summary, pack_title, question_count, questions_per_attempt in summary_rows:
+        pack_stats[summary.quiz_pack_id] = {
+            'pack_title': pack_title,
+            'attempts': summary.attempts,
+            'best_score': summary.best_score,
+            'last_score': summary.last_score,
+            'total_questions_in_pack': attempt_question_count(question_count, questions_per_attempt) # Questions per attempt
+        }
 
     # --- Additional metrics ---
-    total_quizzes_completed = UserQuizStat.query.filter_by(user_id=user_id).count() # Total number of quizzes completed
+    total_quizzes_completed = sum(summary.attempts for summary, *_ in summary_rows) # Total number of quizzes completed
 
-    # Check for achieving a "flawless quiz" (all answers correct, at least 5 questions)
-    has_flawless_quiz = db.session.query(UserQuizStat).filter(
+    # --- Query 2: both achievement checks as EXISTS subqueries in a single statement ---
+    # "Flawless quiz": all answers correct, at least 5 questions
+    flawless_quiz = db.session.query(UserQuizStat.id).filter(
         UserQuizStat.user_id == user_id,
         UserQuizStat.score == UserQuizStat.total_questions, # Score equals total number of questions
         UserQuizStat.total_questions >= 5 # At least 5 questions
-    ).first() is not None
-
-    # Check for achieving a "sharpshooter speed quiz" (fast and accurate quiz)
-    has_sharpshooter_speed_quiz = db.session.query(UserQuizStat).filter(
+    ).exists()
+    # "Sharpshooter speed quiz": fast and accurate quiz
+    sharpshooter_speed_quiz = db.session.query(UserQuizStat.id).filter(
         UserQuizStat.user_id == user_id,
         UserQuizStat.total_questions >= 5, # At least 5 questions
         UserQuizStat.avg_time_per_question <= 3.0, # Average time per question <= 3 seconds
         (UserQuizStat.score * 100.0 / UserQuizStat.total_questions) >= 80.0 # Accuracy >= 80%
-    ).first() is not None
+    ).exists()
+    has_flawless_quiz, has_sharpshooter_speed_quiz = db.session.query(
+        flawless_quiz, sharpshooter_speed_quiz
+    ).one()
 
     return render_template("profile.html",
                            total_questions=total_questions_answered,
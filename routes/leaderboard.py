@@ -0,0 +1,39 @@
+from flask import Blueprint, render_template
+from flask_login import login_required, current_user
+from query_budget import query_budget
+from models import db, QuizPack, User
+from leaderboard import leaderboards
+
+leaderboard_bp = Blueprint('leaderboard', __name__)
+
+
+@leaderboard_bp.route("/leaderboard")
+@leaderboard_bp.route("/leaderboard/<int:pack_id>")
+@login_required
+@query_budget(5)
+def leaderboard(pack_id=None):
+    """
+    Displays the top players of one quiz pack, or across all packs, and the current user's rank.
+    Rankings come from the in-process leaderboards, not from the quiz history.
+    """
+    quiz_pack = QuizPack.query.get_or_404(pack_id) if pack_id is not None else None
+    top_entries, user_rank, ranked_users = leaderboards.view(current_user.id, pack_id)
+
+    # Names of the listed players in one query
+    user_ids = [user_id for _, user_id, _, _ in top_entries]
+    names = dict(db.session.query(User.id, User.name).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+    entries = [{
+        'rank': rank,
+        'name': names.get(user_id, 'Unknown player'),
+        'score': score,
+        'avg_time': avg_time,
+        'is_current_user': user_id == current_user.id
+    } for rank, user_id, score, avg_time in top_entries]
+
+    packs = db.session.query(QuizPack.id, QuizPack.title).order_by(QuizPack.title).all() # For the board selector
+    return render_template("leaderboard.html",
+                           quiz_pack=quiz_pack,
+                           packs=packs,
+                           entries=entries,
+                           user_rank=user_rank,
+                           ranked_users=ranked_users)
@@ -1,20 +1,26 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
-from models import db, QuizPack, Question, User, UserQuizStat # Import all necessary models
+from query_budget import query_budget
+from models import db, QuizPack, Question, User, UserQuizStat, UserPackSummary # Import all necessary models
 from sqlalchemy import func
 from datetime import datetime
 import json # FIXED: Added json import as it is used for json.dumps
+from pack_cache import pack_cache, invalidate_pack
+from page_cache import fragment_cache, pack_list_digest, conditional_page
+from leaderboard import leaderboards
 
 packs_bp = Blueprint('packs', __name__)
 
 
 @packs_bp.route("/packs")
 @login_required
+@query_budget(4)
 def packs():
     """
     Displays a list of all available quiz packs and the current user's overall statistics.
+    The pack cards are rendered once per pack list version; only the statistics are per user.
     """
-    all_packs = QuizPack.query.all()
+    pack_digest = pack_list_digest()
     user_overall_stats = {
         'total_correct_answers': 0,
         'total_questions_answered': 0,
@@ -22,17 +28,27 @@ def packs():
     }
 
     # current_user is already available and is a User object from Flask-Login
-    # Get all user statistics
-    user_all_stats = UserQuizStat.query.filter_by(user_id=current_user.id).all()
-    user_overall_stats['total_correct_answers'] = sum(s.score for s in user_all_stats)
-    user_overall_stats['total_questions_answered'] = sum(s.total_questions for s in user_all_stats)
-    user_overall_stats['total_games_played'] = len(user_all_stats)
+    # Sum the user's per-pack summaries instead of scanning the full attempt history
+    totals = db.session.query(
+        func.sum(UserPackSummary.score_sum),
+        func.sum(UserPackSummary.questions_sum),
+        func.sum(UserPackSummary.attempts)
+    ).filter_by(user_id=current_user.id).first()
+    user_overall_stats['total_correct_answers'] = totals[0] or 0
+    user_overall_stats['total_questions_answered'] = totals[1] or 0
+    user_overall_stats['total_games_played'] = totals[2] or 0
 
-    return render_template("packs.html", packs=all_packs, user_stats=user_overall_stats)
+    def render():
+        pack_cards = fragment_cache.get_or_render('packs.pack_cards', pack_digest, lambda: render_template(
+            "partials/pack_cards.html", packs=QuizPack.query.order_by(QuizPack.id).all()))
+        return render_template("packs.html", pack_cards=pack_cards, user_stats=user_overall_stats)
+
+    return conditional_page((pack_digest, tuple(user_overall_stats.values())), render)
 
 
 @packs_bp.route("/create_pack", methods=['GET', 'POST'])
 @login_required
+@query_budget(4)
 def create_pack():
     """
     Allows a user (administrator) to create a new quiz pack.
@@ -69,6 +85,7 @@ def create_pack():
 
 @packs_bp.route("/edit_pack/<int:pack_id>", methods=['GET', 'POST'])
 @login_required
+@query_budget(6)
 def edit_pack(pack_id):
     """
     Allows a user (administrator) to edit an existing quiz pack.
@@ -87,6 +104,7 @@ def edit_pack(pack_id):
             questions = Question.query.filter_by(quiz_pack_id=pack.id).order_by(Question.id).all()
             return render_template('edit_pack.html', pack=pack, questions=questions)
 
+        invalidate_pack(pack.id)
         try:
             db.session.commit()
             flash('Pack successfully updated!', 'success')
@@ -104,6 +122,7 @@ def edit_pack(pack_id):
 
 @packs_bp.route("/delete_pack/<int:pack_id>", methods=['POST'])
 @login_required
+@query_budget(7)
 def delete_pack(pack_id):
     """
     Allows a user (administrator) to delete a quiz pack and associated data.
@@ -115,9 +134,12 @@ def delete_pack(pack_id):
         # Use synchronize_session=False for more efficient bulk deletion
         Question.query.filter_by(quiz_pack_id=pack.id).delete(synchronize_session=False)
         UserQuizStat.query.filter_by(quiz_pack_id=pack.id).delete(synchronize_session=False)
+        UserPackSummary.query.filter_by(quiz_pack_id=pack.id).delete(synchronize_session=False)
 
         db.session.delete(pack)
         db.session.commit()
+        pack_cache.invalidate(pack_id)
+        leaderboards.invalidate(pack_id)
         flash('Pack successfully deleted.', 'info')
     except Exception as e:
         db.session.rollback()
@@ -127,6 +149,7 @@ def delete_pack(pack_id):
 
 @packs_bp.route("/add_question/<int:pack_id>", methods=['GET', 'POST'])
 @login_required
+@query_budget(5)
 def add_question(pack_id):
     """
     Allows a user (administrator) to add a new question to a quiz pack.
@@ -162,6 +185,7 @@ def add_question(pack_id):
             correct_answer_index=correct_answer_index
         )
         db.session.add(new_question)
+        invalidate_pack(pack.id, question_delta=1)
         try:
             db.session.commit()
             flash('Question successfully added!', 'success')
@@ -179,6 +203,7 @@ def add_question(pack_id):
 
 @packs_bp.route("/edit_question/<int:question_id>", methods=['GET', 'POST'])
 @login_required
+@query_budget(6)
 def edit_question(question_id):
     """
     Allows a user (administrator) to edit an existing question.
@@ -209,6 +234,7 @@ def edit_question(question_id):
         question.question_text = question_text
         question.options_json = json.dumps(options_raw)
         question.correct_answer_index = correct_answer_index
+        invalidate_pack(pack.id)
         try:
             db.session.commit()
             flash('Question successfully updated!', 'success')
@@ -229,6 +255,7 @@ def edit_question(question_id):
 
 @packs_bp.route("/delete_question/<int:question_id>", methods=['POST'])
 @login_required
+@query_budget(6)
 def delete_question(question_id):
     """
     Allows a user (administrator) to delete a question.
@@ -238,6 +265,7 @@ def delete_question(question_id):
 
     try:
         db.session.delete(question)
+        invalidate_pack(pack.id, question_delta=-1)
         db.session.commit()
         flash('Question successfully deleted.', 'info')
     except Exception as e:
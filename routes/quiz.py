@@ -1,6 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, session, jsonify, request
+from flask import Blueprint, render_template, redirect, url_for, flash, session, jsonify, request, current_app
+from sqlalchemy.exc import IntegrityError
 from flask_login import login_required, current_user
-from models import db, QuizPack, Question, UserQuizStat # Import all necessary models
+from query_budget import query_budget
+from models import db, QuizPack, Question, UserQuizStat, UserPackSummary # Import all necessary models
+from pack_cache import pack_cache, sample_questions
+from attempt_store import attempt_store
+from stats import record_attempt
+from submission_queue import submission_writer
+from answers_codec import encode_answers, decode_answers
+from leaderboard import leaderboards
+from grading import grade_answers, average_time_per_question
+from offline_sync import issue_ticket, record_offline_attempts
 import json
 import random
 from datetime import datetime
@@ -9,66 +19,68 @@ from datetime import datetime
 quiz_bp = Blueprint('quiz', __name__)
 
 
-@quiz_bp.route("/static_url")
-def static_url_generator():
+def draw_questions(quiz_pack, compiled_pack):
     """
-    Provides a URL for a static file. Used for dynamic image loading.
-    Accepts a filename as a query parameter and returns JSON with the URL.
+    Picks the questions of one attempt and returns (questions, answer_key).
+    Questions and answer key come from the in-process pack cache, so the
+    question rows are loaded and parsed only once per pack version.
+    Packs with a questions-per-attempt limit are cached as an id list only, and each
+    attempt fetches just its randomly sampled rows, so large banks cost the same.
     """
-    filename = request.args.get('filename')
-    if filename:
-        return jsonify(url=url_for('static', filename=filename))
-    return jsonify(url=None) # Return None if filename is not provided
+    if quiz_pack.is_sampled:
+        return sample_questions(compiled_pack, quiz_pack.questions_per_attempt)
+    questions = list(compiled_pack.questions) # Copy, the cached tuple is shared
+    random.shuffle(questions)  # Shuffle questions so the order is different each time
+    return questions, compiled_pack.answer_key
+
+
+def refresh_leaderboards(pairs):
+    """
+    Updates the loaded leaderboards with (user_id, pack_id) pairs whose attempts were just
+    committed. The attempts are saved either way, so a failure is logged instead of being
+    reported to the user, and the affected boards are dropped so they reload from the database.
+    """
+    pairs = set(pairs)
+    try:
+        leaderboards.refresh(pairs)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error refreshing leaderboards: {e}")
+        for pack_id in {pack_id for _, pack_id in pairs}:
+            leaderboards.invalidate(pack_id)
 
 
 @quiz_bp.route("/quiz/<int:pack_id>")
 @login_required
+@query_budget(6) # Sampled packs read their ids and the drawn rows; two statements store the attempt
 def quiz(pack_id):
     """
     Initializes and displays the quiz page for the selected pack.
-    Retrieves questions, shuffles them, and stores them in the session for later validation.
+    Retrieves the compiled pack from the cache, shuffles (or samples) its questions,
+    and registers a server-side attempt holding the answer key for later validation.
     """
     quiz_pack = QuizPack.query.get_or_404(pack_id)
+    compiled_pack = pack_cache.get(pack_id, quiz_pack.version, index_only=quiz_pack.is_sampled)
 
-    # Explicitly get all questions for this pack from the database.
-    # This ensures we work with actual Question objects.
-    all_questions = Question.query.filter_by(quiz_pack_id=pack_id).all()
-
-    if not all_questions:
+    if not compiled_pack.question_ids:
         flash(f"The quiz '{quiz_pack.title}' currently has no questions.", "info")
         return redirect(url_for('packs.packs'))
 
-    # Convert Question objects into a list of dictionaries for easier JS handling and session storage.
-    # Include image_url.
-    all_questions_data = []
-    for q_obj in all_questions:
-        all_questions_data.append({
-            'id': q_obj.id,
-            'question': q_obj.question_text,
-            'options': q_obj.get_options(),  # Use the get_options() method to retrieve choices
-            'correct_answer': q_obj.correct_answer_index,
-            'image_url': q_obj.image_url if hasattr(q_obj, 'image_url') else None # Ensure image_url exists
-        })
+    all_questions_data, answer_key = draw_questions(quiz_pack, compiled_pack)
 
-    random.shuffle(all_questions_data)  # Shuffle questions so the order is different each time
-
-    # Store necessary question data (ID and correct answer) in the session.
-    # This allows us to validate user answers on the backend without sending correct answers to the frontend.
-    questions_map_for_session = {str(q['id']): {'correct_answer': q['correct_answer']} for q in all_questions_data}
-    session['current_quiz_questions_map'] = questions_map_for_session
-    session['current_quiz_pack_id'] = pack_id
+    # Keep the answer key on the server and put only the attempt token into the session.
+    # This allows us to validate user answers on the backend without sending correct answers
+    # to the frontend, and keeps the session cookie small regardless of the pack size.
+    # A restarted quiz replaces the previous attempt
+    session['quiz_attempt_token'] = attempt_store.create(current_user.id, pack_id, answer_key,
+                                                         replaces=session.pop('quiz_attempt_token', None))
     # Limit the quiz session's lifetime if the user is inactive.
     session.permanent = True
 
-    # For the frontend, we pass questions without the 'correct_answer' field.
+    # For the frontend, the cached questions already come without the 'correct_answer' field.
     js_data_for_template = {
         'pack_id': pack_id,
-        'questions': [{
-            'id': q['id'],
-            'question': q['question'],
-            'options': q['options'],
-            'image_url': q['image_url']
-        } for q in all_questions_data],
+        'questions': all_questions_data,
         'submit_url': url_for('quiz.submit_quiz'),
         'packs_url': url_for('packs.packs')
     }
@@ -85,6 +97,7 @@ def quiz(pack_id):
 
 @quiz_bp.route("/submit_quiz", methods=["POST"])
 @login_required
+@query_budget(8) # Includes the leaderboard refresh when boards are loaded
 def submit_quiz():
     """
     Handles the submission of quiz results by the user.
@@ -103,82 +116,144 @@ def submit_quiz():
     if not quiz_pack:
         return jsonify({"success": False, "message": "Quiz pack not found."}), 404
 
-    # Retrieve correct answers from the session and clear it
-    quiz_questions_map_from_session = session.pop('current_quiz_questions_map', None)
-    session.pop('current_quiz_pack_id', None)
+    # Retrieve the attempt started by quiz() and clear it, so it cannot be submitted twice
+    attempt = attempt_store.pop(session.pop('quiz_attempt_token', None))
 
-    if not quiz_questions_map_from_session:
-        # If session data is missing, it could be a resubmission attempt
-        # or session expiration.
+    if attempt is None or attempt.user_id != current_user.id:
+        # If the attempt is missing, it could be a resubmission attempt
+        # or the attempt has expired.
         return jsonify(
             {"success": False, "message": "Quiz data missing or expired in session. Please start the quiz again."}), 400
+    if attempt.pack_id != quiz_pack.id:
+        return jsonify({"success": False, "message": "Submitted answers do not belong to the started quiz."}), 400
+
+    answer_key = attempt.answer_key
+    score, results_for_stat_json = grade_answers(answer_key, user_answers_raw)
+
+    total_questions_in_pack = len(answer_key)
+    avg_time_per_question = average_time_per_question(total_time_taken, total_questions_in_pack)
+
+    stat_values = {
+        'user_id': current_user.id,
+        'quiz_pack_id': quiz_pack.id,
+        'score': score,
+        'total_questions': total_questions_in_pack,
+        'completed_at': datetime.utcnow(), # Use UTC time for consistency
+        'user_answers_data': encode_answers(results_for_stat_json), # Compact format, see answers_codec.py
+        'avg_time_per_question': avg_time_per_question
+    }
 
-    score = 0
-    results_for_stat_json = [] # List to save detailed results
-
-    for answer_entry in user_answers_raw:
-        question_id = str(answer_entry.get('questionId'))
-        selected_answer_index = answer_entry.get('selectedAnswerIndex')
-
-        if question_id in quiz_questions_map_from_session:
-            original_question_data = quiz_questions_map_from_session[question_id]
-            correct_answer_index = original_question_data['correct_answer']
-
-            is_correct = (selected_answer_index == correct_answer_index)
-            if is_correct:
-                score += 1
-
-            results_for_stat_json.append({
-                'question_id': int(question_id),
-                'user_answer_index': selected_answer_index,
-                'is_correct': is_correct,
-                'correct_answer_index': correct_answer_index # Added for log completeness
-            })
-        else:
-            # Log suspicious activity or question mismatch
-            print(f"Warning: Question with ID {question_id} not found in session data. Possible manipulation or error.")
-            results_for_stat_json.append({
-                'question_id': int(question_id) if question_id.isdigit() else None,
-                'user_answer_index': selected_answer_index,
-                'is_correct': False, # Consider incorrect if question not from session
-                'correct_answer_index': -1 # Unknown
-            })
-
-
-    total_questions_in_pack = len(quiz_questions_map_from_session)
-
-    avg_time_per_question = None
-    if total_questions_in_pack > 0 and total_time_taken is not None:
-        # Convert milliseconds to seconds for avg_time_per_question
-        avg_time_per_question = (total_time_taken / 1000) / total_questions_in_pack
-
-    new_user_quiz_stat = UserQuizStat(
-        user_id=current_user.id,
-        quiz_pack_id=pack_id,
-        score=score,
-        total_questions=total_questions_in_pack,
-        completed_at=datetime.utcnow(), # Use UTC time for consistency
-        user_answers_data=json.dumps(results_for_stat_json),
-        avg_time_per_question=avg_time_per_question
-    )
-    db.session.add(new_user_quiz_stat)
-
-    try:
-        db.session.commit()
+    # In write-behind mode the attempt is committed by a background writer in a batch with
+    # other submissions; the client gets a results URL that waits for that commit.
+    submission_token = submission_writer.enqueue(current_user.id, stat_values)
+    if submission_token is not None:
         flash("Quiz results successfully submitted!", "success")
         return jsonify({
             "success": True,
-            "redirect_url": url_for('quiz.quiz_results', pack_id=pack_id, quiz_stat_id=new_user_quiz_stat.id)
+            "redirect_url": url_for('quiz.pending_quiz_results', token=submission_token)
         })
+
+    # Write-behind disabled or its queue is full: write synchronously
+    new_user_quiz_stat = UserQuizStat(**stat_values)
+    record_attempt(new_user_quiz_stat) # Also updates the user's pack summary in the same transaction
+
+    try:
+        db.session.commit()
+        quiz_stat_id = new_user_quiz_stat.id
     except Exception as e:
         db.session.rollback()
         # Log the actual error for debugging
         print(f"Error saving quiz results: {e}")
         return jsonify({"success": False, "message": "An error occurred while submitting quiz results. Please try again."}), 500
 
+    refresh_leaderboards([(current_user.id, quiz_pack.id)]) # After the commit, never fails the request
+    flash("Quiz results successfully submitted!", "success")
+    return jsonify({
+        "success": True,
+        "redirect_url": url_for('quiz.quiz_results', pack_id=pack_id, quiz_stat_id=quiz_stat_id)
+    })
+
+
+@quiz_bp.route("/quiz/<int:pack_id>/offline")
+@login_required
+@query_budget(3)
+def offline_quiz(pack_id):
+    """
+    Returns one attempt of a quiz as JSON for offline play: the questions without
+    correct answers and a signed ticket, which is uploaded with the answers through
+    submit_quiz_batch. Nothing is kept in the session or on the server.
+    """
+    quiz_pack = QuizPack.query.get_or_404(pack_id)
+    compiled_pack = pack_cache.get(pack_id, quiz_pack.version, index_only=quiz_pack.is_sampled)
+    if not compiled_pack.question_ids:
+        return jsonify({"success": False, "message": f"The quiz '{quiz_pack.title}' currently has no questions."}), 404
+
+    questions, _ = draw_questions(quiz_pack, compiled_pack)
+    return jsonify({
+        "success": True,
+        "pack_id": pack_id,
+        "title": quiz_pack.title,
+        "questions": questions,
+        "ticket": issue_ticket(current_user.id, pack_id, [question['id'] for question in questions]),
+        "submit_url": url_for('quiz.submit_quiz_batch')
+    })
+
+
+@quiz_bp.route("/submit_quiz/batch", methods=["POST"])
+@login_required
+@query_budget(10) # Independent of the number of attempts
+def submit_quiz_batch():
+    """
+    Records many quiz attempts played offline in one request, e.g. when a classroom
+    device syncs. Expects {"attempts": [{"ticket", "answers", "totalTimeTaken", "completedAt"}, ...]}
+    and answers with one result per attempt, in the same order. All accepted attempts
+    are written in one transaction; uploading the same ticket again is reported, not recorded twice.
+    """
+    data = request.get_json(silent=True)
+    attempts = data.get("attempts") if isinstance(data, dict) else None
+    if not isinstance(attempts, list) or not attempts:
+        return jsonify({"success": False, "message": "Invalid batch data."}), 400
+
+    max_attempts = current_app.config.get('OFFLINE_SYNC_MAX_ATTEMPTS', 500)
+    if len(attempts) > max_attempts:
+        return jsonify({"success": False, "message": f"At most {max_attempts} attempts can be uploaded at once."}), 413
+
+    try:
+        results, new_stats = record_offline_attempts(
+            attempts, current_app.config.get('OFFLINE_TICKET_MAX_AGE_SECONDS', 14 * 24 * 60 * 60))
+        db.session.commit()
+    except IntegrityError:
+        # The same ticket was recorded by a concurrent upload; a retry reports it as already recorded
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Some attempts were uploaded twice at the same time. Please sync again."}), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error saving a batch of {len(attempts)} offline quiz results: {e}")
+        return jsonify({"success": False, "message": "An error occurred while submitting quiz results. Please try again."}), 500
+
+    refresh_leaderboards((stat.user_id, stat.quiz_pack_id) for stat in new_stats) # Never fails the request
+    return jsonify({"success": True, "recorded": len(new_stats), "results": results})
+
+
+@quiz_bp.route("/quiz_results/pending/<token>")
+@login_required
+@query_budget(3)
+def pending_quiz_results(token):
+    """
+    Results URL handed out in write-behind mode: waits until the background writer
+    has committed the attempt, then redirects to its regular results page.
+    """
+    quiz_stat_id = submission_writer.wait(token, current_user.id)
+    if quiz_stat_id is None:
+        flash("Your quiz results could not be found. Please try the quiz again.", "danger")
+        return redirect(url_for('packs.packs'))
+    quiz_stat = db.session.get(UserQuizStat, quiz_stat_id)
+    return redirect(url_for('quiz.quiz_results', pack_id=quiz_stat.quiz_pack_id, quiz_stat_id=quiz_stat_id))
+
 
 @quiz_bp.route("/quiz_results/<int:pack_id>/<int:quiz_stat_id>")
 @login_required
+@query_budget(5)
 def quiz_results(pack_id, quiz_stat_id):
     """
     Displays detailed results of a specific quiz attempt by the user.
@@ -192,10 +267,12 @@ def quiz_results(pack_id, quiz_stat_id):
 
     results_data = []
     if current_quiz_stat.user_answers_data:
-        saved_results = json.loads(current_quiz_stat.user_answers_data)
+        saved_results = decode_answers(current_quiz_stat.user_answers_data) # Compact or legacy JSON
 
-        # Get all pack questions in one query for efficiency
-        all_pack_questions = {str(q.id): q for q in Question.query.filter_by(quiz_pack_id=pack_id).all()}
+        # Get the answered questions in one query; the attempt may cover only part of the pack
+        answered_ids = [q_data['question_id'] for q_data in saved_results if q_data['question_id'] is not None]
+        all_pack_questions = {str(q.id): q for q in Question.query.filter(
+            Question.quiz_pack_id == pack_id, Question.id.in_(answered_ids)).all()}
 
         for q_data in saved_results:
             question_id = str(q_data['question_id'])
@@ -225,22 +302,14 @@ def quiz_results(pack_id, quiz_stat_id):
                     'correct_answer_index': -1 # Unknown
                 })
 
-    # Get all user statistics for this pack to calculate overall metrics
-    all_attempts_for_pack = UserQuizStat.query.filter_by(
-        user_id=current_user.id, quiz_pack_id=pack_id
-    ).all()
-
-    total_attempts = len(all_attempts_for_pack)
-    best_score = 0
-    total_scores_sum = 0
-    total_possible_questions = len(quiz_pack.questions) # Total number of questions in the pack
+    # Overall metrics for this pack come from the maintained summary row
+    summary = db.session.get(UserPackSummary, (current_user.id, pack_id))
 
-    for attempt in all_attempts_for_pack:
-        if attempt.score > best_score:
-            best_score = attempt.score
-        total_scores_sum += attempt.score
+    total_attempts = summary.attempts if summary else 0
+    best_score = summary.best_score if summary else 0
+    total_possible_questions = quiz_pack.attempt_question_count # Number of questions in one attempt
 
-    average_score = (total_scores_sum / total_attempts) if total_attempts > 0 else 0
+    average_score = (summary.score_sum / total_attempts) if total_attempts > 0 else 0
 
     pack_stats = {
         'total_attempts': total_attempts,
@@ -0,0 +1,101 @@
+# Synthetic data for the test suite (tests/conftest.py) and the benchmarks (benchmarks/),
+# so both run against the same data model
+
+# --- Standard Library Imports ---
+from datetime import datetime, timedelta
+import json
+import random
+
+# --- Project File Imports ---
+from models import db, User, QuizPack, Question, UserQuizStat
+from answers_codec import encode_answers
+from leaderboard import leaderboards
+from pack_cache import pack_cache
+from page_cache import fragment_cache
+from passwords import password_hasher
+from stats import rebuild_pack_summaries, rebuild_question_counters
+from user_cache import user_cache
+
+# Password of every seeded user; user n has the email returned by seed_email(n)
+PASSWORD = 'secret'
+
+
+def seed_email(user_id):
+    return f'user{user_id}@seed.local'
+
+
+def question_id(pack_id, question, questions_per_pack):
+    """Id of the question'th (0-based) question of a pack."""
+    return (pack_id - 1) * questions_per_pack + question + 1
+
+
+def correct_answer(question):
+    """Correct option of the question'th (0-based) question of every pack."""
+    return question % 4
+
+
+def clear_caches():
+    """Empties every in-process cache, so the next request starts cold."""
+    pack_cache.clear()
+    user_cache.clear()
+    fragment_cache.clear()
+    leaderboards.clear()
+
+
+def seed_database(users=1, packs=1, questions_per_pack=6, attempts_per_user=0):
+    """
+    Recreates all tables and fills them with synthetic data using bulk inserts.
+    Question ids and correct answers follow question_id() and correct_answer(); every
+    fourth question has an image. Attempt a of a user is on pack a % packs + 1, with
+    about 60% correct answers, and the summaries and answer counters are rebuilt.
+    Must run inside an application context.
+    """
+    db.drop_all()
+    db.create_all()
+    rng = random.Random(42)
+    password_hash = password_hasher.hash(PASSWORD) # One hash shared by all users
+
+    if users:
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'user{i}', 'email': seed_email(i), 'password_hash': password_hash,
+             'registered_at': datetime.utcnow()}
+            for i in range(1, users + 1)
+        ])
+    if packs:
+        db.session.execute(QuizPack.__table__.insert(), [
+            {'title': f'Pack {p}', 'description': f'Seeded pack {p}', 'color': 'blue', 'difficulty': 'Easy',
+             'time_to_complete_minutes': 10, 'version': 1, 'question_count': questions_per_pack}
+            for p in range(1, packs + 1)
+        ])
+    if packs and questions_per_pack:
+        db.session.execute(Question.__table__.insert(), [
+            {'quiz_pack_id': p, 'question_text': f'Question {q} of pack {p}?',
+             'options_json': json.dumps([f'Option {o}' for o in range(4)]), 'correct_answer_index': correct_answer(q),
+             'image_url': f'/static/img/seed/{p}_{q}.webp' if q % 4 == 0 else None}
+            for p in range(1, packs + 1) for q in range(questions_per_pack)
+        ])
+
+    # Attempts store the per-question answers like submit_quiz does, one INSERT per user
+    started = datetime.utcnow() - timedelta(days=365)
+    for u in range(1, users + 1):
+        stat_rows = []
+        for a in range(attempts_per_user if packs else 0):
+            p = a % packs + 1
+            answers = []
+            for q in range(questions_per_pack):
+                correct = correct_answer(q)
+                selected = correct if rng.random() < 0.6 else (correct + 1 + rng.randrange(3)) % 4
+                answers.append({'question_id': question_id(p, q, questions_per_pack), 'user_answer_index': selected,
+                                'is_correct': selected == correct, 'correct_answer_index': correct})
+            stat_rows.append({
+                'user_id': u, 'quiz_pack_id': p, 'score': sum(answer['is_correct'] for answer in answers),
+                'total_questions': questions_per_pack,
+                'completed_at': started + timedelta(minutes=u * attempts_per_user + a),
+                'user_answers_data': encode_answers(answers), 'avg_time_per_question': rng.uniform(1.0, 20.0)
+            })
+        if stat_rows:
+            db.session.execute(UserQuizStat.__table__.insert(), stat_rows)
+    rebuild_pack_summaries()
+    rebuild_question_counters()
+    db.session.commit()
+    clear_caches()
@@ -22,6 +22,21 @@ document.addEventListener("DOMContentLoaded", () => {
     const progressPercentageSpan = document.getElementById("progress-percentage");
     const progressBarFill = document.querySelector(".progress-bar .progress-fill");
 
+    const PRELOAD_AHEAD = 3; // How many upcoming question images to fetch in advance
+    const preloadedImages = {}; // url -> Image, keeps the requests alive until they finish
+
+    function preloadImages(fromIndex) {
+        const toIndex = Math.min(fromIndex + PRELOAD_AHEAD, questions.length);
+        for (let i = fromIndex; i < toIndex; i++) {
+            const url = questions[i].image_url;
+            if (url && !preloadedImages[url]) {
+                const img = new Image();
+                img.src = url;
+                preloadedImages[url] = img;
+            }
+        }
+    }
+
     function renderQuestion() {
         if (currentQuestionIndex >= questions.length) {
             showResults();
@@ -32,27 +47,18 @@ document.addEventListener("DOMContentLoaded", () => {
         questionTextElement.textContent = currentQuestion.question;
 
         // --- Add logic for displaying the image ---
+        // image_url is already the final, cache-busted URL resolved by the server
         questionImageContainer.innerHTML = ""; // Clear previous image
         if (currentQuestion.image_url) {
             const img = document.createElement("img");
-            const cleanImageUrl = currentQuestion.image_url.startsWith('/static/') ?
-                                  currentQuestion.image_url.substring(7) :
-                                  currentQuestion.image_url;
-
-            fetch(`/static_url?filename=${encodeURIComponent(cleanImageUrl)}`)
-                .then(response => response.json())
-                .then(data => {
-                    if (data.url) {
-                        img.src = data.url;
-                        img.alt = "Question image";
-                        img.style.maxWidth = "100%";
-                        img.style.height = "auto";
-                        img.style.maxHeight = "300px";
-                        questionImageContainer.appendChild(img);
-                    }
-                })
-                .catch(error => console.error("Error fetching image URL:", error));
+            img.src = currentQuestion.image_url;
+            img.alt = "Question image";
+            img.style.maxWidth = "100%";
+            img.style.height = "auto";
+            img.style.maxHeight = "300px";
+            questionImageContainer.appendChild(img);
         }
+        preloadImages(currentQuestionIndex + 1);
         // --- End logic for displaying the image ---
 
         answersContainer.innerHTML = "";
@@ -0,0 +1,192 @@
+# --- Third-Party Library Imports ---
+from sqlalchemy import func, select, update, case, literal, bindparam
+from sqlalchemy.dialects.sqlite import insert
+
+# --- Project File Imports ---
+from models import db, Question, UserQuizStat, UserPackSummary
+from answers_codec import decode_answers
+
+OPTION_COUNT = 4 # Options per question, one picks_<n> counter each
+
+
+def record_attempt(stat):
+    """
+    Adds a finished quiz attempt to the session and folds it into the user's
+    pack summary. Both writes belong to the caller's transaction.
+    """
+    record_attempts([stat])
+
+
+def record_attempts(stats):
+    """
+    Batch version of record_attempt: the attempts are inserted together, and all
+    summary updates and all per-question counter updates are sent as one executemany each.
+    """
+    db.session.add_all(stats)
+    fold_attempts(stats)
+
+
+def fold_attempts(stats):
+    """
+    Adds attempts to the users' pack summaries and to the per-question counters.
+    Part of record_attempts; called directly by bulk paths that insert the
+    UserQuizStat rows themselves (the objects are then only read, never added).
+    """
+    db.session.execute(_summary_upsert(), [_summary_params(stat) for stat in stats])
+    counter_params = _question_counter_params(_count_answers(stat.user_answers_data for stat in stats))
+    if counter_params:
+        db.session.execute(_question_counter_update(), counter_params)
+
+
+def _summary_params(stat):
+    return {
+        'user_id': stat.user_id,
+        'quiz_pack_id': stat.quiz_pack_id,
+        'attempts': 1,
+        'best_score': stat.score or 0,
+        'last_score': stat.score or 0,
+        'score_sum': stat.score or 0,
+        'questions_sum': stat.total_questions or 0,
+        'latest_completed_at': stat.completed_at,
+        'best_avg_time': stat.avg_time_per_question
+    }
+
+
+def _summary_upsert():
+    """
+    Builds an INSERT .. ON CONFLICT DO UPDATE statement that adds one attempt
+    to a summary row atomically, so concurrent submissions cannot lose updates.
+    """
+    table = UserPackSummary.__table__
+    stmt = insert(table)
+    excluded = stmt.excluded
+    is_newer = (table.c.latest_completed_at.is_(None)) | (excluded.latest_completed_at >= table.c.latest_completed_at)
+    # Fastest time among the attempts with the best score; SQLite's min() returns NULL if either side is NULL
+    faster_avg_time = case(
+        (table.c.best_avg_time.is_(None), excluded.best_avg_time),
+        (excluded.best_avg_time.is_(None), table.c.best_avg_time),
+        else_=func.min(table.c.best_avg_time, excluded.best_avg_time)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.quiz_pack_id],
+        set_={
+            'attempts': table.c.attempts + excluded.attempts,
+            'best_score': func.max(table.c.best_score, excluded.best_score),
+            'last_score': case((is_newer, excluded.last_score), else_=table.c.last_score),
+            'score_sum': table.c.score_sum + excluded.score_sum,
+            'questions_sum': table.c.questions_sum + excluded.questions_sum,
+            'latest_completed_at': case((is_newer, excluded.latest_completed_at), else_=table.c.latest_completed_at),
+            'best_avg_time': case(
+                (excluded.best_score > table.c.best_score, excluded.best_avg_time),
+                (excluded.best_score == table.c.best_score, faster_avg_time),
+                else_=table.c.best_avg_time
+            )
+        }
+    )
+
+
+def rebuild_pack_summaries():
+    """
+    Recomputes the whole UserPackSummary table from UserQuizStat history.
+    Returns the number of summary rows written. The caller commits.
+    """
+    table = UserPackSummary.__table__
+    stats = UserQuizStat.__table__
+
+    db.session.execute(table.delete())
+    grouped = select(
+        stats.c.user_id,
+        stats.c.quiz_pack_id,
+        func.count(stats.c.id),
+        func.max(func.coalesce(stats.c.score, 0)),
+        literal(0),
+        func.sum(func.coalesce(stats.c.score, 0)),
+        func.sum(func.coalesce(stats.c.total_questions, 0)),
+        func.max(stats.c.completed_at)
+    ).group_by(stats.c.user_id, stats.c.quiz_pack_id)
+    result = db.session.execute(table.insert().from_select(
+        ['user_id', 'quiz_pack_id', 'attempts', 'best_score', 'last_score',
+         'score_sum', 'questions_sum', 'latest_completed_at'],
+        grouped
+    ))
+
+    # The score of the most recent attempt cannot be expressed as a plain aggregate
+    latest_score = select(func.coalesce(stats.c.score, 0)).where(
+        stats.c.user_id == table.c.user_id,
+        stats.c.quiz_pack_id == table.c.quiz_pack_id
+    ).order_by(stats.c.completed_at.desc(), stats.c.id.desc()).limit(1).scalar_subquery()
+    # Leaderboard tie-break: the fastest attempt among those with the best score
+    best_avg_time = select(func.min(stats.c.avg_time_per_question)).where(
+        stats.c.user_id == table.c.user_id,
+        stats.c.quiz_pack_id == table.c.quiz_pack_id,
+        func.coalesce(stats.c.score, 0) == table.c.best_score
+    ).scalar_subquery()
+    db.session.execute(update(table).values(last_score=latest_score, best_avg_time=best_avg_time))
+    return result.rowcount
+
+
+# --- Per-question counters ---
+
+def _count_answers(answers_data):
+    """
+    Tallies encoded answer lists (UserQuizStat.user_answers_data values) into
+    {question_id: [shown, correct, picks_0, ..., picks_3]}.
+    Answers to questions outside the attempt's answer key (stored with correct_answer_index
+    -1 by grading.grade_answers) are skipped: their question id came from the client.
+    """
+    counts = {}
+    for data in answers_data:
+        for answer in decode_answers(data):
+            question_id = answer.get('question_id')
+            correct_answer_index = answer.get('correct_answer_index')
+            if question_id is None or correct_answer_index is None or correct_answer_index == -1:
+                continue
+            counters = counts.setdefault(question_id, [0] * (2 + OPTION_COUNT))
+            counters[0] += 1
+            if answer.get('is_correct'):
+                counters[1] += 1
+            selected = answer.get('user_answer_index')
+            if isinstance(selected, int) and 0 <= selected < OPTION_COUNT:
+                counters[2 + selected] += 1
+    return counts
+
+
+def _question_counter_params(counts):
+    return [
+        dict(b_question_id=question_id, b_shown=counters[0], b_correct=counters[1],
+             **{f'b_picks_{n}': counters[2 + n] for n in range(OPTION_COUNT)})
+        for question_id, counters in counts.items()
+    ]
+
+
+def _question_counter_update():
+    """UPDATE that adds one set of counter deltas to a question, for executemany."""
+    table = Question.__table__
+    values = {
+        'times_shown': table.c.times_shown + bindparam('b_shown'),
+        'times_correct': table.c.times_correct + bindparam('b_correct')
+    }
+    for n in range(OPTION_COUNT):
+        values[f'picks_{n}'] = table.c[f'picks_{n}'] + bindparam(f'b_picks_{n}')
+    return update(table).where(table.c.id == bindparam('b_question_id')).values(values)
+
+
+def rebuild_question_counters(connection=None, chunk_size=1000):
+    """
+    Recomputes every question's answer counters from the quiz history in a single
+    streaming pass over UserQuizStat (chunk_size rows in memory at a time).
+    Runs on the given connection (used by the migration) or the session.
+    Returns the number of questions with answers. The caller commits.
+    """
+    executor = connection if connection is not None else db.session
+    table = Question.__table__
+    executor.execute(update(table).values(
+        times_shown=0, times_correct=0, **{f'picks_{n}': 0 for n in range(OPTION_COUNT)}))
+
+    history = executor.execute(
+        select(UserQuizStat.__table__.c.user_answers_data).execution_options(yield_per=chunk_size))
+    counts = _count_answers(data for (data,) in history)
+    counter_params = _question_counter_params(counts)
+    if counter_params:
+        executor.execute(_question_counter_update(), counter_params)
+    return len(counter_params)
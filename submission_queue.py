@@ -0,0 +1,217 @@
+# --- Standard Library Imports ---
+from collections import OrderedDict
+import atexit
+import queue
+import secrets
+import threading
+import time
+
+# --- Project File Imports ---
+from models import db, UserQuizStat
+from stats import record_attempts
+from leaderboard import leaderboards
+
+
+class PendingSubmission:
+    """A graded quiz attempt waiting in the write-behind queue."""
+    __slots__ = ('token', 'user_id', 'stat_values', 'done', 'stat_id', 'error')
+
+    def __init__(self, token, user_id, stat_values):
+        self.token = token
+        self.user_id = user_id
+        self.stat_values = stat_values # Keyword arguments for UserQuizStat
+        self.done = threading.Event()
+        self.stat_id = None # Set once the row is committed
+        self.error = None
+
+
+class SubmissionWriter:
+    """
+    Optional write-behind mode for quiz submissions. Graded attempts are queued
+    in memory and a background thread inserts them in batches, one transaction
+    (and one fsync) per batch instead of one per submission.
+
+    A batch is written as soon as it is full or SUBMISSION_FLUSH_INTERVAL_MS after
+    its first attempt arrived. When the queue is full, enqueue() returns None and the
+    caller writes synchronously. The queue is drained when the process exits.
+    Pending tokens live in this process only, so the mode is meant for a single
+    (multi-threaded) application process.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 0.2
+        self.wait_timeout = 10.0
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._pending = {} # token -> PendingSubmission, until it is written
+        self._finished = OrderedDict() # Recently written submissions, for late result lookups
+        self._finished_limit = 10000
+        self._lock = threading.Lock()
+        self.batches_written = 0
+        self.submissions_written = 0
+        self.queue_full_fallbacks = 0
+
+    def init_app(self, app):
+        """Reads the write-behind settings from the application config."""
+        self._app = app
+        self.enabled = app.config.get('SUBMISSION_WRITE_BEHIND', False)
+        self.batch_size = app.config.get('SUBMISSION_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('SUBMISSION_FLUSH_INTERVAL_MS', 200) / 1000
+        self.wait_timeout = app.config.get('SUBMISSION_WAIT_TIMEOUT_SECONDS', self.wait_timeout)
+        self._queue = queue.Queue(maxsize=app.config.get('SUBMISSION_QUEUE_SIZE', 5000))
+        if self.enabled:
+            atexit.register(self.shutdown)
+
+    def enqueue(self, user_id, stat_values):
+        """
+        Queues a graded attempt and returns its token.
+        Returns None if write-behind is disabled or the queue is full:
+        the caller must then write the attempt itself.
+        """
+        if not self.enabled:
+            return None
+        self._ensure_thread()
+        submission = PendingSubmission(secrets.token_urlsafe(16), user_id, stat_values)
+        with self._lock:
+            self._pending[submission.token] = submission
+        try:
+            self._queue.put_nowait(submission)
+        except queue.Full:
+            with self._lock:
+                del self._pending[submission.token]
+                self.queue_full_fallbacks += 1
+            return None
+        return submission.token
+
+    def wait(self, token, user_id):
+        """
+        Waits until the attempt with the given token is committed and returns its
+        UserQuizStat id, or None if the token is unknown, belongs to another user,
+        or writing failed.
+        """
+        with self._lock:
+            submission = self._pending.get(token) or self._finished.get(token)
+        if submission is None or submission.user_id != user_id:
+            return None
+        if not submission.done.wait(self.wait_timeout):
+            return None
+        return submission.stat_id
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='submission-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None: # Shutdown sentinel
+                stopping = True
+                batch = []
+            else:
+                batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            # Collect more attempts until the batch is full or the flush deadline passes;
+            # when stopping, drain whatever is left without waiting
+            while len(batch) < self.batch_size:
+                timeout = 0 if stopping else deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    continue
+                batch.append(item)
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Never let one batch stop the thread: later submissions would wait in vain
+                print(f"Error in the submission writer while handling a batch of {len(batch)} quiz results: {e}")
+                for submission in batch:
+                    if submission.stat_id is None and submission.error is None:
+                        submission.error = str(e)
+            finally:
+                self._finish_batch(batch)
+
+    def _write_batch(self, batch):
+        """Commits the batch and sets the stat_id of every attempt that was written."""
+        with self._app.app_context():
+            try:
+                stats = [UserQuizStat(**submission.stat_values) for submission in batch]
+                record_attempts(stats) # One transaction for the whole batch
+                db.session.flush()
+                stat_ids = [stat.id for stat in stats]
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error writing a batch of {len(batch)} quiz results, retrying one by one: {e}")
+                stat_ids = self._write_one_by_one(batch)
+            for submission, stat_id in zip(batch, stat_ids):
+                submission.stat_id = stat_id
+            leaderboards.refresh((submission.user_id, submission.stat_values['quiz_pack_id'])
+                                 for submission in batch if submission.stat_id is not None)
+
+    def _finish_batch(self, batch):
+        """Moves the batch from pending to finished and releases everyone waiting for it."""
+        with self._lock:
+            self.batches_written += 1
+            self.submissions_written += sum(1 for submission in batch if submission.stat_id is not None)
+            for submission in batch:
+                self._pending.pop(submission.token, None)
+                self._finished[submission.token] = submission
+            while len(self._finished) > self._finished_limit:
+                self._finished.popitem(last=False)
+        for submission in batch:
+            submission.done.set()
+
+    def _write_one_by_one(self, batch):
+        """Fallback for a failed batch, so one bad attempt does not lose the others."""
+        stat_ids = []
+        for submission in batch:
+            try:
+                stat = UserQuizStat(**submission.stat_values)
+                record_attempts([stat])
+                db.session.flush()
+                stat_id = stat.id
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                submission.error = str(e)
+                print(f"Error saving quiz results: {e}")
+                stat_id = None
+            stat_ids.append(stat_id)
+        return stat_ids
+
+    def shutdown(self, timeout=30):
+        """Writes every queued attempt and stops the background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Returns queue counters for monitoring."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'pending': len(self._pending),
+                'batches_written': self.batches_written,
+                'submissions_written': self.submissions_written,
+                'queue_full_fallbacks': self.queue_full_fallbacks
+            }
+
+
+# Shared writer instance, configured in app.py
+submission_writer = SubmissionWriter()
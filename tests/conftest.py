@@ -0,0 +1,126 @@
+"""
+Shared fixtures of the test suite.
+
+The application is imported once, bound to a throwaway SQLite database file and
+the production engine profile; every test starts from empty tables and caches.
+Run the suite from the project folder with `python -m pytest`.
+"""
+# --- Standard Library Imports ---
+import atexit
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+# The database and settings must be chosen before the application is imported
+_db_dir = tempfile.mkdtemp(prefix='quiz_tests_')
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['DB_ENGINE_PROFILE'] = 'production'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000' # Cheap hashes keep the suite fast
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ.pop('SUBMISSION_WRITE_BEHIND', None)
+os.environ.pop('QUERY_BUDGET_MODE', None) # Budgets are enforced ('raise') under TESTING
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- Third-Party Library Imports ---
+import pytest
+from sqlalchemy import event
+
+# --- Project File Imports ---
+from app import app as flask_app
+from models import db
+from metrics import request_metrics
+from query_budget import query_budgets
+from seed_data import PASSWORD, clear_caches, seed_database, seed_email # Shared with the benchmarks
+
+flask_app.config['TESTING'] = True
+
+QUIZ_DATA_PATTERN = re.compile(rb'<script id="quiz-data" type="application/json">(.*?)</script>', re.S)
+
+
+def start_quiz(client, pack_id):
+    """Opens the quiz page and returns the question ids embedded in it."""
+    response = client.get(f'/quiz/{pack_id}')
+    assert response.status_code == 200, response.status_code
+    quiz_data = json.loads(QUIZ_DATA_PATTERN.search(response.data).group(1))
+    return [question['id'] for question in quiz_data['questions']]
+
+
+def play_quiz(client, pack_id, selected_answer=0, total_time_ms=30000):
+    """Starts and submits one attempt choosing the same option everywhere; returns the submit response."""
+    answers = [{'questionId': question_id, 'selectedAnswerIndex': selected_answer}
+               for question_id in start_quiz(client, pack_id)]
+    return client.post('/submit_quiz', json={'pack_id': pack_id, 'answers': answers, 'totalTimeTaken': total_time_ms})
+
+
+class QueryCounter:
+    """Records the SQL statements sent to the database engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+# --- Fixtures ---
+
+@pytest.fixture
+def app():
+    """The application with empty tables and caches. No application context is pushed,
+    so every test-client request gets its own database session like in production."""
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+    clear_caches()
+    request_metrics.reset()
+    query_budgets.reports.clear()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """Returns seed_database, run inside an application context."""
+    def seed_app(**sizes):
+        with app.app_context():
+            seed_database(**sizes)
+    return seed_app
+
+
+@pytest.fixture
+def login():
+    """Returns a function that logs a test client in as the given user id."""
+    def login_client(client, user_id=1):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id) # Flask-Login's session key
+        return client
+    return login_client
+
+
+@pytest.fixture
+def query_counter(app):
+    """A QueryCounter listening on the application's engine for the duration of the test."""
+    with app.app_context():
+        engine = db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    yield counter
+    event.remove(engine, 'before_cursor_execute', counter)
@@ -0,0 +1,100 @@
+"""Fingerprinted, precompressed static files (see assets.py)."""
+import gzip
+import os
+import re
+
+import pytest
+from flask import Flask, url_for
+
+from assets import AssetManifest, brotli, build_assets
+
+STYLE = ''.join(f'.pack-{n} {{ color: #{n:06x}; margin: 0 auto; }}\n' for n in range(200)).encode()
+IMAGE = os.urandom(2048) # Incompressible, like the webp images
+
+
+@pytest.fixture
+def asset_app(tmp_path):
+    """A bare application whose static folder was built into a temporary directory."""
+    static_folder = tmp_path / 'static'
+    (static_folder / 'css').mkdir(parents=True)
+    (static_folder / 'img').mkdir()
+    (static_folder / 'css' / 'style.css').write_bytes(STYLE)
+    (static_folder / 'img' / 'logo.webp').write_bytes(IMAGE)
+
+    totals = build_assets(str(static_folder))
+    app = Flask(__name__, static_folder=str(static_folder))
+    manifest = AssetManifest()
+    manifest.init_app(app)
+    app.build_totals = totals
+    return app
+
+
+def static_url(app, filename, **values):
+    with app.test_request_context():
+        return url_for('static', filename=filename, **values)
+
+
+def test_build_reports_byte_savings(asset_app):
+    totals = asset_app.build_totals
+    assert totals['files'] == 2
+    assert totals['compressible_files'] == 1
+    assert totals['bytes'] == len(STYLE)
+    assert 0 < totals['gzip_bytes'] < totals['bytes']
+    if brotli is not None:
+        assert 0 < totals['br_bytes'] < totals['bytes']
+
+
+def test_url_for_returns_the_fingerprinted_url(asset_app):
+    assert re.fullmatch(r'/static/build/css/style\.[0-9a-f]{10}\.css', static_url(asset_app, 'css/style.css'))
+    # The hash versions the URL, so a cache-busting parameter is dropped
+    assert re.fullmatch(r'/static/build/img/logo\.[0-9a-f]{10}\.webp', static_url(asset_app, 'img/logo.webp', v=123))
+    # Files added after the build are linked as they are
+    assert static_url(asset_app, 'img/new.webp') == '/static/img/new.webp'
+
+
+def test_precompressed_variant_is_served_when_accepted(asset_app):
+    client = asset_app.test_client()
+    response = client.get(static_url(asset_app, 'css/style.css'), headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.mimetype == 'text/css'
+    if brotli is not None:
+        assert response.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.data) == STYLE
+    else:
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == STYLE
+
+
+def test_gzip_is_served_to_browsers_without_brotli(asset_app):
+    response = asset_app.test_client().get(static_url(asset_app, 'css/style.css'), headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == STYLE
+
+
+def test_plain_file_is_served_without_accept_encoding(asset_app):
+    response = asset_app.test_client().get(static_url(asset_app, 'css/style.css'))
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Accept-Encoding' in response.headers['Vary'] # Caches must still keep the variants apart
+    assert response.data == STYLE
+
+
+def test_incompressible_file_is_served_as_is(asset_app):
+    response = asset_app.test_client().get(static_url(asset_app, 'img/logo.webp'), headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.data == IMAGE
+
+
+def test_unbuilt_files_fall_back_to_flask(asset_app):
+    with open(os.path.join(asset_app.static_folder, 'img', 'new.webp'), 'wb') as f:
+        f.write(IMAGE)
+    response = asset_app.test_client().get('/static/img/new.webp')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+    assert response.data == IMAGE
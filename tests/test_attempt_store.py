@@ -0,0 +1,77 @@
+"""Quizzes in progress are kept in the database (see attempt_store.py)."""
+from datetime import datetime, timedelta
+
+from conftest import start_quiz
+from attempt_store import AttemptStore
+from models import db, ActiveQuizAttempt
+
+
+def submit(client, question_ids, pack_id=1):
+    answers = [{'questionId': question_id, 'selectedAnswerIndex': 0} for question_id in question_ids]
+    return client.post('/submit_quiz', json={'pack_id': pack_id, 'answers': answers, 'totalTimeTaken': 1000})
+
+
+def attempt_tokens(app):
+    with app.app_context():
+        tokens = set(db.session.execute(db.select(ActiveQuizAttempt.token)).scalars())
+        db.session.remove()
+    return tokens
+
+
+def test_attempt_survives_a_restart(seed, client, login, monkeypatch):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    question_ids = start_quiz(client, 1)
+    # A new process (after a restart, or another worker) has a fresh store object
+    monkeypatch.setattr('routes.quiz.attempt_store', AttemptStore(ttl_seconds=3600))
+    response = submit(client, question_ids)
+    assert response.get_json()['success'], response.get_json()
+
+
+def test_attempt_is_claimed_once(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    question_ids = start_quiz(client, 1)
+    with client.session_transaction() as session:
+        token = session['quiz_attempt_token']
+    assert submit(client, question_ids).get_json()['success']
+
+    with client.session_transaction() as session:
+        session['quiz_attempt_token'] = token # Replayed cookie
+    response = submit(client, question_ids)
+    assert response.status_code == 400
+    assert attempt_tokens(app) == set()
+
+
+def test_restarted_quiz_replaces_the_attempt(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    start_quiz(client, 1)
+    start_quiz(client, 1)
+    with client.session_transaction() as session:
+        assert attempt_tokens(app) == {session['quiz_attempt_token']}
+
+
+def test_expired_attempts_are_rejected_and_deleted(app, seed, client, login):
+    seed(users=2, packs=1, questions_per_pack=4)
+    login(client, 1)
+    question_ids = start_quiz(client, 1)
+    with app.app_context():
+        ActiveQuizAttempt.query.update({'created_at': datetime.utcnow() - timedelta(days=1)})
+        db.session.commit()
+        db.session.remove()
+    response = submit(client, question_ids)
+    assert response.status_code == 400
+    assert 'expired' in response.get_json()['message']
+
+    other = app.test_client()
+    login(other, 1)
+    start_quiz(other, 1)
+    with app.app_context():
+        ActiveQuizAttempt.query.update({'created_at': datetime.utcnow() - timedelta(days=1)})
+        db.session.commit()
+        db.session.remove()
+    login(client, 2)
+    start_quiz(client, 1) # Starting any quiz deletes the expired attempts
+    with client.session_transaction() as session:
+        assert attempt_tokens(app) == {session['quiz_attempt_token']}
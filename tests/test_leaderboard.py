@@ -0,0 +1,78 @@
+"""Per-pack and global leaderboards (see leaderboard.py)."""
+from conftest import play_quiz
+from leaderboard import Leaderboard, leaderboards
+from models import db, UserQuizStat
+
+
+def test_board_orders_by_score_then_time():
+    board = Leaderboard()
+    board.update(1, 5, 3.0)
+    board.update(2, 7, 9.0)
+    board.update(3, 5, 2.0)
+    board.update(4, 5, None) # Untimed attempts rank after timed ones with the same score
+    assert [user_id for _, user_id, _, _ in board.top(10)] == [2, 3, 1, 4]
+    assert board.rank(1) == (3, 5, 3.0)
+    board.update(1, 8, 4.0) # A better attempt moves the user up
+    assert board.top(1) == [(1, 1, 8, 4.0)]
+    assert board.rank(4) == (4, 5, None)
+    assert len(board) == 4
+
+
+def user_rank(app, user_id, pack_id):
+    with app.app_context():
+        _, rank, _ = leaderboards.view(user_id, pack_id)
+        db.session.remove()
+    return rank
+
+
+def test_submission_updates_loaded_boards(app, seed, client, login):
+    seed(users=3, packs=1, questions_per_pack=4, attempts_per_user=0)
+    login(client, 1)
+    assert client.get('/leaderboard/1').status_code == 200 # Loads the board
+    assert user_rank(app, 1, 1) is None
+
+    # Option 0 is correct for question 1 only
+    assert play_quiz(client, 1, selected_answer=0).get_json()['success']
+    rank, score, _ = user_rank(app, 1, 1)
+    assert (rank, score) == (1, 1)
+    assert leaderboards.stats()['loads'] == 1 # Updated in place, not reloaded
+
+
+def test_failing_refresh_does_not_fail_the_saved_submission(app, seed, client, login, monkeypatch):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    assert client.get('/leaderboard/1').status_code == 200
+    assert client.get('/leaderboard').status_code == 200
+
+    def broken_refresh(pairs):
+        raise RuntimeError("leaderboard unavailable")
+    monkeypatch.setattr(leaderboards, 'refresh', broken_refresh)
+
+    response = play_quiz(client, 1, selected_answer=0)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['success']
+    assert client.get(result['redirect_url']).status_code == 200
+    with app.app_context():
+        assert UserQuizStat.query.count() == 1
+        db.session.remove()
+
+    # The stale boards were dropped, so the next view reloads them with the new attempt
+    monkeypatch.undo()
+    assert user_rank(app, 1, 1)[:2] == (1, 1)
+    assert user_rank(app, 1, None)[:2] == (1, 1)
+
+
+def test_deleted_pack_leaves_the_global_board(app, seed, client, login):
+    seed(users=3, packs=2, questions_per_pack=4, attempts_per_user=0)
+    for user_id, pack_id in ((1, 1), (2, 2), (3, 1)):
+        login(client, user_id)
+        assert play_quiz(client, pack_id, selected_answer=0).get_json()['success']
+    page = client.get('/leaderboard').get_data(as_text=True) # Loads the global board
+    assert 'user1' in page and 'user2' in page
+
+    assert client.post('/delete_pack/1').status_code == 302
+    page = client.get('/leaderboard').get_data(as_text=True)
+    assert 'user1' not in page and 'user2' in page # The deleted pack's attempts no longer count
+    assert user_rank(app, 1, None) is None
+    assert user_rank(app, 2, None)[:2] == (1, 1)
@@ -0,0 +1,98 @@
+"""Request and SQL metrics in the Prometheus text format (see metrics.py)."""
+import re
+
+import pytest
+
+from conftest import clear_caches
+from metrics import Histogram, _histogram_lines
+
+SAMPLE_LINE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse(text):
+    """Returns {(name, frozenset of label pairs): value} for the sample lines of an exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE_LINE.match(line).groups()
+        pairs = frozenset(re.findall(r'(\w+)="([^"]*)"', labels or ''))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def sample(samples, name, **labels):
+    return samples[(name, frozenset(labels.items()))]
+
+
+def scrape(client, headers=None):
+    response = client.get('/admin/metrics', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return parse(response.get_data(as_text=True))
+
+
+def test_histogram_lines_are_cumulative():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 20.0):
+        histogram.observe(value)
+    samples = parse('\n'.join(_histogram_lines('latency', 'quiz.quiz', histogram)))
+    buckets = [sample(samples, 'latency_bucket', endpoint='quiz.quiz', le=le) for le in ('0.01', '0.1', '1.0', '+Inf')]
+    assert buckets == [1, 3, 4, 5]
+    assert sample(samples, 'latency_count', endpoint='quiz.quiz') == 5
+    assert sample(samples, 'latency_sum', endpoint='quiz.quiz') == pytest.approx(20.605)
+
+
+def test_requests_and_sql_statements_are_counted(seed, client, login, query_counter):
+    seed(users=1, packs=2, attempts_per_user=3)
+    login(client, 1)
+    statements = []
+    for _ in range(2):
+        clear_caches()
+        query_counter.reset()
+        assert client.get('/profile').status_code == 200
+        statements.append(query_counter.count)
+
+    samples = scrape(client)
+    assert sample(samples, 'quiz_http_requests_total', endpoint='auth.profile', method='GET', status='200') == 2
+    assert sample(samples, 'quiz_db_queries_per_request_count', endpoint='auth.profile') == 2
+    assert sample(samples, 'quiz_db_queries_per_request_sum', endpoint='auth.profile') == sum(statements)
+    assert sample(samples, 'quiz_db_query_seconds_total', endpoint='auth.profile') > 0
+
+    # Every histogram: cumulative buckets, +Inf equal to _count
+    histograms = {(name[:-len('_bucket')], dict(labels)['endpoint'])
+                  for name, labels in samples if name.endswith('_bucket')}
+    assert ('quiz_http_request_duration_seconds', 'auth.profile') in histograms
+    for name, endpoint in histograms:
+        buckets = sorted(((float(dict(labels)['le']), value) for (sample_name, labels), value in samples.items()
+                          if sample_name == name + '_bucket' and dict(labels)['endpoint'] == endpoint))
+        counts = [value for _, value in buckets]
+        assert counts == sorted(counts), (name, endpoint)
+        assert buckets[-1] == (float('inf'), sample(samples, name + '_count', endpoint=endpoint))
+
+
+def test_unknown_urls_share_one_label(seed, client, login):
+    seed(users=1)
+    login(client, 1)
+    for url in ('/no-such-page', '/wp-login.php'):
+        assert client.get(url).status_code == 404
+    samples = scrape(client)
+    assert sample(samples, 'quiz_http_requests_total', endpoint='unmatched', method='GET', status='404') == 2
+    assert not any('/no-such-page' in value for _, labels in samples for _, value in labels)
+
+
+def test_access_needs_a_login_or_the_token(app, seed, client, login, monkeypatch):
+    seed(users=1)
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    assert client.get('/admin/metrics').status_code == 302 # Redirected to the login page
+    assert client.get('/admin/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 302
+    scrape(client, headers={'Authorization': 'Bearer scrape-secret'})
+
+    login(client, 1)
+    scrape(client)
+
+
+def test_no_token_configured_means_login_only(app, seed, client, monkeypatch):
+    seed(users=1)
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    assert client.get('/admin/metrics', headers={'Authorization': 'Bearer None'}).status_code == 302
@@ -0,0 +1,104 @@
+"""Offline play: quiz download with a signed ticket and batch upload (see offline_sync.py)."""
+import time
+
+from conftest import clear_caches, start_quiz
+from leaderboard import leaderboards
+from models import db, Question, UserPackSummary, UserQuizStat
+
+
+def download(client, pack_id=1):
+    response = client.get(f'/quiz/{pack_id}/offline')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def offline_attempt(offline_quiz, answers=None, selected_answer=0):
+    if answers is None:
+        answers = [{'questionId': question['id'], 'selectedAnswerIndex': selected_answer}
+                   for question in offline_quiz['questions']]
+    return {'ticket': offline_quiz['ticket'], 'answers': answers, 'totalTimeTaken': 20000,
+            'completedAt': int(time.time() * 1000)}
+
+
+def upload(client, attempts):
+    return client.post('/submit_quiz/batch', json={'attempts': attempts})
+
+
+def test_batch_upload_records_attempts_once(app, seed, client, login):
+    seed(users=2, packs=2, questions_per_pack=4)
+    login(client, 1)
+    attempts = [offline_attempt(download(client, 1)), offline_attempt(download(client, 2))]
+    response = upload(client, attempts)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['recorded'] == 2
+    # Option 0 is correct for the first question of each pack only
+    assert [(result['success'], result['score'], result['total_questions']) for result in body['results']] == \
+        [(True, 1, 4), (True, 1, 4)]
+
+    retry = upload(client, attempts).get_json() # A sync retried after a lost response
+    assert retry['recorded'] == 0
+    assert all(result['already_recorded'] for result in retry['results'])
+    with app.app_context():
+        assert UserQuizStat.query.count() == 2
+        db.session.remove()
+
+
+def test_repeated_and_foreign_answers_cannot_inflate_the_score(app, seed, client, login):
+    seed(users=1, packs=2, questions_per_pack=4)
+    login(client, 1)
+    offline_quiz = download(client, 1)
+    first_question = 1 # Correct answer: option 0
+    answers = [{'questionId': first_question, 'selectedAnswerIndex': 0}] * 10
+    answers += [{'questionId': 5, 'selectedAnswerIndex': 0}] * 3 # Question of pack 2, not in the ticket
+    result, = upload(client, [offline_attempt(offline_quiz, answers)]).get_json()['results']
+    assert result['success']
+    assert (result['score'], result['total_questions']) == (1, 4)
+
+    with app.app_context():
+        summary = db.session.get(UserPackSummary, (1, 1))
+        assert (summary.best_score, summary.score_sum, summary.questions_sum) == (1, 1, 4)
+        assert db.session.get(Question, first_question).times_shown == 1
+        assert db.session.get(Question, 5).times_shown == 0
+        db.session.remove()
+
+
+def test_repeated_answers_in_submit_quiz_count_once(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    start_quiz(client, 1)
+    answers = [{'questionId': 1, 'selectedAnswerIndex': 0}] * 10
+    response = client.post('/submit_quiz', json={'pack_id': 1, 'answers': answers, 'totalTimeTaken': 1000})
+    assert response.get_json()['success']
+    with app.app_context():
+        stat = UserQuizStat.query.one()
+        assert (stat.score, stat.total_questions) == (1, 4)
+        db.session.remove()
+
+
+def test_failing_leaderboard_refresh_does_not_fail_the_upload(app, seed, client, login, monkeypatch):
+    seed(users=1, packs=1, questions_per_pack=4)
+    login(client, 1)
+    assert client.get('/leaderboard/1').status_code == 200 # Loads the board
+
+    def broken_refresh(pairs):
+        raise RuntimeError("leaderboard unavailable")
+    monkeypatch.setattr(leaderboards, 'refresh', broken_refresh)
+
+    response = upload(client, [offline_attempt(download(client))])
+    assert response.status_code == 200
+    assert response.get_json()['recorded'] == 1
+    assert leaderboards.stats()['boards'] == 0 # Dropped, so the next view reloads them
+
+
+def test_upload_queries_do_not_grow_with_the_number_of_packs(seed, client, login, query_counter):
+    seed(users=1, packs=5, questions_per_pack=4)
+    login(client, 1)
+    counts = []
+    for packs in (1, 5):
+        attempts = [offline_attempt(download(client, pack_id)) for pack_id in range(1, packs + 1)]
+        clear_caches() # Cold answer keys
+        query_counter.reset()
+        assert upload(client, attempts).get_json()['recorded'] == packs
+        counts.append(query_counter.count)
+    assert counts[0] == counts[1]
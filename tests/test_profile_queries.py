@@ -0,0 +1,34 @@
+"""The profile page issues a fixed number of SQL statements, whatever the user's history."""
+import pytest
+
+from conftest import clear_caches, seed_database
+
+# Loading the user (cold identity cache), the pack summaries and both achievement checks
+PROFILE_QUERIES = 3
+
+
+def profile_query_count(app, client, query_counter, **sizes):
+    with app.app_context():
+        seed_database(users=2, **sizes)
+    clear_caches()
+    query_counter.reset()
+    response = client.get('/profile')
+    assert response.status_code == 200
+    return query_counter.count
+
+
+@pytest.mark.parametrize('packs, attempts_per_user', [(1, 1), (5, 20), (25, 200)])
+def test_profile_query_count_does_not_grow(app, client, login, query_counter, packs, attempts_per_user):
+    login(client, 1)
+    assert profile_query_count(app, client, query_counter, packs=1, attempts_per_user=0) == PROFILE_QUERIES
+    count = profile_query_count(app, client, query_counter, packs=packs, attempts_per_user=attempts_per_user)
+    assert count == PROFILE_QUERIES
+
+
+def test_profile_shows_seeded_history(seed, client, login):
+    seed(users=1, packs=3, attempts_per_user=7)
+    login(client, 1)
+    response = client.get('/profile')
+    assert response.status_code == 200
+    for p in range(1, 4):
+        assert f'Pack {p}'.encode() in response.data
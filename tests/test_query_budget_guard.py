@@ -0,0 +1,105 @@
+"""The query budget guard reports views that break their budget (see query_budget.py)."""
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from models import db
+from query_budget import QueryBudgetExceeded, QueryBudgetGuard, query_budget
+
+
+@pytest.fixture
+def guard_app():
+    """A throwaway application with an in-memory database, its own guard and a few views."""
+    throwaway = Flask(__name__)
+    throwaway.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(throwaway)
+    guard = QueryBudgetGuard()
+    guard.init_app(throwaway)
+    throwaway.extensions['query_budget_guard'] = guard
+    with throwaway.app_context():
+        db.session.execute(text('CREATE TABLE number (n INTEGER)'))
+        db.session.commit()
+
+    @throwaway.route('/within')
+    @query_budget(2)
+    def within():
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+        return 'ok'
+
+    @throwaway.route('/over')
+    @query_budget(2)
+    def over():
+        for statement in ('SELECT 1', 'SELECT 2', 'SELECT 3'):
+            db.session.execute(text(statement))
+        return 'ok'
+
+    @throwaway.route('/repeated')
+    @query_budget(10)
+    def repeated():
+        for n in range(3): # The same SELECT with different parameters, like an N+1 loop
+            db.session.execute(text('SELECT n FROM number WHERE n = :n'), {'n': n})
+        return 'ok'
+
+    @throwaway.route('/batched')
+    @query_budget(1, per_batch=1)
+    def batched():
+        for batch in range(4):
+            db.session.execute(text('INSERT INTO number (n) VALUES (:n)'), [{'n': batch}, {'n': batch + 10}])
+        db.session.commit()
+        return 'ok'
+
+    @throwaway.route('/unbudgeted')
+    def unbudgeted():
+        for n in range(2):
+            db.session.execute(text('SELECT :n'), {'n': n})
+        return 'ok'
+
+    yield throwaway
+    with throwaway.app_context():
+        db.engine.dispose()
+
+
+def test_views_within_budget_pass(guard_app):
+    client = guard_app.test_client()
+    assert client.get('/within').status_code == 200
+    assert client.get('/unbudgeted').status_code == 200
+    assert list(guard_app.extensions['query_budget_guard'].reports) == []
+
+
+def test_batches_get_their_per_batch_allowance(guard_app):
+    # Four executemany batches against a base budget of 1: allowed, and not taken for N+1
+    assert guard_app.test_client().get('/batched').status_code == 200
+    assert list(guard_app.extensions['query_budget_guard'].reports) == []
+
+
+def test_over_budget_raises(guard_app):
+    with pytest.raises(QueryBudgetExceeded, match='over: 3 SQL statements, budget 2'):
+        guard_app.test_client().get('/over')
+
+
+def test_repeated_statement_raises(guard_app):
+    with pytest.raises(QueryBudgetExceeded, match='possible N[+]1, run 3 times'):
+        guard_app.test_client().get('/repeated')
+
+
+def test_repeat_limit_is_configurable(guard_app):
+    guard_app.config['QUERY_REPEAT_LIMIT'] = 4
+    assert guard_app.test_client().get('/repeated').status_code == 200
+
+
+@pytest.mark.parametrize('endpoint, count, budget, repeated', [
+    ('over', 3, 2, 0),
+    ('repeated', 3, 10, 1),
+])
+def test_warn_mode_records_a_report(guard_app, endpoint, count, budget, repeated):
+    guard_app.config['QUERY_BUDGET_MODE'] = 'warn'
+    assert guard_app.test_client().get(f'/{endpoint}').status_code == 200
+    report, = guard_app.extensions['query_budget_guard'].reports
+    assert (report.endpoint, report.count, report.budget, len(report.repeated)) == (endpoint, count, budget, repeated)
+
+
+def test_off_mode_skips_the_check(guard_app):
+    guard_app.config['QUERY_BUDGET_MODE'] = 'off'
+    assert guard_app.test_client().get('/over').status_code == 200
+    assert list(guard_app.extensions['query_budget_guard'].reports) == []
@@ -0,0 +1,300 @@
+"""
+Every view stays within its @query_budget (see query_budget.py).
+
+Under TESTING the guard runs in 'raise' mode, so a request that breaks its view's
+budget or repeats a statement (N+1) fails with QueryBudgetExceeded. Each endpoint
+below is requested with cold caches on a seeded database, form submissions included.
+"""
+import io
+
+import pytest
+from flask import request, request_started
+
+from conftest import PASSWORD, clear_caches, seed_email, start_quiz
+from models import db, QuizPack
+from query_budget import check_route_query_budgets
+from submission_queue import submission_writer
+
+# endpoint -> function(client, monkeypatch) that requests it
+EXERCISES = {}
+
+
+def exercises(endpoint):
+    def register(exercise):
+        EXERCISES[endpoint] = exercise
+        return exercise
+    return register
+
+
+def cold(call, url, status, **kwargs):
+    """Requests a URL with empty caches (a view's worst case) and checks the status code."""
+    clear_caches()
+    response = call(url, **kwargs)
+    assert response.status_code == status, (url, response.status_code)
+    return response
+
+
+def question_form(**fields):
+    form = {'question_text': 'Which option?', 'option_0': 'A', 'option_1': 'B', 'option_2': 'C', 'option_3': 'D'}
+    form.update(fields)
+    return form
+
+
+# --- Pages ---
+
+@exercises('index')
+def index(client, monkeypatch):
+    cold(client.get, '/', 200)
+
+
+@exercises('auth.register')
+def register(client, monkeypatch):
+    client.get('/logout')
+    cold(client.get, '/register', 200)
+    cold(client.post, '/register', 302, data={'name': 'newcomer', 'email': 'newcomer@test.local',
+                                              'password': PASSWORD, 'confirm_password': PASSWORD})
+
+
+@exercises('auth.login')
+def login(client, monkeypatch):
+    client.get('/logout')
+    cold(client.get, '/login', 200)
+    cold(client.post, '/login', 302, data={'email': seed_email(1), 'password': PASSWORD})
+
+
+@exercises('auth.logout')
+def logout(client, monkeypatch):
+    cold(client.get, '/logout', 302)
+
+
+@exercises('auth.profile')
+def profile(client, monkeypatch):
+    cold(client.get, '/profile', 200)
+
+
+@exercises('leaderboard.leaderboard')
+def leaderboard(client, monkeypatch):
+    cold(client.get, '/leaderboard', 200)
+    cold(client.get, '/leaderboard/1', 200)
+
+
+# --- Quiz ---
+
+@exercises('quiz.quiz')
+def quiz(client, monkeypatch):
+    cold(client.get, '/quiz/1', 200)
+    with client.application.app_context():
+        db.session.get(QuizPack, 2).questions_per_attempt = 5 # Sampled: the worst case
+        db.session.commit()
+        db.session.remove()
+    cold(client.get, '/quiz/2', 200)
+
+
+@exercises('quiz.submit_quiz')
+def submit_quiz(client, monkeypatch):
+    answers = [{'questionId': question_id, 'selectedAnswerIndex': 0} for question_id in start_quiz(client, 1)]
+    response = cold(client.post, '/submit_quiz', 200,
+                    json={'pack_id': 1, 'answers': answers, 'totalTimeTaken': 30000})
+    assert response.get_json()['success']
+
+
+@exercises('quiz.offline_quiz')
+def offline_quiz(client, monkeypatch):
+    cold(client.get, '/quiz/1/offline', 200)
+
+
+@exercises('quiz.submit_quiz_batch')
+def submit_quiz_batch(client, monkeypatch):
+    attempts = []
+    for pack_id in (1, 2, 3):
+        offline = client.get(f'/quiz/{pack_id}/offline').get_json()
+        attempts.append({'ticket': offline['ticket'], 'totalTimeTaken': 20000,
+                         'answers': [{'questionId': question['id'], 'selectedAnswerIndex': 1}
+                                     for question in offline['questions']]})
+    response = cold(client.post, '/submit_quiz/batch', 200, json={'attempts': attempts})
+    assert response.get_json()['recorded'] == 3
+
+
+@exercises('quiz.pending_quiz_results')
+def pending_quiz_results(client, monkeypatch):
+    monkeypatch.setattr(submission_writer, 'enabled', True)
+    monkeypatch.setattr(submission_writer, 'flush_interval', 0.01)
+    answers = [{'questionId': question_id, 'selectedAnswerIndex': 0} for question_id in start_quiz(client, 1)]
+    response = client.post('/submit_quiz', json={'pack_id': 1, 'answers': answers, 'totalTimeTaken': 30000})
+    pending_url = response.get_json()['redirect_url']
+    assert '/pending/' in pending_url
+    cold(client.get, pending_url, 302)
+
+
+@exercises('quiz.quiz_results')
+def quiz_results(client, monkeypatch):
+    cold(client.get, '/quiz_results/1/1', 200) # The first seeded attempt: user 1, pack 1
+
+
+# --- Pack editing pages ---
+# The older packs.* form pages have no templates, so only their form submissions are requested
+
+@exercises('packs.packs')
+def packs(client, monkeypatch):
+    cold(client.get, '/packs', 200)
+
+
+@exercises('packs.create_pack')
+def create_pack(client, monkeypatch):
+    cold(client.post, '/create_pack', 302, data={'title': 'Created pack', 'description': 'New'})
+
+
+@exercises('packs.edit_pack')
+def edit_pack(client, monkeypatch):
+    cold(client.post, '/edit_pack/1', 302, data={'title': 'Renamed pack', 'description': 'Edited'})
+
+
+@exercises('packs.delete_pack')
+def delete_pack(client, monkeypatch):
+    cold(client.post, '/delete_pack/1', 302)
+
+
+@exercises('packs.add_question')
+def packs_add_question(client, monkeypatch):
+    cold(client.post, '/add_question/1', 302, data=question_form(correct_answer_index='1'))
+
+
+@exercises('packs.edit_question')
+def packs_edit_question(client, monkeypatch):
+    cold(client.post, '/edit_question/1', 302, data=question_form(correct_answer_index='2'))
+
+
+@exercises('packs.delete_question')
+def packs_delete_question(client, monkeypatch):
+    cold(client.post, '/delete_question/1', 302)
+
+
+# --- Admin ---
+
+@exercises('admin.dashboard')
+def dashboard(client, monkeypatch):
+    cold(client.get, '/admin/', 200)
+
+
+@exercises('admin.cache_stats')
+def cache_stats(client, monkeypatch):
+    cold(client.get, '/admin/cache_stats', 200)
+
+
+@exercises('admin.metrics')
+def metrics(client, monkeypatch):
+    cold(client.get, '/admin/metrics', 200)
+
+
+@exercises('admin.new_quiz_pack')
+def new_quiz_pack(client, monkeypatch):
+    cold(client.get, '/admin/quiz/new', 200)
+    cold(client.post, '/admin/quiz/new', 302, data={'title': 'Admin pack', 'description': 'New', 'color': 'red',
+                                                    'difficulty': 'Easy', 'time_to_complete_minutes': '5'})
+
+
+@exercises('admin.add_question')
+def admin_add_question(client, monkeypatch):
+    cold(client.get, '/admin/quiz/1/add_question', 200)
+    cold(client.get, '/admin/quiz/1/add_question?after=6&pos=6&q=Question', 200)
+    cold(client.post, '/admin/quiz/1/add_question', 302, data=question_form(correct_answer='B'))
+
+
+@exercises('admin.import_quiz_questions')
+def import_quiz_questions(client, monkeypatch):
+    exported = client.get('/admin/quiz/1/export_questions.csv').data
+    upload = {'questions_file': (io.BytesIO(exported), 'questions.csv')}
+    cold(client.post, '/admin/quiz/2/import_questions', 302, data=upload, content_type='multipart/form-data')
+
+
+@exercises('admin.export_quiz_questions')
+def export_quiz_questions(client, monkeypatch):
+    cold(client.get, '/admin/quiz/1/export_questions.csv', 200)
+    cold(client.get, '/admin/quiz/1/export_questions.jsonl', 200)
+
+
+@exercises('admin.export_quiz_results')
+def export_quiz_results(client, monkeypatch):
+    cold(client.get, '/admin/results/export', 200)
+    cold(client.get, '/admin/results/export?file_format=jsonl&pack_id=1&date_from=2000-01-01&date_to=2100-01-01', 200)
+
+
+@exercises('admin.edit_quiz_pack')
+def edit_quiz_pack(client, monkeypatch):
+    cold(client.get, '/admin/quiz/1/edit', 200)
+    cold(client.post, '/admin/quiz/1/edit', 302, data={'title': 'Edited pack', 'description': 'Edited',
+                                                       'color': 'green', 'difficulty': 'Hard',
+                                                       'time_to_complete_minutes': '15', 'questions_per_attempt': '4'})
+
+
+@exercises('admin.edit_question')
+def admin_edit_question(client, monkeypatch):
+    cold(client.get, '/admin/question/1/edit', 200)
+    cold(client.post, '/admin/question/1/edit', 302, data=question_form(correct_answer='C'))
+
+
+@exercises('admin.delete_question')
+def admin_delete_question(client, monkeypatch):
+    cold(client.post, '/admin/question/1/delete', 302)
+
+
+@exercises('admin.delete_quiz_pack')
+def delete_quiz_pack(client, monkeypatch):
+    cold(client.post, '/admin/quiz/1/delete', 302)
+
+
+# --- Tests ---
+
+@pytest.fixture
+def requested_endpoints(app):
+    """The endpoints of the requests made during the test."""
+    endpoints = []
+
+    def record(sender, **extra):
+        endpoints.append(request.endpoint)
+    request_started.connect(record, app)
+    yield endpoints
+    request_started.disconnect(record, app)
+
+
+@pytest.mark.parametrize('endpoint', sorted(EXERCISES))
+def test_view_stays_within_its_budget(endpoint, seed, client, login, requested_endpoints, monkeypatch):
+    seed(users=3, packs=3, questions_per_pack=12, attempts_per_user=6)
+    login(client, 1)
+    EXERCISES[endpoint](client, monkeypatch)
+    assert endpoint in requested_endpoints
+
+
+def test_every_view_is_exercised_and_budgeted(app):
+    endpoints = set(app.view_functions) - {'static'}
+    assert sorted(endpoints - set(EXERCISES)) == [], "views without a test in this module"
+    unbudgeted = sorted(endpoint for endpoint in endpoints
+                        if getattr(app.view_functions[endpoint], 'query_budget', None) is None)
+    assert unbudgeted == [], "views without @query_budget"
+
+
+def test_check_command_needs_data(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            check_route_query_budgets(app)
+
+
+def test_check_command_passes_on_seeded_data(app, seed):
+    seed(users=3, packs=3, questions_per_pack=12, attempts_per_user=6)
+    with app.app_context():
+        reports, unbudgeted = check_route_query_budgets(app)
+    assert [str(report) for report in reports] == []
+    assert unbudgeted == []
+
+
+def test_import_budget_holds_for_any_upload_size(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=0)
+    login(client, 1)
+    rows = 3000 # Six batches of 500
+    lines = ['question_text,option_a,option_b,option_c,option_d,correct_answer,image_url']
+    lines += [f'Question {n}?,A,B,C,D,A,' for n in range(rows)]
+    upload = {'questions_file': (io.BytesIO('\n'.join(lines).encode()), 'questions.csv')}
+    cold(client.post, '/admin/quiz/1/import_questions', 302, data=upload, content_type='multipart/form-data')
+    with app.app_context():
+        assert db.session.get(QuizPack, 1).question_count == rows
+        db.session.remove()
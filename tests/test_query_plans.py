@@ -0,0 +1,43 @@
+"""No query issued by the main views falls back to a full table scan (see query_plans.py)."""
+import pytest
+
+from conftest import clear_caches
+from models import db
+from query_plans import collect_route_statements, explain, find_table_scans
+
+
+@pytest.fixture
+def route_statements(app, seed):
+    seed(users=5, packs=4, questions_per_pack=12, attempts_per_user=8)
+    clear_caches() # Cold caches, so every view reaches the database
+    with app.app_context():
+        statements = collect_route_statements(app)
+        yield statements
+        db.session.remove()
+
+
+def test_every_checked_view_issues_queries(route_statements):
+    assert route_statements, "no views were checked"
+    for endpoint, statements in route_statements.items():
+        assert statements, f"{endpoint} issued no SELECT, so its query plans were not checked"
+
+
+def test_no_table_scans(app, route_statements):
+    with app.app_context():
+        for endpoint, statements in route_statements.items():
+            for statement, parameters in statements:
+                plan = explain(statement, parameters)
+                assert plan, statement
+                assert not find_table_scans(plan), f"[{endpoint}] table scan in {' '.join(statement.split())}: {plan}"
+
+
+@pytest.mark.parametrize('detail, scanned', [
+    ('SCAN user_quiz_stat', ['user_quiz_stat']),
+    ('SCAN TABLE question', ['question']),
+    ('SCAN quiz_pack', []), # Allowed, the pack listing shows every pack
+    ('SCAN user_quiz_stat USING INDEX ix_user_quiz_stat_completed_at', []),
+    ('SCAN CONSTANT ROW', []),
+    ('SEARCH question USING INDEX ix_question_quiz_pack_id (quiz_pack_id=?)', []),
+])
+def test_find_table_scans(detail, scanned):
+    assert find_table_scans([detail]) == scanned
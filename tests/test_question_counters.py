@@ -0,0 +1,35 @@
+"""Per-question answer counters (see stats.py), live and rebuilt from the history."""
+from conftest import start_quiz
+from models import db, Question
+from stats import rebuild_question_counters
+
+
+def counters(app):
+    with app.app_context():
+        rows = {q.id: (q.times_shown, q.times_correct, *q.option_picks) for q in Question.query.order_by(Question.id)}
+        db.session.remove()
+    return rows
+
+
+def test_answers_outside_the_attempt_are_not_counted(app, seed, client, login):
+    seed(users=1, packs=2, questions_per_pack=4)
+    login(client, 1)
+    question_ids = start_quiz(client, 1)
+    answers = [{'questionId': question_id, 'selectedAnswerIndex': 0} for question_id in question_ids]
+    # Question 5 belongs to pack 2, 999 does not exist
+    answers += [{'questionId': 5, 'selectedAnswerIndex': 2}, {'questionId': 999, 'selectedAnswerIndex': 1}]
+    response = client.post('/submit_quiz', json={'pack_id': 1, 'answers': answers, 'totalTimeTaken': 10000})
+    assert response.status_code == 200 and response.get_json()['success']
+
+    live = counters(app)
+    # Question q of pack 1 (id q + 1) has the correct answer q % 4, so only question 1 was right
+    assert live[1] == (1, 1, 1, 0, 0, 0)
+    for question_id in (2, 3, 4):
+        assert live[question_id] == (1, 0, 1, 0, 0, 0)
+    for question_id in (5, 6, 7, 8):
+        assert live[question_id] == (0, 0, 0, 0, 0, 0)
+
+    with app.app_context():
+        rebuild_question_counters()
+        db.session.commit()
+    assert counters(app) == live
@@ -0,0 +1,65 @@
+"""Bulk question import from the admin panel (see question_transfer.py)."""
+import io
+
+from models import db, Question, QuizPack
+
+HEADER = b'question_text,option_a,option_b,option_c,option_d,correct_answer,image_url\n'
+
+
+def csv_rows(count):
+    # About 100 bytes per row, so the rows span many of the reader's 8 KB decoding chunks
+    return b''.join(f'Imported question {n:05d}? {"x" * 60},a,b,c,d,B,\n'.encode() for n in range(count))
+
+
+def upload(client, data, filename='questions.csv'):
+    return client.post('/admin/quiz/1/import_questions',
+                       data={'questions_file': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return session.get('_flashes', [])
+
+
+def pack_state(app):
+    with app.app_context():
+        pack = db.session.get(QuizPack, 1)
+        state = (pack.question_count, Question.query.filter_by(quiz_pack_id=1).count())
+        db.session.remove()
+    return state
+
+
+def test_import_adds_questions_and_reports_invalid_rows(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=2)
+    login(client, 1)
+    response = upload(client, HEADER + csv_rows(3) + b'No options,,,,,A,\n')
+    assert response.status_code == 302
+    messages = flashes(client)
+    assert ('success', 'Imported 3 questions.') in messages
+    assert any(category == 'danger' and 'line 5' in message for category, message in messages)
+    assert pack_state(app) == (5, 5)
+
+
+def test_unreadable_file_reports_the_rows_already_imported(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=0)
+    login(client, 1)
+    # 600 valid rows, then bytes that are not UTF-8: the first batch of 500 is committed
+    # before the chunk holding them is decoded
+    response = upload(client, HEADER + csv_rows(600) + b'\xff\xfe broken,a,b,c,d,A,\n')
+    assert response.status_code == 302
+    (category, message), = flashes(client)
+    assert category == 'danger'
+    assert 'Could not read the file' in message
+    assert '500 questions up to line 501 were imported' in message
+    assert 'from line 502 on were not' in message
+    assert pack_state(app) == (500, 500)
+
+
+def test_unreadable_file_without_committed_batches(app, seed, client, login):
+    seed(users=1, packs=1, questions_per_pack=0)
+    login(client, 1)
+    upload(client, HEADER + b'\xff\xfe broken,a,b,c,d,A,\n')
+    (category, message), = flashes(client)
+    assert category == 'danger' and 'No questions were imported.' in message
+    assert pack_state(app) == (0, 0)
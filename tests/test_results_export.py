@@ -0,0 +1,45 @@
+"""Streamed quiz results export for admins (see results_export.py)."""
+import csv
+import io
+import json
+
+from models import db, QuizPack, User
+
+
+def rename(app, user_name, user_email, pack_title):
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.name, user.email = user_name, user_email
+        db.session.get(QuizPack, 1).title = pack_title
+        db.session.commit()
+        db.session.remove()
+
+
+def export(client, file_format):
+    response = client.get(f'/admin/results/export?file_format={file_format}')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_export_lists_every_attempt(seed, client, login):
+    seed(users=3, packs=2, questions_per_pack=4, attempts_per_user=5)
+    login(client, 1)
+    rows = list(csv.DictReader(io.StringIO(export(client, 'csv'))))
+    assert len(rows) == 15
+    assert rows[0]['user_name'] == 'user1' and rows[0]['pack_title'] == 'Pack 1'
+    assert len(export(client, 'jsonl').splitlines()) == 15
+
+
+def test_csv_cells_cannot_become_formulas(app, seed, client, login):
+    seed(users=2, packs=1, questions_per_pack=4, attempts_per_user=1)
+    rename(app, '=HYPERLINK("http://evil.example","x")', '-2+3@test.local', '@SUM(A1:A9)')
+    login(client, 1)
+    rows = {row['user_id']: row for row in csv.DictReader(io.StringIO(export(client, 'csv')))}
+    assert rows['1']['user_name'] == '\'=HYPERLINK("http://evil.example","x")'
+    assert rows['1']['user_email'] == "'-2+3@test.local"
+    assert rows['1']['pack_title'] == "'@SUM(A1:A9)"
+    assert rows['2']['user_name'] == 'user2' # Ordinary text is left alone
+
+    # JSON Lines is not opened by spreadsheets, so values are exported as they are
+    first = json.loads(export(client, 'jsonl').splitlines()[0])
+    assert first['user_name'] == '=HYPERLINK("http://evil.example","x")'
@@ -0,0 +1,78 @@
+"""
+The production engine profile (WAL, busy_timeout) lets concurrent quiz submissions
+and page reads proceed without "database is locked" errors.
+"""
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from config import Config
+from conftest import play_quiz
+from models import db, UserQuizStat
+
+PRAGMAS = Config.DB_ENGINE_PROFILES['production']['pragmas']
+
+
+def test_production_profile_pragmas_are_applied(app):
+    assert app.config['DB_ENGINE_PROFILE'] == 'production'
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == PRAGMAS['busy_timeout']
+            assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1 # NORMAL
+
+
+def test_concurrent_submissions_and_reads(app, seed, login):
+    writers, readers, attempts_per_writer, reads_per_reader = 4, 4, 5, 15
+    seed(users=writers + readers, packs=3, questions_per_pack=8, attempts_per_user=3)
+    errors = []
+    start = threading.Barrier(writers + readers + 1)
+
+    def run(worker):
+        try:
+            start.wait()
+            worker()
+        except Exception as e: # Collected and reported by the test thread
+            errors.append(repr(e))
+
+    def writer(user_id):
+        client = login(app.test_client(), user_id)
+        for n in range(attempts_per_writer):
+            response = play_quiz(client, n % 3 + 1)
+            assert response.status_code == 200 and response.get_json()['success'], response.data
+
+    def reader(user_id):
+        client = login(app.test_client(), user_id)
+        for n in range(reads_per_reader):
+            for url in ('/profile', '/packs', f'/leaderboard/{n % 3 + 1}'):
+                response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+
+    def long_write():
+        # Another connection holds the write lock for a while; submissions must wait for it
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(UserQuizStat.__table__.insert().values(
+                    user_id=1, quiz_pack_id=1, score=0, total_questions=8,
+                    completed_at=datetime.utcnow(), user_answers_data='[]', avg_time_per_question=1.0))
+                time.sleep(0.3)
+
+    threads = [threading.Thread(target=run, args=(lambda u=u: writer(u),)) for u in range(1, writers + 1)]
+    threads += [threading.Thread(target=run, args=(lambda u=u: reader(u),))
+                for u in range(writers + 1, writers + readers + 1)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    long_write()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads)
+    assert not errors, errors
+
+    with app.app_context():
+        recorded = db.session.execute(text('SELECT COUNT(*) FROM user_quiz_stat')).scalar()
+        db.session.remove()
+    # Seeded history, every submission and the long write
+    assert recorded == (writers + readers) * 3 + writers * attempts_per_writer + 1
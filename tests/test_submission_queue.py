@@ -0,0 +1,69 @@
+"""Write-behind submissions (see submission_queue.py): the writer thread survives failing batches."""
+import time
+
+import pytest
+
+from conftest import play_quiz
+from submission_queue import submission_writer
+
+
+@pytest.fixture
+def write_behind(app, monkeypatch):
+    monkeypatch.setattr(submission_writer, 'enabled', True)
+    monkeypatch.setattr(submission_writer, 'flush_interval', 0.01)
+    yield submission_writer
+
+
+def submit_and_follow(client, pack_id=1):
+    """Submits one attempt in write-behind mode and returns (pending response, seconds spent waiting)."""
+    response = play_quiz(client, pack_id)
+    assert response.status_code == 200, response.data
+    pending_url = response.get_json()['redirect_url']
+    assert '/pending/' in pending_url
+    start = time.perf_counter()
+    pending = client.get(pending_url)
+    return pending, time.perf_counter() - start
+
+
+def test_attempt_is_written_in_the_background(seed, client, login, write_behind):
+    seed(users=1, packs=1)
+    login(client, 1)
+    pending, _ = submit_and_follow(client)
+    assert pending.status_code == 302
+    assert '/quiz_results/1/' in pending.headers['Location']
+
+
+def test_failing_leaderboard_refresh_does_not_stop_the_writer(seed, client, login, write_behind, monkeypatch):
+    seed(users=1, packs=1)
+    login(client, 1)
+
+    def broken_refresh(pairs):
+        raise RuntimeError("leaderboard unavailable")
+    monkeypatch.setattr('submission_queue.leaderboards.refresh', broken_refresh)
+
+    for _ in range(2): # The second attempt needs the writer thread to be still running
+        pending, waited = submit_and_follow(client)
+        assert pending.status_code == 302
+        assert '/quiz_results/1/' in pending.headers['Location'] # Committed before the refresh failed
+        assert waited < write_behind.wait_timeout / 2
+    assert write_behind._thread.is_alive()
+
+
+def test_waiters_are_released_when_a_batch_fails(seed, client, login, write_behind, monkeypatch):
+    seed(users=1, packs=1)
+    login(client, 1)
+
+    def broken_write(batch):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(write_behind, '_write_batch', broken_write)
+
+    pending, waited = submit_and_follow(client)
+    assert pending.status_code == 302
+    assert pending.headers['Location'].endswith('/packs') # Reported as not found, without waiting for the timeout
+    assert waited < write_behind.wait_timeout / 2
+    assert write_behind._thread.is_alive()
+
+    monkeypatch.undo()
+    monkeypatch.setattr(submission_writer, 'enabled', True)
+    pending, _ = submit_and_follow(client)
+    assert '/quiz_results/1/' in pending.headers['Location']
@@ -0,0 +1,51 @@
+"""Identity cache behind the user loader: invalidation races (see user_cache.py)."""
+import threading
+
+from models import db, User
+from user_cache import UserCache, user_cache
+
+
+def rename(user_id, name):
+    user = db.session.get(User, user_id)
+    user.name = name
+    db.session.commit()
+
+
+def test_invalidation_during_a_load_skips_the_store(app, seed, monkeypatch):
+    seed(users=1)
+    read = UserCache._read
+
+    def read_then_rename(user_id):
+        row = read(user_id)
+        monkeypatch.setattr(UserCache, '_read', staticmethod(read)) # Only the first load races
+        rename(user_id, 'renamed') # Lands between the read and the store
+        return row
+
+    monkeypatch.setattr(UserCache, '_read', staticmethod(read_then_rename))
+    misses = user_cache.misses
+    with app.app_context():
+        assert user_cache.load(1).name == 'user1' # Served, but not cached
+        assert user_cache.load(1).name == 'renamed'
+        assert user_cache.misses - misses == 2
+        assert (user_cache._loading, user_cache._generations) == ({}, {})
+        db.session.remove()
+
+
+def test_load_between_flush_and_commit_is_dropped_at_commit(app, seed):
+    seed(users=1)
+
+    def load_in_another_session():
+        with app.app_context():
+            assert user_cache.load(1).name == 'user1' # The rename is not committed yet
+            db.session.remove()
+
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.name = 'renamed'
+        db.session.flush() # after_update invalidates here
+        loader = threading.Thread(target=load_in_another_session)
+        loader.start()
+        loader.join()
+        db.session.commit()
+        assert user_cache.load(1).name == 'renamed'
+        db.session.remove()
@@ -0,0 +1,85 @@
+"""Bulk user import: `flask import-users` (see user_import.py)."""
+import json
+
+from conftest import PASSWORD
+from models import db, User
+from user_import import import_users
+
+CSV_FILE = """name,email,password
+alice,alice@example.com,alice-pw
+bob,bob@example.com,bob-pw
+alice2,alice@example.com,other-pw
+nopassword,nopassword@example.com,
+taken,user1@seed.local,taken-pw
+carol,carol@example.com,carol-pw
+dave,dave@example.com,dave-pw
+"""
+
+
+def run_import(app, path, *options):
+    result = app.test_cli_runner().invoke(args=['import-users', str(path), '--workers', '0', *options])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def users(app):
+    """{name: (email, password hash verifies with '<name>-pw')} of every user."""
+    with app.app_context():
+        found = {user.name: (user.email, user.check_password(f'{user.name}-pw')) for user in User.query.all()}
+        db.session.remove()
+    return found
+
+
+def test_csv_import(app, seed, tmp_path):
+    seed(users=1)
+    path = tmp_path / 'users.csv'
+    path.write_text(CSV_FILE, encoding='utf-8')
+    result = run_import(app, path, '--batch-size', '2')
+
+    # Valid rows alice, bob | taken, carol | dave: three batches, the second one minus the taken email
+    assert "Imported 4 users in 3 batches, skipped 3" in result.stdout
+    assert result.stderr.splitlines() == [
+        "Line 4: skipped, duplicate email 'alice@example.com' in file",
+        "Line 5: skipped, name, email and password are required",
+        "Line 6: skipped, email 'user1@seed.local' is already registered",
+    ]
+    imported = users(app)
+    assert sorted(imported) == ['alice', 'bob', 'carol', 'dave', 'user1']
+    assert all(verifies for name, (_, verifies) in imported.items() if name != 'user1') # Hashed with hash_many
+    assert imported['alice'][0] == 'alice@example.com'
+
+
+def test_jsonl_import(app, seed, tmp_path):
+    seed(users=1)
+    lines = [
+        json.dumps({'name': 'erin', 'email': 'erin@example.com', 'password': 'erin-pw'}),
+        '{"name": "broken"',
+        json.dumps({'name': 'user1', 'email': 'new@example.com', 'password': 'user1-pw'}), # Name already taken
+        json.dumps({'name': 'frank', 'email': 'frank@example.com'}),
+        json.dumps({'name': 'gina', 'email': 'gina@example.com', 'password': 'gina-pw'}),
+    ]
+    path = tmp_path / 'users.jsonl'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    result = run_import(app, path)
+
+    assert "Imported 2 users in 1 batches, skipped 3" in result.stdout
+    errors = result.stderr.splitlines()
+    assert errors[0].startswith("Line 2: skipped, invalid JSON")
+    assert errors[1:] == ["Line 3: skipped, user name 'user1' already exists",
+                          "Line 4: skipped, name, email and password are required"]
+    imported = users(app)
+    assert imported['erin'] == ('erin@example.com', True)
+    assert imported['gina'] == ('gina@example.com', True)
+
+
+def test_batches_commit_independently(app, seed):
+    seed(users=0)
+    rows = [(n + 2, {'name': f'person{n}', 'email': f'person{n}@example.com', 'password': PASSWORD})
+            for n in range(7)]
+    rows.insert(3, (99, {'name': 'person0', 'email': 'someone@example.com', 'password': PASSWORD}))
+    with app.app_context():
+        report = import_users(iter(rows), batch_size=3)
+        assert (report.imported, report.batches) == (7, 3)
+        assert report.skipped == [(99, "duplicate name 'person0' in file")]
+        assert User.query.count() == 7
+        db.session.remove()
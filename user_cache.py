@@ -0,0 +1,144 @@
+# --- Standard Library Imports ---
+from collections import OrderedDict
+import threading
+import time
+
+# --- Third-Party Library Imports ---
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# --- Project File Imports ---
+from models import db, User
+
+
+class CachedUser(UserMixin):
+    """
+    Lightweight, read-only snapshot of a User row, used as current_user.
+    It carries only the columns the views and templates read; code that needs
+    to modify the user must load the User model.
+    """
+
+    def __init__(self, id, name, email, registered_at):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.registered_at = registered_at
+
+    def __repr__(self):
+        """Returns a string representation of the CachedUser object for debugging."""
+        return f'<CachedUser {self.name}>'
+
+
+class UserCache:
+    """
+    TTL-bounded identity cache behind Flask-Login's user loader, so that an
+    authenticated request does not need a SQL round-trip to load its user.
+    Entries are dropped when the User row is updated or deleted through the ORM,
+    at flush and again after the commit; the TTL bounds staleness for changes made
+    elsewhere (other processes, bulk SQL). A load that overlaps an invalidation of
+    the same user does not store its row, which may predate the change.
+    """
+
+    def __init__(self, ttl_seconds=300, max_size=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict() # user_id -> (expires_at, CachedUser), least recently used first
+        self._lock = threading.Lock()
+        self._loading = {} # user_id -> loads in progress
+        self._generations = {} # user_id -> invalidations seen while loads were in progress
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        """Reads the TTL and the size limit from the application config."""
+        self.ttl_seconds = app.config.get('USER_CACHE_TTL_SECONDS', self.ttl_seconds)
+        self.max_size = app.config.get('USER_CACHE_SIZE', self.max_size)
+
+    def load(self, user_id):
+        """Returns the CachedUser for an id, reading the database only on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+            self._loading[user_id] = self._loading.get(user_id, 0) + 1
+
+        try:
+            row = self._read(user_id)
+        finally:
+            with self._lock:
+                stale = self._generations.get(user_id, 0) != generation
+                self._loading[user_id] -= 1
+                if not self._loading[user_id]: # Generations only matter while loads overlap
+                    del self._loading[user_id]
+                    self._generations.pop(user_id, None)
+        if row is None:
+            return None
+        cached_user = CachedUser(row.id, row.name, row.email, row.registered_at)
+        if stale: # Invalidated during the read: serve this request, but do not cache
+            return cached_user
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl_seconds, cached_user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return cached_user
+
+    @staticmethod
+    def _read(user_id):
+        return db.session.query(User.id, User.name, User.email, User.registered_at).filter_by(id=user_id).first()
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if user_id in self._loading:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters for monitoring."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared cache instance, configured in app.py
+user_cache = UserCache()
+
+
+# --- Invalidation on User changes ---
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    # Until the commit, other sessions still read the old row and could cache it again
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop('changed_user_ids', None)